@@ -1,23 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlmodel import Session, select
 from typing import List
 from app.core.database import get_session
+from app.core.security import get_current_admin_user, get_current_user, security
+from app.core.export import export_media_type, model_columns, stream_export
 from app.models.models import Asset, User, UserRole
+from app.services.answer_keys import without_answers
+from app.services.event_bus import AssetPublished, event_bus
+from app.services.resource_versions import invalidate_catalog
 
 router = APIRouter()
 
+
+async def require_admin_for_export(request: Request, session: Session = Depends(get_session)):
+    """Bulk NDJSON/CSV exports are admin-only; the plain JSON lists are unchanged."""
+    if export_media_type(request) is None:
+        return
+    credentials = await security(request)
+    await get_current_admin_user(await get_current_user(credentials, session))
+
 # --- Assets ---
 @router.post("/assets/", response_model=Asset)
 def create_asset(asset: Asset, session: Session = Depends(get_session)):
     session.add(asset)
     session.commit()
     session.refresh(asset)
+    invalidate_catalog()
+    event_bus.publish(AssetPublished(asset_id=asset.id, skill_tag=asset.skill_tag, version=asset.current_version))
     return asset
 
-@router.get("/assets/", response_model=List[Asset])
-def read_assets(session: Session = Depends(get_session)):
-    assets = session.exec(select(Asset)).all()
-    return assets
+@router.get("/assets/", response_model=List[Asset], dependencies=[Depends(require_admin_for_export)])
+def read_assets(request: Request, session: Session = Depends(get_session)):
+    media_type = export_media_type(request)
+    if media_type:
+        return stream_export(
+            select(Asset).order_by(Asset.id), lambda row: without_answers(row[0]),
+            model_columns(Asset), media_type, "assets",
+        )
+    # Answer keys stay on the server (quizzes are graded by POST /quizzes/{id}/submit)
+    return [without_answers(asset) for asset in session.exec(select(Asset)).all()]
 
 # --- Users ---
 @router.post("/users/", response_model=User)
@@ -27,8 +48,15 @@ def create_user(user: User, session: Session = Depends(get_session)):
     session.refresh(user)
     return user
 
-@router.get("/users/all", response_model=List[User])
-def read_users(session: Session = Depends(get_session)):
+@router.get("/users/all", response_model=List[User], dependencies=[Depends(require_admin_for_export)])
+def read_users(request: Request, session: Session = Depends(get_session)):
+    media_type = export_media_type(request)
+    if media_type:
+        # Exports never include password hashes
+        return stream_export(
+            select(User).order_by(User.id), lambda row: row[0].model_dump(exclude={"hashed_password"}),
+            model_columns(User, exclude=["hashed_password"]), media_type, "users",
+        )
     return session.exec(select(User)).all()
 
 @router.get("/users/{user_id}", response_model=User)
@@ -2,17 +2,28 @@
 Admin Asset Management API endpoints.
 Handles asset creation, updates (versioning), and archival.
 """
+import time
 from datetime import datetime
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query, Request, Response
+from starlette.requests import ClientDisconnect
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import bindparam, insert, update
 from sqlmodel import Session, select
 from pydantic import BaseModel
+from app.core.config import settings
 from app.core.database import get_session
 from app.core.security import get_current_admin_user
 from app.models.models import User, Asset, AssetVersion
+from app.services.event_bus import AssetPublished, CatalogChanged, event_bus
+from app.services.resource_versions import invalidate_asset, invalidate_assets, invalidate_catalog
+from app.services import resumable_uploads
+from app.services.uploads import StreamingMultipartUpload, UploadError, publish_content_version
 
 router = APIRouter()
 
+MAX_BULK_ITEMS = 1000
+
 
 # --- Request/Response Models ---
 
@@ -38,6 +49,36 @@ class AssetUpdateRequest(BaseModel):
     is_active: Optional[bool] = None
 
 
+class AssetBulkCreateRequest(BaseModel):
+    assets: List[AssetCreateRequest]
+
+
+class AssetBulkUpdateItem(AssetUpdateRequest):
+    id: str
+
+
+class AssetBulkUpdateRequest(BaseModel):
+    assets: List[AssetBulkUpdateItem]
+
+
+class AssetBulkArchiveRequest(BaseModel):
+    ids: List[str]
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    status: str  # created, updated, archived, unchanged, not_found, invalid
+    detail: Optional[str] = None
+    version: Optional[int] = None
+
+
+class BulkResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
+
+
 class AssetResponse(BaseModel):
     id: str
     title: str
@@ -60,10 +101,26 @@ class AssetVersionResponse(BaseModel):
     version: int
     content_url: str
     content_type: str
+    file_size_bytes: Optional[int] = None
     created_at: datetime
     created_by: str
 
 
+class UploadResponse(BaseModel):
+    version: AssetVersionResponse
+    sha256: str
+    size_bytes: int
+    deduplicated: bool  # True if identical bytes were already stored
+
+
+class ResumableUploadResponse(BaseModel):
+    id: str
+    asset_id: str
+    upload_offset: int
+    upload_length: int
+    expires_at: datetime
+
+
 # --- Admin Endpoints ---
 
 @router.post("/assets", response_model=AssetResponse)
@@ -106,6 +163,10 @@ async def create_asset(
     
     session.commit()
     session.refresh(new_asset)
+    invalidate_catalog()
+    event_bus.publish(AssetPublished(
+        asset_id=new_asset.id, skill_tag=new_asset.skill_tag, version=new_asset.current_version
+    ))
     
     return AssetResponse(
         id=str(new_asset.id),
@@ -151,6 +212,192 @@ async def list_assets(
     return assets
 
 
+# --- Bulk operations ---
+# One transaction per request: set-based UPDATE ... WHERE id IN (...) and
+# executemany INSERTs, per-item results, and a single CatalogChanged event.
+
+FAILED_STATUSES = {"not_found", "invalid"}
+
+
+def _check_bulk_size(items: list):
+    if len(items) > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Bulk request exceeds {MAX_BULK_ITEMS} items")
+
+
+def _invalid_reason(item) -> Optional[str]:
+    if item.difficulty_level is not None and not 1 <= item.difficulty_level <= 5:
+        return "difficulty_level must be between 1 and 5"
+    if item.estimated_duration_minutes is not None and item.estimated_duration_minutes < 0:
+        return "estimated_duration_minutes must not be negative"
+    return None
+
+
+def _bulk_response(results: List[BulkItemResult]) -> BulkResponse:
+    failed = sum(1 for r in results if r.status in FAILED_STATUSES)
+    return BulkResponse(succeeded=len(results) - failed, failed=failed, results=results)
+
+
+def _publish_bulk(action: str, asset_ids: List[str]):
+    if asset_ids:
+        invalidate_assets(asset_ids)
+        event_bus.publish(CatalogChanged(action=action, asset_ids=asset_ids))
+
+
+@router.post("/assets/bulk", response_model=BulkResponse)
+async def bulk_create_assets(
+    request: AssetBulkCreateRequest,
+    current_user: User = Depends(get_current_admin_user),
+    session: Session = Depends(get_session)
+):
+    """
+    Create many assets at once: one INSERT for the assets and one for their
+    initial versions. Invalid items are reported and skipped.
+    """
+    _check_bulk_size(request.assets)
+    results: List[BulkItemResult] = []
+    asset_rows, version_rows = [], []
+    for index, item in enumerate(request.assets):
+        reason = _invalid_reason(item)
+        if reason:
+            results.append(BulkItemResult(index=index, status="invalid", detail=reason))
+            continue
+        asset = Asset(**item.model_dump(), created_by=str(current_user.id), current_version=1)
+        asset_rows.append(asset.model_dump())
+        version_rows.append(AssetVersion(
+            asset_id=asset.id,
+            version=1,
+            content_url=item.content_url,
+            content_type=item.content_type,
+            file_size_bytes=item.file_size_bytes,
+            created_by=str(current_user.id)
+        ).model_dump())
+        results.append(BulkItemResult(index=index, id=asset.id, status="created", version=1))
+
+    if asset_rows:
+        session.execute(insert(Asset.__table__), asset_rows)
+        session.execute(insert(AssetVersion.__table__), version_rows)
+        session.commit()
+    _publish_bulk("created", [row["id"] for row in asset_rows])
+    return _bulk_response(results)
+
+
+@router.patch("/assets/bulk", response_model=BulkResponse)
+async def bulk_update_assets(
+    request: AssetBulkUpdateRequest,
+    current_user: User = Depends(get_current_admin_user),
+    session: Session = Depends(get_session)
+):
+    """
+    Update many assets at once. Items making the same field changes share one
+    UPDATE ... WHERE id IN (...); a new content_url creates a version, as in
+    the single-asset PATCH, with all version rows inserted together.
+    """
+    _check_bulk_size(request.assets)
+    ids = {item.id for item in request.assets}
+    existing = {
+        row.id: row for row in session.exec(
+            select(Asset.id, Asset.content_url, Asset.content_type, Asset.current_version, Asset.file_size_bytes)
+            .where(Asset.id.in_(ids))
+            .with_for_update()
+        ).all()
+    } if ids else {}
+
+    now = datetime.utcnow()
+    results: List[BulkItemResult] = []
+    groups = {}  # frozen field changes -> asset ids
+    version_updates, version_rows = [], []
+    seen = set()
+    for index, item in enumerate(request.assets):
+        current = existing.get(item.id)
+        reason = "Duplicate id in request" if item.id in seen else _invalid_reason(item)
+        if current is None:
+            results.append(BulkItemResult(index=index, id=item.id, status="not_found"))
+            continue
+        if reason:
+            results.append(BulkItemResult(index=index, id=item.id, status="invalid", detail=reason))
+            continue
+        seen.add(item.id)
+
+        changes = item.model_dump(exclude_none=True, exclude={"id", "content_url", "file_size_bytes"})
+        if changes:
+            groups.setdefault(tuple(sorted(changes.items())), []).append(item.id)
+
+        version = current.current_version
+        if item.content_url and item.content_url != current.content_url:
+            version += 1
+            file_size = item.file_size_bytes or current.file_size_bytes
+            version_updates.append({
+                "b_id": item.id, "b_content_url": item.content_url, "b_version": version, "b_file_size": file_size,
+            })
+            version_rows.append(AssetVersion(
+                asset_id=item.id,
+                version=version,
+                content_url=item.content_url,
+                content_type=current.content_type,
+                file_size_bytes=file_size,
+                created_by=str(current_user.id)
+            ).model_dump())
+        elif not changes:
+            results.append(BulkItemResult(index=index, id=item.id, status="unchanged", version=version))
+            continue
+        results.append(BulkItemResult(index=index, id=item.id, status="updated", version=version))
+
+    table = Asset.__table__
+    for changes, asset_ids in groups.items():
+        session.execute(update(table).where(table.c.id.in_(asset_ids)).values(**dict(changes), updated_at=now))
+    if version_updates:
+        session.execute(
+            update(table).where(table.c.id == bindparam("b_id")).values(
+                content_url=bindparam("b_content_url"),
+                current_version=bindparam("b_version"),
+                file_size_bytes=bindparam("b_file_size"),
+                updated_at=now,
+            ),
+            version_updates,
+        )
+        session.execute(insert(AssetVersion.__table__), version_rows)
+    session.commit()
+
+    _publish_bulk("updated", [r.id for r in results if r.status == "updated"])
+    return _bulk_response(results)
+
+
+@router.post("/assets/bulk/archive", response_model=BulkResponse)
+async def bulk_archive_assets(
+    request: AssetBulkArchiveRequest,
+    current_user: User = Depends(get_current_admin_user),
+    session: Session = Depends(get_session)
+):
+    """Archive many assets with a single UPDATE ... WHERE id IN (...)."""
+    _check_bulk_size(request.ids)
+    archived_already = dict(session.exec(
+        select(Asset.id, Asset.is_archived).where(Asset.id.in_(set(request.ids)))
+    ).all()) if request.ids else {}
+
+    results: List[BulkItemResult] = []
+    to_archive = []
+    for index, asset_id in enumerate(request.ids):
+        if asset_id not in archived_already:
+            results.append(BulkItemResult(index=index, id=asset_id, status="not_found"))
+        elif archived_already[asset_id]:
+            results.append(BulkItemResult(index=index, id=asset_id, status="unchanged"))
+        else:
+            archived_already[asset_id] = True  # Repeats of this id are no-ops
+            to_archive.append(asset_id)
+            results.append(BulkItemResult(index=index, id=asset_id, status="archived"))
+
+    if to_archive:
+        table = Asset.__table__
+        session.execute(
+            update(table)
+            .where(table.c.id.in_(to_archive))
+            .values(is_archived=True, is_active=False, updated_at=datetime.utcnow())
+        )
+        session.commit()
+    _publish_bulk("archived", to_archive)
+    return _bulk_response(results)
+
+
 @router.patch("/assets/{asset_id}", response_model=AssetResponse)
 async def update_asset(
     asset_id: str,
@@ -203,6 +450,8 @@ async def update_asset(
     session.add(asset)
     session.commit()
     session.refresh(asset)
+    invalidate_asset(asset.id)
+    event_bus.publish(AssetPublished(asset_id=asset.id, skill_tag=asset.skill_tag, version=asset.current_version))
     
     return AssetResponse(
         id=str(asset.id),
@@ -241,6 +490,7 @@ async def archive_asset(
     
     session.add(asset)
     session.commit()
+    invalidate_asset(asset.id)
     return {"message": "Asset archived successfully"}
 
 
@@ -260,3 +510,185 @@ async def get_asset_versions(
     ).all()
     
     return versions
+
+
+@router.post("/assets/{asset_id}/content", response_model=UploadResponse)
+async def upload_asset_content(
+    asset_id: str,
+    request: Request,
+    current_user: User = Depends(get_current_admin_user),
+    session: Session = Depends(get_session)
+):
+    """
+    Upload a new content file for an asset (multipart/form-data, part "file";
+    optional "content_type" field). The body is streamed to disk and hashed,
+    never buffered, and becomes the asset's next version.
+    """
+    asset = session.get(Asset, asset_id)
+    if not asset:
+        raise HTTPException(status_code=404, detail="Asset not found")
+
+    try:
+        upload = StreamingMultipartUpload(request.headers.get("content-type", ""), settings.MAX_UPLOAD_BYTES)
+        try:
+            async for chunk in request.stream():
+                if chunk:
+                    await run_in_threadpool(upload.feed, chunk)
+            parsed = await run_in_threadpool(upload.finish)
+        except BaseException:
+            # Client disconnects and errors leave no partial file behind
+            upload.abort()
+            raise
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    version = publish_content_version(
+        session,
+        asset,
+        parsed.blob,
+        parsed.filename,
+        str(current_user.id),
+        content_type=parsed.fields.get("content_type"),
+    )
+    return UploadResponse(
+        version=AssetVersionResponse.model_validate(version, from_attributes=True),
+        sha256=parsed.blob.digest,
+        size_bytes=parsed.blob.size,
+        deduplicated=parsed.blob.deduplicated,
+    )
+
+
+# --- Resumable uploads (tus 1.0 core protocol + creation/termination) ---
+
+def _tus_headers(upload=None) -> dict:
+    headers = {"Tus-Resumable": resumable_uploads.TUS_VERSION, "Cache-Control": "no-store"}
+    if upload is not None:
+        headers["Upload-Offset"] = str(upload.upload_offset)
+        headers["Upload-Length"] = str(upload.upload_length)
+        headers["Upload-Expires"] = upload.expires_at.strftime("%a, %d %b %Y %H:%M:%S GMT")
+    return headers
+
+
+def _load_upload(session: Session, upload_id: str):
+    try:
+        return resumable_uploads.get_upload(session, upload_id)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers=_tus_headers())
+
+
+@router.post("/assets/{asset_id}/uploads", status_code=201, response_model=ResumableUploadResponse)
+async def create_resumable_upload(
+    asset_id: str,
+    response: Response,
+    upload_length: int = Header(..., alias="Upload-Length"),
+    upload_metadata: Optional[str] = Header(None, alias="Upload-Metadata"),
+    current_user: User = Depends(get_current_admin_user),
+    session: Session = Depends(get_session)
+):
+    """
+    Start a resumable upload of the asset's next content file.
+    Upload-Metadata may carry base64 `filename` and `content_type`.
+    """
+    asset = session.get(Asset, asset_id)
+    if not asset:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    try:
+        metadata = resumable_uploads.parse_metadata(upload_metadata)
+        upload = resumable_uploads.create_upload(session, asset, str(current_user.id), upload_length, metadata)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers=_tus_headers())
+
+    response.headers.update(_tus_headers(upload))
+    response.headers["Location"] = f"/api/v1/admin/uploads/{upload.id}"
+    return ResumableUploadResponse(**upload.model_dump(include=set(ResumableUploadResponse.model_fields)))
+
+
+@router.head("/uploads/{upload_id}")
+async def get_upload_offset(
+    upload_id: str,
+    current_user: User = Depends(get_current_admin_user),
+    session: Session = Depends(get_session)
+):
+    """Current offset of a resumable upload (where the next PATCH must start)."""
+    upload = _load_upload(session, upload_id)
+    return Response(status_code=200, headers=_tus_headers(upload))
+
+
+@router.patch("/uploads/{upload_id}")
+async def append_upload_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+    current_user: User = Depends(get_current_admin_user),
+    session: Session = Depends(get_session)
+):
+    """
+    Append the request body at Upload-Offset. Bytes are streamed to disk as
+    they arrive; if the connection drops, whatever arrived is kept and the
+    client resumes from the offset reported by HEAD.
+    """
+    if request.headers.get("content-type") != resumable_uploads.CONTENT_TYPE:
+        raise HTTPException(status_code=415, detail=f"Content-Type must be {resumable_uploads.CONTENT_TYPE}")
+    upload = _load_upload(session, upload_id)
+    try:
+        lease = resumable_uploads.claim(session, upload, upload_offset)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers=_tus_headers(upload))
+
+    writer = await run_in_threadpool(resumable_uploads.ChunkWriter, upload)
+    error = None
+    renew_every = settings.UPLOAD_LEASE_SECONDS / 3
+    last_renewal = time.monotonic()
+    try:
+        async for chunk in request.stream():
+            # Renew before writing: after a stall the lease may belong to another request by now
+            if time.monotonic() - last_renewal > renew_every:
+                await run_in_threadpool(resumable_uploads.renew_lease, session, upload.id, lease)
+                last_renewal = time.monotonic()
+            if chunk:
+                await run_in_threadpool(writer.write, chunk)
+    except ClientDisconnect:
+        pass  # Keep what arrived; the client resumes from HEAD's offset
+    except UploadError as e:
+        error = e
+    finally:
+        try:
+            await run_in_threadpool(resumable_uploads.release, session, upload, writer, lease)
+        except UploadError as e:
+            error = error or e
+
+    if error is not None:
+        raise HTTPException(status_code=error.status_code, detail=error.detail, headers=_tus_headers(upload))
+    return Response(status_code=204, headers=_tus_headers(upload))
+
+
+@router.post("/uploads/{upload_id}/finalize", response_model=UploadResponse)
+async def finalize_upload(
+    upload_id: str,
+    current_user: User = Depends(get_current_admin_user),
+    session: Session = Depends(get_session)
+):
+    """Turn a complete resumable upload into the asset's next version."""
+    upload = _load_upload(session, upload_id)
+    try:
+        version, blob = await run_in_threadpool(resumable_uploads.finalize, session, upload, str(current_user.id))
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers=_tus_headers(upload))
+    return UploadResponse(
+        version=AssetVersionResponse.model_validate(version, from_attributes=True),
+        sha256=blob.digest,
+        size_bytes=blob.size,
+        deduplicated=blob.deduplicated,
+    )
+
+
+@router.delete("/uploads/{upload_id}", status_code=204)
+async def terminate_upload(
+    upload_id: str,
+    current_user: User = Depends(get_current_admin_user),
+    session: Session = Depends(get_session)
+):
+    """Abandon a resumable upload and delete the bytes received so far."""
+    upload = _load_upload(session, upload_id)
+    resumable_uploads.terminate(session, upload)
+    return Response(status_code=204, headers=_tus_headers())
@@ -1,54 +1,203 @@
-from typing import List, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException
+import time
+from typing import List, Dict, Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlmodel import Session, select, func
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from app.core.database import get_session
 from app.models.models import User, UserInteraction, SkillMastery, InteractionStatus
+from app.core.http_cache import CACHE_CONTROL_USER, cached_json_response, make_etag
+from app.core.security import get_current_admin_user, get_current_user
+from app.services import department_analytics, learner_activity
+from app.services.interaction_snapshot import GROUP_BY, interaction_snapshot
+from app.services.learning_stats import get_user_stats
+from app.services.resource_versions import department_version, state_version
+from app.services.skill_gaps import skill_gap_matrix
 
 router = APIRouter()
 
+# --- Department views ---
+# Declared before the /analytics/{user_id}/... routes so "departments" is never taken for a user id.
+
+def _check_department_access(current_user: User, department: str):
+    """Managers see their own department; admins see any."""
+    if not current_user.is_admin and current_user.department != department:
+        raise HTTPException(status_code=403, detail="Not authorized to view this department")
+
+
+def _department_response(request: Request, current_user: User, department: str, kind: str, params: tuple, build):
+    """Access-checked, and cached until the department's version changes."""
+    _check_department_access(current_user, department)
+    etag = make_etag("department", kind, department, *params, department_version(department))
+    return cached_json_response(
+        request, f"analytics:department:{department}:{kind}:{etag}", build,
+        etag=etag, ttl=300, cache_control=CACHE_CONTROL_USER
+    )
+
+
+@router.get("/analytics/departments/{department}")
+def get_department_overview(
+    department: str,
+    request: Request,
+    days: int = Query(28, ge=1, le=365),
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session)
+):
+    """
+    Department totals over the last `days`: headcount, participation,
+    completion rate, average score, learning hours per learner per week.
+    """
+    def build():
+        overview = department_analytics.department_overview(session, department, days)
+        if overview is None:
+            raise HTTPException(status_code=404, detail="Department not found")
+        return overview
+    return _department_response(request, current_user, department, "overview", (days,), build)
+
+
+@router.get("/analytics/departments/{department}/hours")
+def get_department_weekly_hours(
+    department: str,
+    request: Request,
+    weeks: int = Query(12, ge=1, le=104),
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session)
+):
+    """Learning hours and completed modules per week."""
+    return _department_response(
+        request, current_user, department, "hours", (weeks,),
+        lambda: department_analytics.department_weekly_hours(session, department, weeks),
+    )
+
+
+@router.get("/analytics/departments/{department}/skills")
+def get_department_skill_distribution(
+    department: str,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session)
+):
+    """Skill mastery distribution (learners per proficiency bucket, per skill)."""
+    return _department_response(
+        request, current_user, department, "skills", (),
+        lambda: department_analytics.department_mastery_distribution(session, department),
+    )
+
+
+# --- Skill gaps ---
+
+@router.get("/analytics/skill-gaps")
+def get_skill_gaps(
+    department: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=500),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Skills learners target but don't hold yet, by number of learners with the
+    gap. Org-wide for admins; pass `department` to restrict (managers may only
+    view their own).
+    """
+    if department is None:
+        if not current_user.is_admin:
+            raise HTTPException(status_code=403, detail="Not authorized to view organization-wide skill gaps")
+    else:
+        _check_department_access(current_user, department)
+    skill_gap_matrix.ensure_fresh()
+    if department is not None and not skill_gap_matrix.has_department(department):
+        raise HTTPException(status_code=404, detail="Department not found")
+    return {
+        "department": department,
+        "refreshed_at": skill_gap_matrix.refreshed_at,
+        "skills": skill_gap_matrix.gap_counts(department, limit),
+    }
+
+
+@router.get("/analytics/skill-gaps/departments")
+def get_top_skill_gaps_by_department(
+    limit: int = Query(5, ge=1, le=50),
+    admin_user: User = Depends(get_current_admin_user)
+):
+    """The top missing skills of every department."""
+    skill_gap_matrix.ensure_fresh()
+    return {
+        "refreshed_at": skill_gap_matrix.refreshed_at,
+        "departments": skill_gap_matrix.top_gaps_by_department(limit),
+    }
+
+
+# --- Cohort analytics (admin) ---
+
+@router.get("/analytics/cohorts")
+def get_cohort_analytics(
+    group_by: str = Query("difficulty", description=f"One of: {', '.join(GROUP_BY)}"),
+    department: Optional[List[str]] = Query(None),
+    skill: Optional[List[str]] = Query(None),
+    content_type: Optional[List[str]] = Query(None),
+    difficulty: Optional[List[int]] = Query(None),
+    status: Optional[List[InteractionStatus]] = Query(None),
+    since: Optional[date] = Query(None, description="First interaction day (inclusive)"),
+    until: Optional[date] = Query(None, description="Last interaction day (inclusive)"),
+    joined_after: Optional[date] = Query(None, description="Cohort: users created on or after this day"),
+    joined_before: Optional[date] = Query(None, description="Cohort: users created on or before this day"),
+    admin_user: User = Depends(get_current_admin_user)
+):
+    """
+    Ad-hoc cohort analytics, e.g. average score by difficulty for new hires:
+    ?group_by=difficulty&joined_after=2026-07-01. Answered from the worker's
+    in-memory interaction snapshot (refreshed every few minutes), not SQL.
+    """
+    if group_by not in GROUP_BY:
+        raise HTTPException(status_code=422, detail=f"group_by must be one of: {', '.join(GROUP_BY)}")
+    try:
+        snapshot = interaction_snapshot.get()
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    start = time.perf_counter()
+    query = snapshot.query().where(
+        department=department, skill=skill, content_type=content_type, difficulty=difficulty, status=status,
+        since=since, until=until, joined_after=joined_after, joined_before=joined_before,
+    )
+    groups = query.group_by(group_by)
+    totals = query.summary()
+    return {
+        "group_by": group_by,
+        "totals": totals,
+        "groups": groups,
+        "snapshot": snapshot.info(),
+        "query_ms": round((time.perf_counter() - start) * 1000, 1),
+    }
+
+
 @router.get("/analytics/{user_id}/overview")
 def get_analytics_overview(user_id: str, session: Session = Depends(get_session)):
     """
-    Get high-level performance metrics: Total Time, Completed Modules, Current Streak (Mock).
+    Get high-level performance metrics: total time and completed modules
+    (running stats), current and longest streaks (activity bitmap) and
+    efficiency (estimated vs. actual time over the recent daily rollups).
     """
-    # Total Time Spent
-    total_time_seconds = session.exec(
-        select(func.sum(UserInteraction.time_spent_seconds))
-        .where(UserInteraction.user_id == user_id)
-    ).one() or 0
-    
-    # Completed Modules
-    completed_count = session.exec(
-        select(func.count(UserInteraction.id))
-        .where(UserInteraction.user_id == user_id)
-        .where(UserInteraction.status == InteractionStatus.COMPLETED)
-    ).one() or 0
-
-    # Calculate "Streak" (days with at least one interaction in last 7 days)
-    # Simplified Logic: Check distinct dates in last 7 days
-    seven_days_ago = datetime.utcnow() - timedelta(days=7)
-    recent_interactions = session.exec(
-        select(UserInteraction.timestamp)
-        .where(UserInteraction.user_id == user_id)
-        .where(UserInteraction.timestamp >= seven_days_ago)
-    ).all()
-    
-    unique_days = {dt.date() for dt in recent_interactions}
-    current_streak = len(unique_days) # Placeholder logic for streak
-
+    if not session.get(User, user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+    stats = get_user_stats(session, user_id)
     return {
-        "total_learning_hours": round(total_time_seconds / 3600, 1),
-        "modules_completed": completed_count,
-        "current_streak_days": current_streak,
-        "efficiency_score": 92 # Placeholder or calculate based on time vs estimated
+        "total_learning_hours": round(stats.total_seconds / 3600, 1),
+        "modules_completed": stats.completed_count,
+        **learner_activity.streaks(session, user_id),
+        "efficiency_score": learner_activity.efficiency_score(session, user_id),
     }
 
 @router.get("/analytics/{user_id}/skills")
-def get_skill_radar_data(user_id: str, session: Session = Depends(get_session)):
+def get_skill_radar_data(user_id: str, request: Request, session: Session = Depends(get_session)):
     """
     Get skill mastery data for Radar Chart.
+    ETag follows the per-user state version, bumped whenever mastery changes.
     """
+    etag = make_etag("skills", user_id, state_version(user_id))
+    return cached_json_response(
+        request, f"analytics:skills:{user_id}:{etag}", lambda: _skill_radar(session, user_id),
+        etag=etag, ttl=300, cache_control=CACHE_CONTROL_USER
+    )
+
+def _skill_radar(session: Session, user_id: str):
     skills = session.exec(
         select(SkillMastery).where(SkillMastery.user_id == user_id)
     ).all()
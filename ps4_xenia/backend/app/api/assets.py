@@ -1,12 +1,16 @@
 """
 Public Asset API for user consumption.
 """
+import time
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlmodel import Session, select
 from pydantic import BaseModel
 from app.core.database import get_session
 from app.core.security import get_current_user
+from app.core.http_cache import CACHE_CONTROL_CATALOG, cached_json_response, make_etag
+from app.services.content_store import link_expiry, signed_url, stored_key
+from app.services.resource_versions import asset_version, catalog_version
 from app.models.models import User, Asset
 from datetime import datetime
 
@@ -22,13 +26,9 @@ class AssetPublicResponse(BaseModel):
     estimated_duration_minutes: int
     created_at: datetime
 
-import json
-from app.core.database import get_session, redis_client
-
-# ... (imports)
-
 @router.get("/library", response_model=List[AssetPublicResponse])
 async def get_asset_library(
+    request: Request,
     skill_tag: Optional[str] = None,
     content_type: Optional[str] = None,
     difficulty_level: Optional[int] = None,
@@ -43,79 +43,75 @@ async def get_asset_library(
     Returns only active, non-archived assets.
     REQ-14: Content Delivery and Caching
     """
-    # 1. Check Cache
-    cache_key = f"assets_library:{skill_tag}:{content_type}:{difficulty_level}:{search}:{skip}:{limit}"
-    
-    if redis_client:
-        try:
-            cached_data = redis_client.get(cache_key)
-            if cached_data:
-                # Deserialize and return
-                return [AssetPublicResponse(**item) for item in json.loads(cached_data)]
-        except Exception as e:
-            print(f"Cache Error: {e}")
+    # Keyed by catalog version, so admin edits produce fresh pages immediately
+    params = f"{skill_tag}:{content_type}:{difficulty_level}:{search}:{skip}:{limit}"
+    etag = make_etag("library", catalog_version(session), params)
+    cache_key = f"assets_library:{etag}"
 
-    # 2. Query Database
-    query = select(Asset).where(Asset.is_active == True, Asset.is_archived == False)
-    
-    if skill_tag:
-        query = query.where(Asset.skill_tag == skill_tag)
-    if content_type:
-        query = query.where(Asset.content_type == content_type)
-    if difficulty_level:
-        query = query.where(Asset.difficulty_level == difficulty_level)
-    if search:
-        query = query.where(Asset.title.contains(search) | Asset.description.contains(search))
+    def build():
+        query = select(Asset).where(Asset.is_active == True, Asset.is_archived == False)
         
-    query = query.order_by(Asset.created_at.desc()).offset(skip).limit(limit)
-    assets = session.exec(query).all()
-    
-    response_data = [
-        AssetPublicResponse(
-            id=str(a.id),
-            title=a.title,
-            description=a.description,
-            content_type=a.content_type,
-            skill_tag=a.skill_tag,
-            difficulty_level=a.difficulty_level,
-            estimated_duration_minutes=a.estimated_duration_minutes,
-            created_at=a.created_at
-        ) for a in assets
-    ]
-
-    # 3. Set Cache (Expire in 1 hour)
-    if redis_client:
-        try:
-            # Serialize with datetime handling (pydantic model dump handles standard types, but json.dumps needs default=str for datetime)
-            serialized_data = json.dumps([r.model_dump(mode='json') for r in response_data])
-            redis_client.setex(cache_key, 3600, serialized_data)
-        except Exception as e:
-            print(f"Cache Set Error: {e}")
+        if skill_tag:
+            query = query.where(Asset.skill_tag == skill_tag)
+        if content_type:
+            query = query.where(Asset.content_type == content_type)
+        if difficulty_level:
+            query = query.where(Asset.difficulty_level == difficulty_level)
+        if search:
+            query = query.where(Asset.title.contains(search) | Asset.description.contains(search))
             
-    return response_data
+        query = query.order_by(Asset.created_at.desc()).offset(skip).limit(limit)
+        assets = session.exec(query).all()
+        
+        return [
+            AssetPublicResponse(
+                id=str(a.id),
+                title=a.title,
+                description=a.description,
+                content_type=a.content_type,
+                skill_tag=a.skill_tag,
+                difficulty_level=a.difficulty_level,
+                estimated_duration_minutes=a.estimated_duration_minutes,
+                created_at=a.created_at
+            ) for a in assets
+        ]
+
+    # Cached as serialized + pre-compressed bytes (expire in 1 hour)
+    return cached_json_response(
+        request, cache_key, build, etag=etag, ttl=3600, cache_control=CACHE_CONTROL_CATALOG
+    )
 
 @router.get("/library/{asset_id}", response_model=AssetPublicResponse)
 async def get_asset_details(
     asset_id: str,
+    request: Request,
     current_user: User = Depends(get_current_user),
     session: Session = Depends(get_session)
 ):
     """
     Get details for a specific asset.
+    ETag is derived from the asset's version; 304 is answered from cache.
     """
-    asset = session.get(Asset, asset_id)
-    if not asset or asset.is_archived:
+    version = asset_version(session, asset_id)
+    if version is None:
         raise HTTPException(status_code=404, detail="Asset not found")
-        
-    return AssetPublicResponse(
-        id=str(asset.id),
-        title=asset.title,
-        description=asset.description,
-        content_type=asset.content_type,
-        skill_tag=asset.skill_tag,
-        difficulty_level=asset.difficulty_level,
-        estimated_duration_minutes=asset.estimated_duration_minutes,
-        created_at=asset.created_at
+    etag = make_etag("asset", asset_id, version)
+
+    def build():
+        asset = session.get(Asset, asset_id)
+        return AssetPublicResponse(
+            id=str(asset.id),
+            title=asset.title,
+            description=asset.description,
+            content_type=asset.content_type,
+            skill_tag=asset.skill_tag,
+            difficulty_level=asset.difficulty_level,
+            estimated_duration_minutes=asset.estimated_duration_minutes,
+            created_at=asset.created_at
+        )
+
+    return cached_json_response(
+        request, f"library:asset:{etag}", build, etag=etag, ttl=3600, cache_control=CACHE_CONTROL_CATALOG
     )
 
 @router.get("/library/{asset_id}/content")
@@ -126,15 +122,22 @@ async def get_asset_content(
 ):
     """
     Get content URL for an asset.
-    In a real app, this would generate a signed URL (e.g., S3/CloudFront).
+    Content in our store gets a signed, expiring link to the versioned file;
+    external content URLs are returned as-is.
     """
     asset = session.get(Asset, asset_id)
     if not asset or asset.is_archived:
         raise HTTPException(status_code=404, detail="Asset not found")
-        
-    # Mocking a signed URL generation
+
+    key = stored_key(asset.content_url)
+    if key is None:
+        return {
+            "content_url": asset.content_url,
+            "content_type": asset.content_type,
+            "expires_in_seconds": None
+        }
     return {
-        "content_url": asset.content_url,
+        "content_url": signed_url(key),
         "content_type": asset.content_type,
-        "expires_in_seconds": 3600
+        "expires_in_seconds": link_expiry() - int(time.time())
     }
@@ -19,6 +19,7 @@ from app.core.security import (
     get_current_user
 )
 from app.models.models import User, LearningStyle
+from app.services.resource_versions import invalidate_user
 
 router = APIRouter()
 security = HTTPBearer()
@@ -141,6 +142,7 @@ def login(request: Request, credentials: UserLogin, session: Session = Depends(g
     user.last_login = datetime.utcnow()
     session.add(user)
     session.commit()
+    invalidate_user(user.id)
     
     # Generate tokens
     access_token = create_access_token(data={"sub": str(user.id)})
@@ -0,0 +1,35 @@
+"""
+Content delivery API.
+Serves files from the content store through signed, expiring, versioned URLs.
+FileResponse handles Range/206 and conditional requests; no database access.
+"""
+import mimetypes
+import time
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+from app.services.content_store import content_key, content_store, verify_signature
+
+router = APIRouter()
+
+# Versioned content never changes, but the signed URL stops working at `expires`:
+# clients may cache it, without revalidating, until then
+CONTENT_CACHE_CONTROL = "private, max-age={max_age}, immutable"
+
+
+@router.get("/content/{asset_id}/v{version}/{filename}")
+def get_content(asset_id: str, version: int, filename: str, expires: int, sig: str):
+    key = content_key(asset_id, version, filename)
+    if not verify_signature(key, expires, sig):
+        raise HTTPException(status_code=403, detail="Invalid or expired content link")
+
+    path = content_store.local_path(key)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Content not found")
+
+    return FileResponse(
+        path,
+        media_type=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+        headers={"Cache-Control": CONTENT_CACHE_CONTROL.format(max_age=max(0, expires - int(time.time())))},
+        content_disposition_type="inline",
+        filename=filename,
+    )
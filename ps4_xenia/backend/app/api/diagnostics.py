@@ -0,0 +1,34 @@
+"""
+Admin diagnostics API.
+Exposes the in-process metrics registry (JSON or Prometheus text) and the
+event-loop blocking detector's per-route aggregates and recent stalls.
+"""
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import PlainTextResponse
+from app.core.security import get_current_admin_user
+from app.core.loop_monitor import loop_monitor
+from app.core.metrics import metrics
+from app.models.models import User
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+def get_metrics(
+    format: str = Query(default="json", pattern="^(json|prometheus)$"),
+    admin_user: User = Depends(get_current_admin_user)
+):
+    """Metrics for this worker; ?format=prometheus returns text exposition."""
+    if format == "prometheus":
+        return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+    return metrics.snapshot()
+
+
+@router.get("/diagnostics/event-loop")
+def get_event_loop_report(admin_user: User = Depends(get_current_admin_user)):
+    """
+    Event-loop stalls recorded on this worker: aggregates per route
+    (count, total/max duration, last blocking stack) and the most recent events.
+    Enable with LOOP_MONITOR_ENABLED=true.
+    """
+    return loop_monitor.report()
@@ -0,0 +1,102 @@
+"""
+Leaderboard endpoints: weekly and all-time standings by completions or
+mastery points, org-wide or per department. Reads are sorted-set lookups
+(O(log n) plus the page), never an ORDER BY over interactions.
+"""
+from typing import Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from sqlmodel import Session, select
+from app.core.database import get_session
+from app.core.security import get_current_user
+from app.models.models import User
+from app.services.leaderboards import METRICS, PERIODS, leaderboards
+
+router = APIRouter()
+
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: str
+    full_name: str
+    score: float
+
+
+class LeaderboardPosition(BaseModel):
+    rank: int
+    score: float
+
+
+class LeaderboardResponse(BaseModel):
+    metric: str
+    period: str
+    department: Optional[str]
+    size: int
+    entries: List[LeaderboardEntry]
+    me: Optional[LeaderboardPosition] = None
+
+
+def _validate(metric: str, period: str, department: Optional[str], current_user: User):
+    if metric not in METRICS:
+        raise HTTPException(status_code=404, detail=f"Unknown leaderboard; expected one of: {', '.join(METRICS)}")
+    if period not in PERIODS:
+        raise HTTPException(status_code=422, detail=f"period must be one of: {', '.join(PERIODS)}")
+    if department is not None and not current_user.is_admin and current_user.department != department:
+        raise HTTPException(status_code=403, detail="Not authorized to view this department")
+
+
+def _with_names(session: Session, entries: List[dict]) -> List[LeaderboardEntry]:
+    user_ids = [entry["user_id"] for entry in entries]
+    names: Dict[str, str] = dict(
+        session.exec(select(User.id, User.full_name).where(User.id.in_(user_ids))).all()
+    ) if user_ids else {}
+    return [LeaderboardEntry(full_name=names.get(entry["user_id"], ""), **entry) for entry in entries]
+
+
+@router.get("/leaderboards/{metric}", response_model=LeaderboardResponse)
+def get_leaderboard(
+    metric: str,
+    period: str = Query("week", description=f"One of: {', '.join(PERIODS)}"),
+    department: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session)
+):
+    """
+    Top learners by `completions` or mastery `points`, this week, last week or
+    all time; org-wide, or for a department (your own, or any for admins).
+    `me` is the caller's own rank on the same board.
+    """
+    _validate(metric, period, department, current_user)
+    entries = leaderboards.standings(metric, period, department, offset, offset + limit - 1)
+    return LeaderboardResponse(
+        metric=metric,
+        period=period,
+        department=department,
+        size=leaderboards.size(metric, period, department),
+        entries=_with_names(session, entries),
+        me=leaderboards.position(metric, period, department, current_user.id),
+    )
+
+
+@router.get("/leaderboards/{metric}/me", response_model=LeaderboardResponse)
+def get_my_leaderboard_neighbourhood(
+    metric: str,
+    period: str = Query("week", description=f"One of: {', '.join(PERIODS)}"),
+    department: Optional[str] = None,
+    radius: int = Query(3, ge=0, le=25),
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session)
+):
+    """The learners ranked just above and below you (empty until you score)."""
+    _validate(metric, period, department, current_user)
+    entries = leaderboards.neighbourhood(metric, period, department, current_user.id, radius)
+    return LeaderboardResponse(
+        metric=metric,
+        period=period,
+        department=department,
+        size=leaderboards.size(metric, period, department),
+        entries=_with_names(session, entries),
+        me=leaderboards.position(metric, period, department, current_user.id),
+    )
@@ -1,21 +1,86 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response
+from typing import Dict, List, Optional
+from sqlalchemy import insert
+from pydantic import BaseModel, Field, field_validator
 from sqlmodel import Session, select
 from app.core.database import get_session
-from app.models.models import User, UserInteraction, Asset, InteractionStatus
+from app.core.config import settings
+from app.models.models import User, UserInteraction, Asset, AssetProgress, InteractionStatus
 from app.services.adaptive_engine import AdaptiveEngine
-from datetime import datetime
+from app.services.answer_keys import without_answers
+from app.services.learning_paths import next_step_asset
+from app.services.learning_stats import apply_interaction, apply_stats_delta, get_user_stats, stats_delta
+from app.services.event_bus import InteractionRecorded, event_bus
+from app.services.mastery import MASTERY_SCORE_THRESHOLD
+from app.services.progress import progress_accumulator
+from app.services.recommendations import (
+    PENDING, compute_recommendation, compute_recommendations, get_recommendation, reserve_recommendation,
+)
+from app.services.resource_versions import bump_state_version
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
 
 router = APIRouter()
 
+class Heartbeat(BaseModel):
+    user_id: str
+    asset_id: str
+    seconds: int = Field(ge=0)  # Watch time since the previous heartbeat
+    position_seconds: Optional[int] = Field(default=None, ge=0)
+
+
+class ProgressResponse(BaseModel):
+    user_id: str
+    asset_id: str
+    watched_seconds: int
+    position_seconds: Optional[int] = None
+    last_heartbeat: Optional[datetime] = None
+
+
+# Heartbeats are the hottest route in the app: keep this the first route of the
+# first router so Starlette's linear route matching finds it immediately.
+@router.post("/learning/heartbeat", status_code=204)
+async def record_heartbeat(beat: Heartbeat):
+    """
+    Live watch-time tick from a player. Only touches the in-process
+    accumulator (no DB, no threadpool hop); totals are upserted in bulk every
+    PROGRESS_FLUSH_SECONDS. Each tick is capped so a bad client can't inflate time.
+    """
+    seconds = min(beat.seconds, settings.PROGRESS_MAX_HEARTBEAT_SECONDS)
+    progress_accumulator.add(beat.user_id, beat.asset_id, seconds, beat.position_seconds)
+    return Response(status_code=204)
+
+
+@router.get("/learning/{user_id}/progress/{asset_id}", response_model=ProgressResponse)
+def get_asset_progress(user_id: str, asset_id: str, session: Session = Depends(get_session)):
+    """Persisted watch time plus whatever this worker has not flushed yet."""
+    progress = session.get(AssetProgress, (user_id, asset_id))
+    pending = progress_accumulator.pending_seconds(user_id, asset_id)
+    if progress is None and not pending:
+        raise HTTPException(status_code=404, detail="No progress recorded")
+    return ProgressResponse(
+        user_id=user_id,
+        asset_id=asset_id,
+        watched_seconds=(progress.watched_seconds if progress else 0) + pending,
+        position_seconds=progress.position_seconds if progress else None,
+        last_heartbeat=progress.last_heartbeat if progress else None,
+    )
+
+
 @router.get("/learning/{user_id}/next", response_model=Asset)
 def get_next_recommendation(user_id: str, session: Session = Depends(get_session)):
+    """
+    First pending step of the user's learning path (an indexed lookup); users
+    without target skills, or who finished their path, get the adaptive pick.
+    """
+    asset = next_step_asset(session, user_id)
+    if asset is not None:
+        return without_answers(asset)
     engine = AdaptiveEngine(session)
-    # Refactor to use the new recommendation logic for consistency
     assets = engine.get_recommendations(user_id, limit=1)
     if not assets:
         raise HTTPException(status_code=404, detail="No more recommendations available or user not found.")
-    return assets[0]
+    return without_answers(assets[0])
 
 @router.get("/learning/{user_id}/recommendations", response_model=List[Asset])
 def get_user_recommendations(user_id: str, session: Session = Depends(get_session)):
@@ -24,69 +89,61 @@ def get_user_recommendations(user_id: str, session: Session = Depends(get_sessio
     """
     engine = AdaptiveEngine(session)
     assets = engine.get_recommendations(user_id, limit=3)
-    return assets
+    return [without_answers(asset) for asset in assets]
+
 
-from pydantic import BaseModel
+def _recorded_event(interaction: UserInteraction, asset: Optional[Asset]) -> InteractionRecorded:
+    return InteractionRecorded(
+        interaction_id=interaction.id,
+        user_id=interaction.user_id,
+        asset_id=interaction.asset_id,
+        status=interaction.status,
+        score=interaction.score,
+        time_spent_seconds=interaction.time_spent_seconds or 0,
+        skill_tag=asset.skill_tag if asset else None,
+        difficulty_level=asset.difficulty_level if asset else 1,
+        estimated_seconds=(asset.estimated_duration_minutes or 0) * 60 if asset else 0,
+        timestamp=interaction.timestamp,
+        ingested_at=interaction.ingested_at,
+    )
 
 class InteractionResponse(BaseModel):
     interaction: UserInteraction
     message: str
     next_recommendation: Optional[Asset] = None
+    recommendation_handle: Optional[str] = None  # Poll /learning/{user_id}/recommendation/{handle}
     cheatsheet: Optional[str] = None
     remedial: bool = False
 
 @router.post("/learning/interact", response_model=InteractionResponse)
-def record_interaction(interaction: UserInteraction, session: Session = Depends(get_session)):
-    # 1. Save interaction
+def record_interaction(
+    interaction: UserInteraction,
+    background_tasks: BackgroundTasks,
+    session: Session = Depends(get_session)
+):
+    """
+    Record progress. The interaction and the stats row are written in one
+    transaction; mastery is updated by the event-bus consumer and the next
+    recommendation is computed after the response is sent (fetched with the
+    returned handle).
+    """
+    interaction.ingested_at = datetime.utcnow()  # Server-assigned, whatever the client sent
+    response = InteractionResponse(interaction=interaction, message="Progress recorded.")
+
+    # 1. Save interaction (and fold it into the user's running stats)
     session.add(interaction)
-    session.commit()
-    session.refresh(interaction)
-    
-    response = InteractionResponse(
-        interaction=interaction,
-        message="Progress recorded."
-    )
+    apply_interaction(session, interaction)
 
-    # 2. Update Skill Mastery & Determine Next Step
+    # 2. Determine Next Step (mastery follows from the InteractionRecorded event)
+    asset = session.get(Asset, interaction.asset_id)
     if interaction.status == InteractionStatus.COMPLETED and interaction.score is not None:
-        asset = session.get(Asset, interaction.asset_id)
-        
         # A. High Score Logic (Fast-Track)
-        if interaction.score >= 80:
+        if interaction.score >= MASTERY_SCORE_THRESHOLD:
             response.message = f"🎉 Excellent! You scored {interaction.score}%. We've updated your adaptive profile."
-            
-            # Update Skill Mastery (Existing Logic)
-            if asset and asset.skill_tag:
-                from app.models.models import SkillMastery
-                mastery = session.exec(
-                    select(SkillMastery)
-                    .where(SkillMastery.user_id == interaction.user_id)
-                    .where(SkillMastery.skill_name == asset.skill_tag)
-                ).first()
-
-                if not mastery:
-                    mastery = SkillMastery(
-                        user_id=interaction.user_id,
-                        skill_name=asset.skill_tag,
-                        proficiency=0.0
-                    )
-                
-                # Boost proficiency
-                if mastery.proficiency < 100:
-                    difficulty_boost = asset.difficulty_level * 2
-                    score_multiplier = interaction.score / 100.0
-                    increment = difficulty_boost * score_multiplier
-                    mastery.proficiency = min(100.0, mastery.proficiency + increment)
-                    mastery.last_updated = datetime.utcnow()
-                    session.add(mastery)
-                    session.commit()
-
-            # Get Immediate Next Recommendation (Harder)
-            engine = AdaptiveEngine(session)
-            next_asset = engine.recommend_next_asset(interaction.user_id)
-            if next_asset:
-                response.next_recommendation = next_asset
-                response.message += " Ready for the next challenge?"
+
+            # Next Recommendation (Harder) is computed off the request path
+            response.recommendation_handle = reserve_recommendation(interaction.user_id)
+            background_tasks.add_task(compute_recommendation, interaction.user_id, response.recommendation_handle)
 
         # B. Low Score Logic (Remedial)
         else:
@@ -95,30 +152,170 @@ def record_interaction(interaction: UserInteraction, session: Session = Depends(
             if asset and asset.cheatsheet:
                 response.cheatsheet = asset.cheatsheet
 
+    # Single commit; the event is built first so it reads no expired attributes
+    event = _recorded_event(interaction, asset)
+    session.commit()
+    session.refresh(interaction)
+    bump_state_version(interaction.user_id)
+    event_bus.publish(event)
     return response
 
+@router.get("/learning/{user_id}/recommendation/{handle}", response_model=Asset)
+def get_pending_recommendation(user_id: str, handle: str):
+    """
+    Result of a deferred recommendation: 202 while it is still being computed,
+    the asset once ready, 404 for unknown/expired handles or when nothing is left.
+    """
+    result = get_recommendation(user_id, handle)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired recommendation handle")
+    if result["status"] == PENDING:
+        return Response(status_code=202, headers={"Retry-After": "1"})
+    if result["asset"] is None:
+        raise HTTPException(status_code=404, detail="No more recommendations available.")
+    return result["asset"]
+
+MAX_BATCH_SIZE = 5000
+MAX_CLOCK_SKEW = timedelta(minutes=5)  # Client timestamps may run this far ahead of ours
+
+
+class InteractionIn(BaseModel):
+    """
+    One batched interaction. Unlike the UserInteraction table model this is
+    validated, so a malformed row is a 422 rather than a failed INSERT.
+    """
+    id: str = Field(default_factory=lambda: str(uuid4()), min_length=1, max_length=64)
+    user_id: str
+    asset_id: str
+    status: InteractionStatus = InteractionStatus.STARTED
+    score: Optional[float] = Field(default=None, ge=0, le=100)
+    time_spent_seconds: int = Field(default=0, ge=0)
+    attempts: int = Field(default=1, ge=1)
+    timestamp: datetime = Field(default_factory=datetime.utcnow)
+
+    @field_validator("timestamp")
+    @classmethod
+    def naive_utc(cls, value: datetime) -> datetime:
+        # Stored timestamps are naive UTC
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+
+class InteractionBatchRequest(BaseModel):
+    interactions: List[InteractionIn]
+
+
+class RejectedInteraction(BaseModel):
+    index: int
+    reason: str
+
+
+class InteractionBatchResponse(BaseModel):
+    recorded: int
+    rejected: List[RejectedInteraction] = []
+    # user_id -> handle; poll /learning/{user_id}/recommendation/{handle}
+    recommendation_handles: Dict[str, str] = {}
+
+
+@router.post("/learning/interact/batch", response_model=InteractionBatchResponse)
+def record_interactions_batch(
+    batch: InteractionBatchRequest,
+    background_tasks: BackgroundTasks,
+    session: Session = Depends(get_session)
+):
+    """
+    Ingest many interactions at once (offline clients, LMS bridge replays).
+    One transaction: a bulk INSERT and one stats UPDATE per user. The batch is
+    published as InteractionRecorded events, which the mastery consumer folds
+    into one upsert per (user, skill). Each user that earned a mastery-level
+    score in the batch gets a recommendation handle; the recommendations are
+    computed together after the response is sent.
+    """
+    if len(batch.interactions) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {MAX_BATCH_SIZE} interactions")
+
+    interactions = batch.interactions
+    asset_ids = {i.asset_id for i in interactions}
+    user_ids = {i.user_id for i in interactions}
+    assets = {a.id: a for a in session.exec(select(Asset).where(Asset.id.in_(asset_ids))).all()} if asset_ids else {}
+    known_users = set(session.exec(select(User.id).where(User.id.in_(user_ids))).all()) if user_ids else set()
+    # Replayed events keep their client-generated ids; skip ones already stored
+    seen_ids = set(session.exec(
+        select(UserInteraction.id).where(UserInteraction.id.in_({i.id for i in interactions}))
+    ).all())
+
+    latest = datetime.utcnow() + MAX_CLOCK_SKEW
+    accepted: List[UserInteraction] = []
+    rejected: List[RejectedInteraction] = []
+    for index, interaction in enumerate(interactions):
+        if interaction.timestamp > latest:
+            rejected.append(RejectedInteraction(index=index, reason="Timestamp in the future"))
+        elif interaction.user_id not in known_users:
+            rejected.append(RejectedInteraction(index=index, reason="Unknown user"))
+        elif interaction.asset_id not in assets:
+            rejected.append(RejectedInteraction(index=index, reason="Unknown asset"))
+        elif interaction.id in seen_ids:
+            rejected.append(RejectedInteraction(index=index, reason="Duplicate interaction"))
+        else:
+            seen_ids.add(interaction.id)
+            accepted.append(UserInteraction(**interaction.model_dump()))
+
+    if not accepted:
+        return InteractionBatchResponse(recorded=0, rejected=rejected)
+
+    # 1. Bulk insert (single executemany)
+    session.execute(insert(UserInteraction.__table__), [i.model_dump(warnings=False) for i in accepted])
+
+    # 2. Stats: one delta per user
+    deltas: Dict[str, dict] = {}
+    for interaction in accepted:
+        delta = stats_delta(interaction)
+        folded = deltas.get(interaction.user_id)
+        if folded is None:
+            deltas[interaction.user_id] = delta
+            continue
+        for key in ("completed_count", "score_sum", "score_count", "total_seconds"):
+            folded[key] += delta[key]
+        folded["last_activity"] = max(folded["last_activity"], delta["last_activity"])
+    for user_id, delta in deltas.items():
+        apply_stats_delta(session, user_id, delta)
+
+    session.commit()
+    for user_id in deltas:
+        bump_state_version(user_id)
+
+    # 3. Mastery and other side effects happen in the event consumers
+    event_bus.publish_many([_recorded_event(i, assets[i.asset_id]) for i in accepted])
+
+    # 4. At most one recommendation per user who scored high in this batch, off the request path
+    high_scorers = {
+        i.user_id for i in accepted
+        if i.status == InteractionStatus.COMPLETED and i.score is not None and i.score >= MASTERY_SCORE_THRESHOLD
+    }
+    handles = {user_id: reserve_recommendation(user_id) for user_id in high_scorers}
+    if handles:
+        background_tasks.add_task(compute_recommendations, handles)
+
+    return InteractionBatchResponse(
+        recorded=len(accepted),
+        rejected=rejected,
+        recommendation_handles=handles,
+    )
+
 @router.get("/learning/dashboard/{user_id}")
 def get_dashboard_stats(user_id: str, session: Session = Depends(get_session)):
-    # Simple stats for the dashboard
-    from app.models.models import User, UserInteraction
-    from sqlmodel import select, func
-
+    # Simple stats for the dashboard, read from the incrementally maintained stats row
     user = session.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    interactions = session.exec(select(UserInteraction).where(UserInteraction.user_id == user_id)).all()
-    completed = [i for i in interactions if i.status == InteractionStatus.COMPLETED]
-    
-    avg_score = 0
-    if completed:
-        scores = [i.score for i in completed if i.score is not None]
-        if scores:
-            avg_score = sum(scores) / len(scores)
+    stats = get_user_stats(session, user_id)
+    avg_score = stats.score_sum / stats.score_count if stats.score_count else 0
 
     return {
         "user_name": user.full_name,
-        "completed_modules": len(completed),
+        "completed_modules": stats.completed_count,
         "average_score": round(avg_score, 1),
         "current_level": "Intermediate", # Placeholder logic
         "learning_style": user.preferred_learning_style
@@ -0,0 +1,85 @@
+"""
+Learning path endpoints: a learner's materialized path, and the skill
+prerequisite graph it is planned from (admin-editable).
+"""
+from typing import Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+from sqlmodel import Session, select
+from app.core.database import get_session
+from app.core.security import get_current_admin_user
+from app.models.models import PathStatus, SkillPrerequisite, StepStatus, User
+from app.services.learning_paths import PrerequisiteCycleError, ensure_path, path_steps, set_prerequisites
+from app.services.resource_versions import invalidate_prerequisites
+
+router = APIRouter()
+
+
+class PathStep(BaseModel):
+    position: int
+    asset_id: str
+    title: str
+    skill: str
+    difficulty_level: int
+    status: StepStatus
+
+
+class LearningPathResponse(BaseModel):
+    id: str
+    name: str
+    status: PathStatus
+    target_skills: List[str]
+    steps: List[PathStep]
+    next_position: Optional[int] = None
+
+
+class PrerequisitesUpdate(BaseModel):
+    prerequisites: List[str]
+
+
+@router.get("/learning/{user_id}/path", response_model=LearningPathResponse)
+def get_learning_path(user_id: str, session: Session = Depends(get_session)):
+    """The user's ordered path towards their target skills (planned on first request)."""
+    path = ensure_path(session, user_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="No learning path: user not found or no target skills set")
+    steps = path_steps(session, path)
+    return LearningPathResponse(
+        id=path.id,
+        name=path.name,
+        status=path.status,
+        target_skills=path.target_skills or [],
+        steps=steps,
+        next_position=next((step["position"] for step in steps if step["status"] == StepStatus.PENDING), None),
+    )
+
+
+@router.get("/admin/skills/prerequisites", response_model=Dict[str, List[str]])
+def get_skill_prerequisites(
+    current_user: User = Depends(get_current_admin_user),
+    session: Session = Depends(get_session)
+):
+    """skill -> the skills it requires."""
+    prerequisites: Dict[str, List[str]] = {}
+    for row in session.exec(
+        select(SkillPrerequisite).order_by(SkillPrerequisite.skill, SkillPrerequisite.prerequisite_skill)
+    ).all():
+        prerequisites.setdefault(row.skill, []).append(row.prerequisite_skill)
+    return prerequisites
+
+
+@router.put("/admin/skills/{skill}/prerequisites", response_model=List[str])
+def update_skill_prerequisites(
+    skill: str,
+    update: PrerequisitesUpdate,
+    current_user: User = Depends(get_current_admin_user),
+    session: Session = Depends(get_session)
+):
+    """Replace a skill's prerequisites. Paths are re-planned lazily against the new graph."""
+    try:
+        set_prerequisites(session, skill, update.prerequisites)
+    except PrerequisiteCycleError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    session.commit()
+    invalidate_prerequisites()
+    return sorted(set(update.prerequisites))
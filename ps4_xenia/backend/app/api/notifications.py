@@ -1,8 +1,14 @@
+import asyncio
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from sqlmodel import Session, select
+from app.core.config import settings
 from app.core.database import get_session
-from app.models.models import Notification
+from app.models.models import Notification, User
+from app.services.notification_broker import notification_broker, Subscription
+from app.services.notifications import get_unread_count, mark_read, mark_all_read
 
 router = APIRouter()
 
@@ -27,7 +33,104 @@ def mark_notification_read(notification_id: str, session: Session = Depends(get_
     if not notification:
         raise HTTPException(status_code=404, detail="Notification not found")
     
-    notification.is_read = True
-    session.add(notification)
-    session.commit()
+    mark_read(session, notification.user_id, [notification_id])
     return {"status": "success"}
+
+class MarkReadRequest(BaseModel):
+    ids: List[str] = Field(max_length=1000)
+
+@router.get("/notifications/{user_id}/unread_count")
+def get_unread_notification_count(user_id: str, session: Session = Depends(get_session)):
+    """
+    Get the user's unread notification count (single primary-key lookup).
+    """
+    if not session.get(User, user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+    return {"user_id": user_id, "unread_count": get_unread_count(session, user_id)}
+
+@router.post("/notifications/{user_id}/mark_read")
+def mark_notifications_read(user_id: str, request: MarkReadRequest, session: Session = Depends(get_session)):
+    """
+    Mark several of the user's notifications as read in one UPDATE.
+    """
+    updated = mark_read(session, user_id, request.ids)
+    return {"status": "success", "updated": updated}
+
+@router.post("/notifications/{user_id}/mark_all_read")
+def mark_all_notifications_read(user_id: str, session: Session = Depends(get_session)):
+    """
+    Mark all of the user's notifications as read in one UPDATE.
+    """
+    updated = mark_all_read(session, user_id)
+    return {"status": "success", "updated": updated}
+
+# --- Streaming ---
+
+async def _sse_events(subscription: Subscription):
+    """SSE frames for one connection: notifications, heartbeats, and a resync hint on overflow."""
+    heartbeat = settings.NOTIFICATION_STREAM_HEARTBEAT_SECONDS
+    try:
+        yield "retry: 5000\n: connected\n\n"
+        while True:
+            message = await subscription.next(timeout=heartbeat)
+            if subscription.overflowed:
+                # Client fell too far behind; it should refetch the list and reconnect
+                yield "event: resync\ndata: {}\n\n"
+                return
+            if message is None:
+                yield ": heartbeat\n\n"
+            else:
+                yield f"event: notification\ndata: {message}\n\n"
+    finally:
+        notification_broker.unsubscribe(subscription)
+
+
+@router.get("/notifications/{user_id}/stream")
+async def stream_notifications(user_id: str):
+    """
+    Server-Sent Events stream of new notifications for a user.
+    Replaces polling GET /notifications/{user_id}.
+    """
+    subscription = notification_broker.subscribe(user_id)
+    return StreamingResponse(
+        _sse_events(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/notifications/{user_id}/ws")
+async def notifications_websocket(websocket: WebSocket, user_id: str):
+    """
+    WebSocket variant of the notification stream.
+    Sends {"type": "notification" | "heartbeat" | "resync", ...} JSON frames.
+    """
+    await websocket.accept()
+    subscription = notification_broker.subscribe(user_id)
+    heartbeat = settings.NOTIFICATION_STREAM_HEARTBEAT_SECONDS
+    # Drain client frames so disconnects are noticed while we wait for messages
+    receiver = asyncio.create_task(_drain(websocket))
+    try:
+        while not receiver.done():
+            message = await subscription.next(timeout=heartbeat)
+            if subscription.overflowed:
+                await websocket.send_text('{"type": "resync"}')
+                await websocket.close()
+                return
+            if message is None:
+                await websocket.send_text('{"type": "heartbeat"}')
+            else:
+                await websocket.send_text(f'{{"type": "notification", "data": {message}}}')
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        receiver.cancel()
+        notification_broker.unsubscribe(subscription)
+
+
+async def _drain(websocket: WebSocket):
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
@@ -4,16 +4,23 @@ Handles profile retrieval, updates, and learning history.
 """
 from datetime import datetime
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlmodel import Session, select
 from pydantic import BaseModel
 from app.core.database import get_session
+from app.core.export import export_media_type, model_columns, stream_export
 from app.core.security import get_current_user, get_current_admin_user
-from app.models.models import User, UserInteraction, LearningStyle
-from app.core.cache import cache_get, cache_set, cache_delete
+from app.models.models import Asset, User, UserInteraction, LearningStyle
+from app.core.http_cache import CACHE_CONTROL_USER, cached_json_response, etag_matches, make_etag, not_modified
+from app.services.event_bus import ProfileSkillsChanged, event_bus
+from app.services.leaderboards import leaderboards
+from app.services.resource_versions import bump_department_version, bump_skill_gap_version, invalidate_user, user_version
+from app.services.skill_gaps import skill_gap_matrix
 
 router = APIRouter()
 
+HISTORY_PAGE_SIZE = 50
+
 
 # --- Request/Response Models ---
 
@@ -44,6 +51,16 @@ class ProfileResponse(BaseModel):
     last_login: Optional[datetime]
 
 
+class SimilarLearner(BaseModel):
+    user_id: str
+    full_name: str
+    department: Optional[str]
+    similarity: float
+    shared_skills: List[str]
+    shared_gaps: List[str]
+    can_help_with: List[str]
+
+
 class LearningHistoryItem(BaseModel):
     asset_id: str
     asset_title: str
@@ -54,16 +71,44 @@ class LearningHistoryItem(BaseModel):
     timestamp: datetime
 
 
+HISTORY_COLUMNS = model_columns(LearningHistoryItem)
+
+
+def _export_history(user_id: str, media_type: str, limit: Optional[int]):
+    """Full history (or the newest `limit` items) streamed as NDJSON/CSV, asset titles joined in SQL."""
+    statement = (
+        select(
+            UserInteraction.asset_id, Asset.title, UserInteraction.status, UserInteraction.score,
+            UserInteraction.time_spent_seconds, UserInteraction.attempts, UserInteraction.timestamp,
+        )
+        .join(Asset, Asset.id == UserInteraction.asset_id)
+        .where(UserInteraction.user_id == user_id)
+        .order_by(UserInteraction.timestamp.desc())
+    )
+    if limit:
+        statement = statement.limit(limit)
+    return stream_export(
+        statement, lambda row: dict(zip(HISTORY_COLUMNS, row)), HISTORY_COLUMNS, media_type, f"history-{user_id}",
+    )
+
+
 # --- Endpoints ---
 
 @router.get("/profile", response_model=ProfileResponse)
-async def get_my_profile(current_user: User = Depends(get_current_user)):
+async def get_my_profile(request: Request, response: Response, current_user: User = Depends(get_current_user)):
     """
     Get current user's profile.
     
     WHEN an Employee requests their profile,
     THE Backend_Service SHALL retrieve it within 100ms.
     """
+    etag = make_etag("profile", current_user.id, current_user.updated_at, current_user.last_login)
+    matched = etag_matches(request, etag)
+    if matched:
+        return not_modified(matched, CACHE_CONTROL_USER)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL_USER
+
     return ProfileResponse(
         id=str(current_user.id),
         email=current_user.email,
@@ -82,64 +127,6 @@ async def get_my_profile(current_user: User = Depends(get_current_user)):
     )
 
 
-@router.get("/profile/{user_id}", response_model=ProfileResponse)
-async def get_user_profile(
-    user_id: str,
-    current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
-):
-    """
-    Get any user's profile (admin only or own profile).
-    
-    WHEN an Employee requests their profile,
-    THE Backend_Service SHALL retrieve it within 100ms.
-    
-    Uses Redis caching for fast retrieval.
-    """
-    # Users can view their own profile, admins can view any profile
-    if user_id != current_user.id and not current_user.is_admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to view this profile"
-        )
-    
-    # Try to get from cache first
-    cache_key = f"profile:{user_id}"
-    cached_profile = await cache_get(cache_key)
-    if cached_profile:
-        return ProfileResponse(**cached_profile)
-    
-    # Cache miss - fetch from database
-    user = session.get(User, user_id)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
-    profile_data = {
-        "id": str(user.id),
-        "email": user.email,
-        "full_name": user.full_name,
-        "role": user.role,
-        "department": user.department,
-        "employee_id": user.employee_id,
-        "current_skills": user.current_skills or [],
-        "target_skills": user.target_skills or [],
-        "preferred_learning_style": user.preferred_learning_style.value if hasattr(user.preferred_learning_style, 'value') else str(user.preferred_learning_style),
-        "learning_pace": user.learning_pace,
-        "is_admin": user.is_admin,
-        "created_at": user.created_at.isoformat(),
-        "updated_at": user.updated_at.isoformat(),
-        "last_login": user.last_login.isoformat() if user.last_login else None
-    }
-    
-    # Cache for 5 minutes
-    await cache_set(cache_key, profile_data, ttl=300)
-    
-    return ProfileResponse(**profile_data)
-
-
 @router.patch("/profile", response_model=ProfileResponse)
 async def update_my_profile(
     updates: ProfileUpdateRequest,
@@ -160,6 +147,8 @@ async def update_my_profile(
         (updates.target_skills is not None and updates.target_skills != current_user.target_skills)
     )
     
+    previous_department = current_user.department
+
     # Update allowed fields
     if updates.full_name is not None:
         current_user.full_name = updates.full_name
@@ -195,12 +184,24 @@ async def update_my_profile(
     session.refresh(current_user)
     
     # Invalidate cache
-    await cache_delete(f"profile:{current_user.id}")
+    invalidate_user(current_user.id)
+    if current_user.department != previous_department:
+        # The user's rollups and mastery now count toward another department
+        for department in (previous_department, current_user.department):
+            if department:
+                bump_department_version(department)
+    if skills_changed or current_user.department != previous_department:
+        bump_skill_gap_version()
+    if current_user.department != previous_department:
+        leaderboards.move_department(current_user.id, previous_department, current_user.department)
     
-    # TODO: Notify Adaptive Engine of profile update if skills changed
-    # This will trigger path recalculation
-    # if skills_changed:
-    #     await notify_adaptive_engine(current_user.id, updates)
+    # Notify the Adaptive Engine (event-bus consumers) if skills changed
+    if skills_changed:
+        event_bus.publish(ProfileSkillsChanged(
+            user_id=current_user.id,
+            current_skills=current_user.current_skills or [],
+            target_skills=current_user.target_skills or [],
+        ))
     
     return ProfileResponse(
         id=str(current_user.id),
@@ -222,24 +223,30 @@ async def update_my_profile(
 
 @router.get("/profile/history", response_model=List[LearningHistoryItem])
 async def get_my_learning_history(
+    request: Request,
     current_user: User = Depends(get_current_user),
     session: Session = Depends(get_session),
-    limit: int = 50
+    limit: Optional[int] = None
 ):
     """
     Get current user's learning history.
     
     WHEN an Employee requests their learning history,
     THE Backend_Service SHALL return all completed interactions.
+
+    JSON responses return the newest 50 items by default; NDJSON/CSV exports
+    stream the full history unless a limit is given.
     """
-    from app.models.models import Asset
-    
+    media_type = export_media_type(request)
+    if media_type:
+        return _export_history(current_user.id, media_type, limit)
+
     # Get user's interactions
     interactions = session.exec(
         select(UserInteraction)
         .where(UserInteraction.user_id == current_user.id)
         .order_by(UserInteraction.timestamp.desc())
-        .limit(limit)
+        .limit(limit or HISTORY_PAGE_SIZE)
     ).all()
     
     # Build response with asset details
@@ -263,9 +270,10 @@ async def get_my_learning_history(
 @router.get("/profile/{user_id}/history", response_model=List[LearningHistoryItem])
 async def get_user_learning_history(
     user_id: str,
+    request: Request,
     current_user: User = Depends(get_current_user),
     session: Session = Depends(get_session),
-    limit: int = 50
+    limit: Optional[int] = None
 ):
     """
     Get any user's learning history (admin only or own history).
@@ -276,15 +284,17 @@ async def get_user_learning_history(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to view this learning history"
         )
-    
-    from app.models.models import Asset
+
+    media_type = export_media_type(request)
+    if media_type:
+        return _export_history(user_id, media_type, limit)
     
     # Get user's interactions
     interactions = session.exec(
         select(UserInteraction)
         .where(UserInteraction.user_id == user_id)
         .order_by(UserInteraction.timestamp.desc())
-        .limit(limit)
+        .limit(limit or HISTORY_PAGE_SIZE)
     ).all()
     
     # Build response with asset details
@@ -315,3 +325,85 @@ async def get_my_skills(current_user: User = Depends(get_current_user)):
         "target_skills": current_user.target_skills or [],
         "skill_gaps": list(set(current_user.target_skills or []) - set(current_user.current_skills or []))
     }
+
+
+@router.get("/profile/similar-learners", response_model=List[SimilarLearner])
+def get_similar_learners(
+    limit: int = Query(10, ge=1, le=50),
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session)
+):
+    """
+    Learners with the most similar skill profile (skills held and skills
+    wanted), e.g. for study groups; `can_help_with` lists your gaps they hold.
+    """
+    skill_gap_matrix.ensure_fresh()
+    matches = skill_gap_matrix.similar_learners(current_user.id, limit)
+    names = dict(session.exec(
+        select(User.id, User.full_name).where(User.id.in_([match["user_id"] for match in matches]))
+    ).all()) if matches else {}
+    return [SimilarLearner(full_name=names.get(match["user_id"], ""), **match) for match in matches]
+
+
+# Declared last so it doesn't shadow /profile/history, /profile/skills and /profile/similar-learners
+@router.get("/profile/{user_id}", response_model=ProfileResponse)
+async def get_user_profile(
+    user_id: str,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session)
+):
+    """
+    Get any user's profile (admin only or own profile).
+    
+    WHEN an Employee requests their profile,
+    THE Backend_Service SHALL retrieve it within 100ms.
+    
+    Uses Redis caching for fast retrieval.
+    """
+    # Users can view their own profile, admins can view any profile
+    if user_id != current_user.id and not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to view this profile"
+        )
+    
+    # ETag from User.updated_at/last_login; 304 is answered from the cached version
+    version = user_version(session, user_id)
+    if version is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    etag = make_etag("profile", user_id, version)
+
+    def build():
+        # Cache miss - fetch from database
+        user = session.get(User, user_id)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        
+        return ProfileResponse(
+            id=str(user.id),
+            email=user.email,
+            full_name=user.full_name,
+            role=user.role,
+            department=user.department,
+            employee_id=user.employee_id,
+            current_skills=user.current_skills or [],
+            target_skills=user.target_skills or [],
+            preferred_learning_style=user.preferred_learning_style.value if hasattr(user.preferred_learning_style, 'value') else str(user.preferred_learning_style),
+            learning_pace=user.learning_pace,
+            is_admin=user.is_admin,
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+            last_login=user.last_login
+        )
+    
+    # Cached as final response bytes for 5 minutes; hits skip model rebuild and validation
+    return cached_json_response(
+        request, f"profile:{user_id}:{etag}", build, etag=etag, ttl=300, cache_control=CACHE_CONTROL_USER
+    )
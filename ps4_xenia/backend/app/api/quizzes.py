@@ -0,0 +1,182 @@
+"""
+Quiz catalog API.
+Lightweight, paginated quiz metadata for the Quiz Library, with question
+bodies (without answers) served lazily per asset. Both read endpoints are
+ETag-aware and serve cached, pre-compressed bodies keyed by catalog / asset
+version. Submissions are graded on the server against a compiled answer key.
+"""
+from typing import Dict, List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from sqlalchemy import String, cast, func
+from sqlmodel import Session, select
+from pydantic import BaseModel
+from app.core.database import get_session
+from app.core.http_cache import cached_json_response, make_etag
+from app.core.security import get_current_user
+from app.api.learning import InteractionResponse, record_interaction
+from app.services.answer_keys import get_answer_key, grade, public_questions
+from app.services.resource_versions import asset_version, catalog_version
+from app.models.models import Asset, InteractionStatus, User, UserInteraction
+
+router = APIRouter()
+
+QUIZ_CACHE_TTL = 3600
+QUIZ_CACHE_CONTROL = "public, max-age=60, must-revalidate"
+
+
+class QuizSummary(BaseModel):
+    id: str
+    title: str
+    description: str
+    skill_tag: str
+    difficulty_level: int
+    estimated_duration_minutes: int
+    question_count: int
+
+
+class QuizSubmission(BaseModel):
+    answers: Dict[str, int]  # question id -> chosen option index
+    time_spent_seconds: int = 0
+
+
+class QuizResult(BaseModel):
+    score: float  # 0-100
+    correct_count: int
+    question_count: int
+    results: Dict[str, bool]  # question id -> answered correctly
+    progress: Optional[InteractionResponse] = None  # The recorded interaction
+
+
+class QuizDetail(BaseModel):
+    id: str
+    title: str
+    description: str
+    content_type: str
+    content_url: str
+    skill_tag: str
+    difficulty_level: int
+    estimated_duration_minutes: int
+    version: int
+    questions: List[dict]
+
+
+def _has_quiz(query):
+    """Restrict a query to live assets carrying a non-empty quiz."""
+    return query.where(
+        Asset.is_active == True,
+        Asset.is_archived == False,
+        Asset.quiz_data.isnot(None),
+        cast(Asset.quiz_data, String).notin_(["null", "[]"]),
+    )
+
+
+@router.get("/quizzes", response_model=List[QuizSummary])
+def list_quizzes(
+    request: Request,
+    skill_tag: Optional[str] = None,
+    difficulty_level: Optional[int] = None,
+    skip: int = 0,
+    limit: int = Query(default=50, le=100),
+    session: Session = Depends(get_session)
+):
+    """
+    Page over assets that have quizzes, returning metadata only
+    (no quiz_data, no answers). Question count is computed in SQL.
+    """
+    params = f"{skill_tag}:{difficulty_level}:{skip}:{limit}"
+    etag = make_etag("quizzes", catalog_version(session), params)
+
+    def build():
+        query = _has_quiz(select(
+            Asset.id, Asset.title, Asset.description, Asset.skill_tag, Asset.difficulty_level,
+            Asset.estimated_duration_minutes, func.json_array_length(Asset.quiz_data)
+        ))
+        if skill_tag:
+            query = query.where(Asset.skill_tag == skill_tag)
+        if difficulty_level:
+            query = query.where(Asset.difficulty_level == difficulty_level)
+        query = query.order_by(Asset.difficulty_level, Asset.title).offset(skip).limit(limit)
+
+        return [
+            QuizSummary(
+                id=row[0], title=row[1], description=row[2], skill_tag=row[3],
+                difficulty_level=row[4], estimated_duration_minutes=row[5], question_count=row[6] or 0
+            )
+            for row in session.exec(query).all()
+        ]
+
+    return cached_json_response(
+        request, f"quizzes:catalog:{etag}", build, etag=etag,
+        ttl=QUIZ_CACHE_TTL, cache_control=QUIZ_CACHE_CONTROL
+    )
+
+
+@router.get("/quizzes/{asset_id}", response_model=QuizDetail)
+def get_quiz(asset_id: str, request: Request, session: Session = Depends(get_session)):
+    """
+    Get the questions for one quiz, without answers. The asset version comes
+    from cache (or the version columns only); quiz_data is loaded on a cache miss.
+    """
+    version = asset_version(session, asset_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    etag = make_etag("quiz-public", asset_id, version)
+
+    def build():
+        # Deactivating an asset bumps updated_at, hence the version and this ETag
+        asset = session.get(Asset, asset_id)
+        if not asset.is_active or asset.is_archived:
+            raise HTTPException(status_code=404, detail="Quiz not found")
+        if not asset.quiz_data:
+            raise HTTPException(status_code=404, detail="Asset has no quiz")
+        return QuizDetail(
+            id=asset.id,
+            title=asset.title,
+            description=asset.description,
+            content_type=asset.content_type,
+            content_url=asset.content_url,
+            skill_tag=asset.skill_tag,
+            difficulty_level=asset.difficulty_level,
+            estimated_duration_minutes=asset.estimated_duration_minutes,
+            version=asset.current_version,
+            questions=public_questions(asset.quiz_data),
+        )
+
+    return cached_json_response(
+        request, f"quizzes:detail:{asset_id}:{etag}", build, etag=etag,
+        ttl=QUIZ_CACHE_TTL, cache_control=QUIZ_CACHE_CONTROL
+    )
+
+
+@router.post("/quizzes/{asset_id}/submit", response_model=QuizResult)
+def submit_quiz(
+    asset_id: str,
+    submission: QuizSubmission,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session)
+):
+    """
+    Grade a quiz attempt against the asset's compiled answer key and record it
+    for the signed-in user as a completed interaction (stats, mastery events,
+    next recommendation) exactly like POST /learning/interact.
+    """
+    answer_key = get_answer_key(session, asset_id)
+    if not answer_key:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+
+    correct_count, results = grade(answer_key, submission.answers)
+    score = round(correct_count / len(answer_key) * 100, 1)
+    result = QuizResult(
+        score=score, correct_count=correct_count, question_count=len(answer_key), results=results
+    )
+
+    interaction = UserInteraction(
+        user_id=current_user.id,
+        asset_id=asset_id,
+        status=InteractionStatus.COMPLETED,
+        score=score,
+        time_spent_seconds=submission.time_spent_seconds,
+    )
+    result.progress = record_interaction(interaction, background_tasks, session)
+    return result
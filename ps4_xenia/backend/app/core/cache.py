@@ -1,5 +1,8 @@
 import json
 import logging
+import threading
+import time
+from collections import OrderedDict
 from functools import wraps
 from typing import Optional, Any
 import redis
@@ -7,10 +10,16 @@ from fastapi import Request, Response
 
 logger = logging.getLogger(__name__)
 
+# In-memory fallback cap for raw entries (LRU). Versioned keys (ETags) are
+# never read again once superseded, so expiry-on-read alone would not bound it.
+MEMORY_MAX_RAW_ENTRIES = 10000
+
 class Cache:
     def __init__(self):
         self.redis: Optional[redis.Redis] = None
         self.memory: dict = {}
+        self.raw_memory: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, bytes)
+        self._raw_lock = threading.Lock()
         try:
             # Try connecting to Redis (short timeout to fail fast)
             self.redis = redis.Redis(host='localhost', port=6379, db=0, socket_connect_timeout=1)
@@ -39,10 +48,55 @@ class Cache:
             self.memory[key] = value
             # In-memory expiration not implemented for simplicity in fallback mode
 
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        """Raw value (pre-serialized / pre-compressed body), no JSON decoding."""
+        if self.redis:
+            try:
+                return self.redis.get(key)
+            except Exception:
+                return None
+        with self._raw_lock:
+            entry = self.raw_memory.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self.raw_memory[key]
+                return None
+            self.raw_memory.move_to_end(key)
+            return value
+
+    def set_bytes(self, key: str, value: bytes, expire: int = 60):
+        if self.redis:
+            try:
+                self.redis.setex(key, expire, value)
+            except Exception:
+                pass
+        else:
+            # Raw entries expire on read and are evicted least-recently-used
+            # beyond MEMORY_MAX_RAW_ENTRIES
+            with self._raw_lock:
+                self.raw_memory[key] = (time.time() + expire, value)
+                self.raw_memory.move_to_end(key)
+                while len(self.raw_memory) > MEMORY_MAX_RAW_ENTRIES:
+                    self.raw_memory.popitem(last=False)
+
+    def delete(self, key: str):
+        if self.redis:
+            try:
+                self.redis.delete(key)
+            except Exception:
+                pass
+        self.memory.pop(key, None)
+        with self._raw_lock:
+            self.raw_memory.pop(key, None)
+
     def clear(self):
         if self.redis:
             self.redis.flushdb()
         self.memory.clear()
+        with self._raw_lock:
+            self.raw_memory.clear()
 
 # Global Cache Instance
 cache_store = Cache()
@@ -97,10 +151,4 @@ async def cache_set(key: str, value: Any, ttl: int = 60):
     cache_store.set(key, value, expire=ttl)
 
 async def cache_delete(key: str):
-    if cache_store.redis:
-        try:
-            cache_store.redis.delete(key)
-        except Exception:
-            pass
-    if key in cache_store.memory:
-        del cache_store.memory[key]
+    cache_store.delete(key)
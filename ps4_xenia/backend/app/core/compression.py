@@ -0,0 +1,138 @@
+"""
+Response compression.
+gzip is always available; brotli ("br") and zstd are used when the optional
+`brotli` / `zstandard` packages are installed. Provides Accept-Encoding
+negotiation, a compress() helper used by the response cache to store
+pre-compressed bodies, and an ASGI middleware for everything else.
+"""
+import gzip
+from typing import Callable, Dict, Optional, Sequence
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # Optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # Optional dependency
+    zstandard = None
+
+ENCODERS: Dict[str, Callable[[bytes], bytes]] = {}
+if brotli is not None:
+    ENCODERS["br"] = lambda body: brotli.compress(body, quality=5)
+if zstandard is not None:
+    ENCODERS["zstd"] = zstandard.ZstdCompressor(level=6).compress
+ENCODERS["gzip"] = lambda body: gzip.compress(body, compresslevel=6)
+
+# Server preference when the client accepts several encodings equally
+PREFERENCE = ["br", "zstd", "gzip"]
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the best supported encoding from an Accept-Encoding header (None = identity)."""
+    accepted: Dict[str, float] = {}
+    for token in accept_encoding.split(","):
+        name, _, params = token.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip().replace(" ", "")
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
+
+    candidates = [e for e in PREFERENCE if e in ENCODERS and accepted.get(e, 0) > 0]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda e: accepted[e])
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    return ENCODERS[encoding](body)
+
+
+def encoded_etag(etag: str, encoding: Optional[str]) -> str:
+    """
+    ETag of one content-coding of a representation: '"tag"' -> '"tag-br"'.
+    A strong ETag names exact bytes, so each encoding needs its own.
+    """
+    if not encoding or not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def is_compressible(content_type: str, allowlist: Sequence[str]) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type in allowlist
+
+
+class CompressionMiddleware:
+    """
+    Compresses complete (single-message) responses whose content type is in the
+    allowlist and whose size is at least minimum_size (an ETag gets the encoding
+    appended). Responses that already carry Content-Encoding (e.g.
+    pre-compressed cache hits) and streaming responses (SSE, exports) are
+    passed through untouched.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: Optional[int] = None, content_types: Optional[Sequence[str]] = None):
+        self.app = app
+        self.minimum_size = minimum_size if minimum_size is not None else settings.COMPRESSION_MIN_SIZE
+        self.content_types = content_types if content_types is not None else settings.COMPRESSION_CONTENT_TYPES
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        passthrough = False
+
+        async def send_wrapper(message: Message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                headers = Headers(raw=message["headers"])
+                passthrough = (
+                    "content-encoding" in headers
+                    or not is_compressible(headers.get("content-type", ""), self.content_types)
+                )
+                if passthrough:
+                    await send(message)
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                # Streaming or small response: send as-is
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding)
+            headers = MutableHeaders(raw=start_message["headers"])
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            if "etag" in headers:
+                headers["ETag"] = encoded_etag(headers["etag"], encoding)
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
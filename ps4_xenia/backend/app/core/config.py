@@ -1,4 +1,5 @@
 import os
+from typing import List
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -16,6 +17,65 @@ class Settings(BaseSettings):
     REDIS_DB: int = int(os.getenv("REDIS_DB", "0"))
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")
     
+    # Notification streaming (SSE / WebSocket)
+    NOTIFICATION_STREAM_HEARTBEAT_SECONDS: int = 15
+    NOTIFICATION_STREAM_MAX_QUEUE: int = 64  # Buffered messages per connection
+    NOTIFICATION_STREAM_MAX_BYTES: int = 65536  # Buffered bytes per connection
+    NOTIFICATION_RETENTION_DAYS: int = 90  # Read notifications older than this are compacted
+    
+    # Response compression
+    COMPRESSION_MIN_SIZE: int = 1024  # Bytes; smaller bodies are sent as-is
+    COMPRESSION_CONTENT_TYPES: List[str] = [
+        "application/json", "text/plain", "text/html", "text/csv", "text/markdown", "application/javascript",
+    ]
+    
+    # Event-loop blocking detector (opt-in; adds a heartbeat task and a watchdog thread)
+    LOOP_MONITOR_ENABLED: bool = False
+    LOOP_MONITOR_THRESHOLD_MS: int = 100  # Stalls longer than this are recorded
+    LOOP_MONITOR_INTERVAL_MS: int = 50  # Heartbeat period
+    LOOP_MONITOR_ASYNCIO_DEBUG: bool = False  # Also record asyncio debug-mode slow callbacks
+    
+    # Event bus ("auto" uses Redis Streams when Redis is reachable, else in-process)
+    EVENT_BUS_BACKEND: str = os.getenv("EVENT_BUS_BACKEND", "auto")  # auto | redis | memory
+    EVENT_BUS_BATCH_SIZE: int = 200  # Max events per consumer batch
+    EVENT_BUS_MAX_WAIT_MS: int = 200  # How long a consumer waits for a batch to fill
+    EVENT_STREAM_MAXLEN: int = 100000  # Approximate cap per Redis stream
+    EVENT_BUS_MAX_DELIVERIES: int = 5  # Attempts per event before it is dead-lettered
+    EVENT_BUS_CLAIM_IDLE_MS: int = 60000  # Pending entries idle this long are claimed from dead consumers
+    PROCESSED_EVENT_RETENTION_DAYS: int = 7  # Consumer dedup claims older than this are pruned
+    
+    # Progress heartbeats
+    PROGRESS_FLUSH_SECONDS: int = 10  # Bulk upsert interval for accumulated watch time
+    PROGRESS_MAX_HEARTBEAT_SECONDS: int = 60  # Cap on a single heartbeat's increment
+    
+    # Content store (uploaded asset files)
+    CONTENT_STORE_BACKEND: str = os.getenv("CONTENT_STORE_BACKEND", "local")
+    CONTENT_STORE_ROOT: str = os.getenv("CONTENT_STORE_ROOT", "./content_store")
+    CONTENT_SIGNING_KEY: str = os.getenv("CONTENT_SIGNING_KEY", "")  # Defaults to SECRET_KEY
+    CONTENT_URL_TTL_SECONDS: int = 3600  # Lifetime of signed content links (expiries align to multiples of it)
+    CONTENT_BASE_URL: str = os.getenv("CONTENT_BASE_URL", "http://localhost:8000")  # Origin signed links point at
+    MAX_UPLOAD_BYTES: int = int(os.getenv("MAX_UPLOAD_BYTES", str(20 * 1024 ** 3)))  # 20 GiB
+    UPLOAD_EXPIRY_HOURS: int = 24  # Resumable uploads idle this long are garbage-collected
+    UPLOAD_GC_INTERVAL_SECONDS: int = 3600
+    UPLOAD_LEASE_SECONDS: int = 120  # A PATCH holds its upload for this long, renewed while streaming
+    
+    # Offline analytics export (Parquet, needs pyarrow)
+    ANALYTICS_EXPORT_DIR: str = os.getenv("ANALYTICS_EXPORT_DIR", "./analytics_export")
+    
+    # Department analytics
+    DEPARTMENT_VERSION_MIN_INTERVAL_SECONDS: int = 60  # Consumers re-key a department's cached views at most this often
+    
+    # Cohort analytics (in-memory interaction snapshot, needs numpy)
+    INTERACTION_SNAPSHOT_PRELOAD: bool = False  # Build at startup instead of on the first cohort query
+    INTERACTION_SNAPSHOT_REFRESH_SECONDS: int = 300  # Incremental refresh period once a worker has built it
+    
+    # Organization skill-gap matrix (in-memory, per worker)
+    SKILL_GAP_MAX_AGE_SECONDS: int = 60  # Re-check for changed users at least this often
+    
+    # Leaderboards (Redis sorted sets, in-process skiplists without Redis)
+    LEADERBOARD_BACKEND: str = os.getenv("LEADERBOARD_BACKEND", "auto")  # auto | redis | memory
+    LEADERBOARD_WEEKLY_RETENTION_DAYS: int = 7  # Weekly boards stay readable this long after the week ends
+    
     class Config:
         env_file = ".env"
 
@@ -29,6 +29,21 @@ def get_session():
     with Session(engine) as session:
         yield session
 
+def dialect_insert(session: Session):
+    """
+    Returns the dialect-specific INSERT construct for the session's bind,
+    so callers can build INSERT ... ON CONFLICT DO UPDATE upserts.
+    Both SQLite (dev) and PostgreSQL (docker) support the same API.
+    """
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upserts are not supported on '{dialect}'")
+    return insert
+
 def commit_with_retry(session: Session, max_retries: int = 3, delay: float = 0.5):
     """
     Commits session with retry logic for transient database errors.
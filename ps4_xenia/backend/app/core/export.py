@@ -0,0 +1,88 @@
+"""
+Streaming export mode for list endpoints.
+
+Clients that send ``Accept: application/x-ndjson`` or ``Accept: text/csv``
+get the rows streamed from a server-side cursor (``yield_per``) instead of a
+JSON array built in memory, so worker memory is bounded by one batch whatever
+the result size. The generator opens its own session: the request's session
+is closed before a streaming body is sent.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Callable, List, Optional, Sequence
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.sql import Select
+from sqlmodel import Session
+from app.core.database import engine
+from app.core.serialization import dumps
+
+NDJSON = "application/x-ndjson"
+CSV = "text/csv"
+EXPORT_BATCH_SIZE = 1000
+
+
+def export_media_type(request: Request) -> Optional[str]:
+    """NDJSON or CSV if the client asked for an export, else None (regular JSON)."""
+    for part in request.headers.get("accept", "").split(","):
+        media_type = part.split(";", 1)[0].strip().lower()
+        if media_type in (NDJSON, CSV):
+            return media_type
+    return None
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
+
+
+def stream_export(
+    statement: Select,
+    to_row: Callable[[Any], dict],
+    columns: Sequence[str],
+    media_type: str,
+    filename: str,
+) -> StreamingResponse:
+    """Stream `statement`'s rows as NDJSON or CSV, one batch per chunk."""
+
+    def generate():
+        with Session(engine) as session:
+            result = session.execute(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+            if media_type == CSV:
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow(columns)
+            for batch in result.partitions():
+                if media_type == CSV:
+                    for row in batch:
+                        values = to_row(row)
+                        writer.writerow([_csv_value(values.get(column)) for column in columns])
+                    chunk = buffer.getvalue().encode()
+                    buffer.seek(0)
+                    buffer.truncate()
+                else:
+                    chunk = b"".join(dumps(to_row(row)) + b"\n" for row in batch)
+                yield chunk
+            if media_type == CSV and buffer.tell():
+                yield buffer.getvalue().encode()
+
+    extension = "csv" if media_type == CSV else "ndjson"
+    return StreamingResponse(
+        generate(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{extension}"'},
+    )
+
+
+def model_columns(model, exclude: Sequence[str] = ()) -> List[str]:
+    return [name for name in model.model_fields if name not in exclude]
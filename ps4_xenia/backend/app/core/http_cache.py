@@ -0,0 +1,89 @@
+"""
+HTTP caching helpers: strong ETags, conditional GET (If-None-Match / 304)
+and cached, pre-compressed JSON response bodies. Compressed bodies carry the
+ETag with their encoding appended ("tag-gzip"); If-None-Match accepts any of them.
+"""
+import hashlib
+from typing import Any, Callable, Optional
+from fastapi import Request, Response
+from app.core.cache import cache_store
+from app.core.compression import ENCODERS, compress, encoded_etag, negotiate_encoding
+from app.core.config import settings
+from app.core.serialization import dumps
+
+# Cache-Control per endpoint class
+CACHE_CONTROL_CATALOG = "private, max-age=30, must-revalidate"  # Shared catalog data behind auth
+CACHE_CONTROL_USER = "private, no-cache"  # Per-user data: always revalidate (cheap 304s)
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag derived from version components (ids, version numbers, timestamps)."""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()[:24]
+    return f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> Optional[str]:
+    """The If-None-Match tag naming this version of the resource (in any encoding), else None."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    if header.strip() == "*":
+        return etag
+    variants = {etag} | {encoded_etag(etag, encoding) for encoding in ENCODERS}
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag in variants:
+            return tag
+    return None
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+def cached_json_response(
+    request: Request,
+    cache_key: str,
+    build: Callable[[], Any],
+    etag: Optional[str] = None,
+    ttl: int = 3600,
+    cache_control: Optional[str] = None,
+) -> Response:
+    """
+    Serve a JSON body identified by a (preferably versioned) cache_key.
+
+    - Matching If-None-Match -> 304 without building anything.
+    - The serialized body and each negotiated compressed variant are cached
+      side by side, so a hot entry is never re-serialized or re-compressed.
+    - build() is only called on a cache miss; hits return the stored bytes
+      as a raw Response with no model rebuild or re-validation.
+    """
+    matched = etag_matches(request, etag) if etag else None
+    if matched:
+        return not_modified(matched, cache_control or "no-cache")
+
+    encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+    body = cache_store.get_bytes(f"{cache_key}:{encoding or 'identity'}")
+    if body is None:
+        raw = cache_store.get_bytes(f"{cache_key}:identity")
+        if raw is None:
+            raw = dumps(build())
+            cache_store.set_bytes(f"{cache_key}:identity", raw, expire=ttl)
+        if encoding and len(raw) < settings.COMPRESSION_MIN_SIZE:
+            encoding = None
+        body = raw
+        if encoding:
+            body = compress(raw, encoding)
+            cache_store.set_bytes(f"{cache_key}:{encoding}", body, expire=ttl)
+
+    headers = {"Vary": "Accept-Encoding"}
+    if etag:
+        headers["ETag"] = encoded_etag(etag, encoding)
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
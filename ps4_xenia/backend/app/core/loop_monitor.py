@@ -0,0 +1,197 @@
+"""
+Event-loop blocking detector (opt-in via LOOP_MONITOR_ENABLED).
+
+A heartbeat coroutine wakes every LOOP_MONITOR_INTERVAL_MS; if it wakes late by
+more than LOOP_MONITOR_THRESHOLD_MS the loop was blocked. A watchdog thread
+samples the loop thread's stack while the heartbeat is overdue, so each stall
+is recorded with the blocking frame, the route being served and its duration.
+Optionally, asyncio debug mode's slow-callback warnings are recorded too.
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+import weakref
+from collections import deque
+from typing import Deque, Dict, List, Optional
+from starlette.routing import Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+STACK_DEPTH = 15
+UNMATCHED_ROUTE = "unmatched"  # Label for requests no route matches (404s, scanners)
+
+
+class LoopMonitor:
+    def __init__(self):
+        self.enabled = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._last_beat = time.monotonic()
+        self._lock = threading.Lock()
+        # Stack/route captured by the watchdog during the current stall
+        self._sample: Optional[dict] = None
+        self._task_routes: "weakref.WeakKeyDictionary[asyncio.Task, str]" = weakref.WeakKeyDictionary()
+        self.recent: Deque[dict] = deque(maxlen=50)
+        self.by_route: Dict[str, dict] = {}
+        self.slow_callbacks: Deque[dict] = deque(maxlen=50)
+
+    # --- Lifecycle ---
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self.threshold = settings.LOOP_MONITOR_THRESHOLD_MS / 1000.0
+        self.interval = settings.LOOP_MONITOR_INTERVAL_MS / 1000.0
+        self._stop.clear()
+        self._last_beat = time.monotonic()
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._watchdog.start()
+
+        if settings.LOOP_MONITOR_ASYNCIO_DEBUG:
+            self._loop.set_debug(True)
+            self._loop.slow_callback_duration = self.threshold
+            logging.getLogger("asyncio").addHandler(_SlowCallbackHandler(self))
+        self.enabled = True
+        logger.info(f"✅ Event-loop monitor started (threshold {settings.LOOP_MONITOR_THRESHOLD_MS}ms).")
+
+    def stop(self):
+        self._stop.set()
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+        self.enabled = False
+
+    # --- Route tracking ---
+
+    def set_route(self, route: str):
+        task = asyncio.current_task()
+        if task is not None:
+            self._task_routes[task] = route
+
+    def _current_route(self) -> str:
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            task = None
+        return self._task_routes.get(task, "background") if task is not None else "background"
+
+    # --- Detection ---
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            self._last_beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = time.monotonic() - expected
+            if lag > self.threshold:
+                with self._lock:
+                    sample, self._sample = self._sample, None
+                self._record(lag, sample)
+            else:
+                with self._lock:
+                    self._sample = None
+
+    def _watch(self):
+        while not self._stop.wait(self.interval / 2):
+            overdue = time.monotonic() - self._last_beat - self.interval
+            if overdue <= self.threshold:
+                continue
+            with self._lock:
+                if self._sample is not None:
+                    continue  # Already sampled this stall
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = traceback.format_stack(frame, limit=STACK_DEPTH) if frame else []
+            with self._lock:
+                self._sample = {"route": self._current_route(), "stack": stack}
+
+    def _record(self, lag: float, sample: Optional[dict]):
+        duration_ms = round(lag * 1000, 1)
+        route = sample["route"] if sample else "unknown"
+        stack: List[str] = sample["stack"] if sample else []
+        event = {
+            "route": route,
+            "duration_ms": duration_ms,
+            "at": time.time(),
+            "stack": [line.rstrip() for line in stack],
+        }
+        with self._lock:
+            self.recent.append(event)
+            aggregate = self.by_route.setdefault(route, {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "last_stack": []})
+            aggregate["count"] += 1
+            aggregate["total_ms"] += duration_ms
+            aggregate["max_ms"] = max(aggregate["max_ms"], duration_ms)
+            aggregate["last_stack"] = event["stack"]
+
+        metrics.inc("event_loop_blocked_total", route=route)
+        metrics.observe("event_loop_blocked_ms", duration_ms, route=route)
+        logger.warning(f"⚠️ Event loop blocked for {duration_ms}ms while serving {route}")
+
+    def record_slow_callback(self, message: str):
+        with self._lock:
+            self.slow_callbacks.append({"message": message, "at": time.time()})
+        metrics.inc("event_loop_slow_callbacks_total")
+
+    def report(self) -> dict:
+        """A snapshot: copied under the lock so serializing it can't race the recorder."""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "threshold_ms": settings.LOOP_MONITOR_THRESHOLD_MS,
+                "by_route": {route: dict(aggregate) for route, aggregate in self.by_route.items()},
+                "recent": list(self.recent),
+                "slow_callbacks": list(self.slow_callbacks),
+            }
+
+
+class _SlowCallbackHandler(logging.Handler):
+    """Captures asyncio debug-mode 'Executing <Handle> took X seconds' warnings."""
+
+    def __init__(self, monitor: LoopMonitor):
+        super().__init__(level=logging.WARNING)
+        self.monitor = monitor
+
+    def emit(self, record: logging.LogRecord):
+        message = record.getMessage()
+        if message.startswith("Executing "):
+            self.monitor.record_slow_callback(message)
+
+
+def route_template(scope: Scope) -> str:
+    """
+    The path template of the route serving `scope` (e.g. /api/v1/assets/{asset_id}),
+    so labels stay a bounded set whatever paths clients request. Middleware runs
+    before routing, so the application's routes are matched here.
+    """
+    partial = None
+    for route in getattr(scope.get("app"), "routes", []):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path  # Path matches, method doesn't (a 405)
+    return partial or UNMATCHED_ROUTE
+
+
+class LoopMonitorMiddleware:
+    """Tags the serving task with its route template so stalls can be attributed."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] in ("http", "websocket"):
+            loop_monitor.set_route(f"{scope.get('method', 'WS')} {route_template(scope)}")
+        await self.app(scope, receive, send)
+
+
+# Global monitor (one per worker)
+loop_monitor = LoopMonitor()
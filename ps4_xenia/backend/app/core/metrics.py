@@ -0,0 +1,75 @@
+"""
+In-process metrics registry.
+Counters and summaries (count / sum / max) keyed by name and labels, with a
+JSON snapshot and Prometheus text exposition for the admin metrics endpoint.
+"""
+import threading
+from typing import Dict, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._summaries: Dict[str, Dict[LabelKey, list]] = {}
+
+    @staticmethod
+    def _key(labels: Dict[str, str]) -> LabelKey:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._summaries.setdefault(name, {})
+            stats = series.setdefault(key, [0, 0.0, 0.0])  # count, sum, max
+            stats[0] += 1
+            stats[1] += value
+            stats[2] = max(stats[2], value)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "counters": {
+                    name: [{"labels": dict(k), "value": v} for k, v in series.items()]
+                    for name, series in self._counters.items()
+                },
+                "summaries": {
+                    name: [{"labels": dict(k), "count": s[0], "sum": s[1], "max": s[2]} for k, s in series.items()]
+                    for name, series in self._summaries.items()
+                },
+            }
+
+    def render_prometheus(self) -> str:
+        def escape(value) -> str:
+            # Label values per the text exposition format: backslash, quote and newline escaped
+            return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+        def fmt(labels: LabelKey) -> str:
+            if not labels:
+                return ""
+            return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in labels) + "}"
+
+        lines = []
+        with self._lock:
+            for name, series in self._counters.items():
+                lines.append(f"# TYPE {name} counter")
+                lines.extend(f"{name}{fmt(k)} {v}" for k, v in series.items())
+            for name, series in self._summaries.items():
+                lines.append(f"# TYPE {name} summary")
+                for k, (count, total, maximum) in series.items():
+                    lines.append(f"{name}_count{fmt(k)} {count}")
+                    lines.append(f"{name}_sum{fmt(k)} {total}")
+                    lines.append(f"{name}_max{fmt(k)} {maximum}")
+        return "\n".join(lines) + "\n"
+
+
+# Global registry (one per worker)
+metrics = MetricsRegistry()
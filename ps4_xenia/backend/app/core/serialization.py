@@ -0,0 +1,33 @@
+"""
+JSON serialization fast path.
+Uses orjson when installed (optional dependency) and falls back to the stdlib.
+DefaultResponse is the app-wide response class.
+"""
+import json
+from typing import Any
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse
+except ImportError:  # Optional dependency
+    orjson = None
+    ORJSONResponse = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(value: Any) -> bytes:
+    """Serialize plain data or Pydantic models straight to JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default)
+    return json.dumps(jsonable_encoder(value), separators=(",", ":")).encode()
+
+
+DefaultResponse = ORJSONResponse if orjson is not None else JSONResponse
@@ -0,0 +1,174 @@
+"""
+In-process sorted set: the fallback for Redis ZSETs when Redis is unavailable.
+
+An indexable skiplist (each forward link records how many level-0 nodes it
+spans, as in Redis' zskiplist) ordered by (score, member), plus a member ->
+score dict. Insert, delete, rank and element-by-rank are O(log n); ordering
+and tie-breaking match Redis, so both backends rank identically.
+Not thread-safe: callers hold a lock.
+"""
+import random
+from typing import Dict, List, Optional, Tuple
+
+MAX_LEVEL = 32
+P = 0.25
+
+
+class _Node:
+    __slots__ = ("key", "forward", "span")
+
+    def __init__(self, key: Optional[Tuple[float, str]], level: int):
+        self.key = key
+        self.forward: List[Optional["_Node"]] = [None] * level
+        self.span: List[int] = [0] * level
+
+
+def _random_level() -> int:
+    level = 1
+    while level < MAX_LEVEL and random.random() < P:
+        level += 1
+    return level
+
+
+class SortedSet:
+    def __init__(self):
+        self._head = _Node(None, MAX_LEVEL)
+        self._level = 1
+        self._scores: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __contains__(self, member: str) -> bool:
+        return member in self._scores
+
+    def score(self, member: str) -> Optional[float]:
+        return self._scores.get(member)
+
+    # --- Writes ---
+
+    def add(self, member: str, score: float):
+        """Insert or re-score a member (ZADD)."""
+        old = self._scores.get(member)
+        if old is not None:
+            if old == score:
+                return
+            self._delete((old, member))
+        self._insert((score, member))
+        self._scores[member] = score
+
+    def incr(self, member: str, amount: float) -> float:
+        """ZINCRBY; returns the new score."""
+        score = self._scores.get(member, 0.0) + amount
+        self.add(member, score)
+        return score
+
+    def remove(self, member: str) -> bool:
+        score = self._scores.pop(member, None)
+        if score is None:
+            return False
+        self._delete((score, member))
+        return True
+
+    def _insert(self, key: Tuple[float, str]):
+        update: List[_Node] = [self._head] * MAX_LEVEL
+        rank = [0] * MAX_LEVEL
+        node = self._head
+        for i in reversed(range(self._level)):
+            rank[i] = 0 if i == self._level - 1 else rank[i + 1]
+            while node.forward[i] is not None and node.forward[i].key < key:
+                rank[i] += node.span[i]
+                node = node.forward[i]
+            update[i] = node
+
+        level = _random_level()
+        if level > self._level:
+            for i in range(self._level, level):
+                rank[i] = 0
+                update[i] = self._head
+                self._head.span[i] = len(self._scores)
+            self._level = level
+
+        new = _Node(key, level)
+        for i in range(level):
+            new.forward[i] = update[i].forward[i]
+            update[i].forward[i] = new
+            new.span[i] = update[i].span[i] - (rank[0] - rank[i])
+            update[i].span[i] = rank[0] - rank[i] + 1
+        for i in range(level, self._level):
+            update[i].span[i] += 1
+
+    def _delete(self, key: Tuple[float, str]):
+        update: List[_Node] = [self._head] * MAX_LEVEL
+        node = self._head
+        for i in reversed(range(self._level)):
+            while node.forward[i] is not None and node.forward[i].key < key:
+                node = node.forward[i]
+            update[i] = node
+        target = node.forward[0]
+        if target is None or target.key != key:
+            return
+        for i in range(self._level):
+            if update[i].forward[i] is target:
+                update[i].span[i] += target.span[i] - 1
+                update[i].forward[i] = target.forward[i]
+            else:
+                update[i].span[i] -= 1
+        while self._level > 1 and self._head.forward[self._level - 1] is None:
+            self._level -= 1
+
+    # --- Reads ---
+
+    def rank(self, member: str) -> Optional[int]:
+        """0-based ascending rank (ZRANK)."""
+        score = self._scores.get(member)
+        if score is None:
+            return None
+        key = (score, member)
+        rank = 0
+        node = self._head
+        for i in reversed(range(self._level)):
+            while node.forward[i] is not None and node.forward[i].key <= key:
+                rank += node.span[i]
+                node = node.forward[i]
+            if node.key == key:
+                return rank - 1
+        return None
+
+    def rev_rank(self, member: str) -> Optional[int]:
+        """0-based descending rank (ZREVRANK)."""
+        rank = self.rank(member)
+        return None if rank is None else len(self._scores) - 1 - rank
+
+    def _node_at(self, rank: int) -> Optional[_Node]:
+        """Node at 0-based ascending rank."""
+        traversed = 0
+        node = self._head
+        target = rank + 1
+        for i in reversed(range(self._level)):
+            while node.forward[i] is not None and traversed + node.span[i] <= target:
+                traversed += node.span[i]
+                node = node.forward[i]
+            if traversed == target:
+                return node
+        return None
+
+    def range(self, start: int, stop: int) -> List[Tuple[str, float]]:
+        """Members at ascending ranks start..stop inclusive (ZRANGE ... WITHSCORES)."""
+        start, stop = max(start, 0), min(stop, len(self._scores) - 1)
+        if start > stop:
+            return []
+        node = self._node_at(start)
+        result = []
+        for _ in range(stop - start + 1):
+            result.append((node.key[1], node.key[0]))
+            node = node.forward[0]
+        return result
+
+    def rev_range(self, start: int, stop: int) -> List[Tuple[str, float]]:
+        """Members at descending ranks start..stop inclusive (ZREVRANGE ... WITHSCORES)."""
+        size = len(self._scores)
+        start, stop = max(start, 0), min(stop, size - 1)
+        if start > stop:
+            return []
+        return list(reversed(self.range(size - 1 - stop, size - 1 - start)))
@@ -1,9 +1,19 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.database import create_db_and_tables
+from app.core.compression import CompressionMiddleware
+from app.core.config import settings
+from app.core.loop_monitor import LoopMonitorMiddleware, loop_monitor
+from app.core.serialization import DefaultResponse
 from app.api import admin, learning, auth, profile
+from app.services.notification_broker import notification_broker
+from app.services.event_bus import event_bus
+from app.services.event_consumers import register_consumers
+from app.services.progress import progress_accumulator
+from app.services.resumable_uploads import upload_janitor
+from app.services.interaction_snapshot import interaction_snapshot
 
-app = FastAPI(title="Dynamic Professional Development Platform")
+app = FastAPI(title="Dynamic Professional Development Platform", default_response_class=DefaultResponse)
 # Trigger Reload for Phase 8 Config
 
 # Add CORS middleware
@@ -13,27 +23,67 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Location", "Tus-Resumable", "Upload-Offset", "Upload-Length", "Upload-Expires"],
 )
 
+# Learning side effects (mastery, notifications, invalidation) run as event consumers
+register_consumers(event_bus)
+
+# Compress large JSON/text responses (pre-compressed cache hits pass through)
+app.add_middleware(CompressionMiddleware)
+
+# Attribute event-loop stalls to routes (opt-in)
+if settings.LOOP_MONITOR_ENABLED:
+    app.add_middleware(LoopMonitorMiddleware)
+
 @app.on_event("startup")
-def on_startup():
+async def on_startup():
     create_db_and_tables()
+    await notification_broker.start()
+    await event_bus.start()
+    progress_accumulator.start()
+    upload_janitor.start()
+    interaction_snapshot.start()
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    interaction_snapshot.stop()
+    upload_janitor.stop()
+    await progress_accumulator.stop()
+    await event_bus.stop()
+    await notification_broker.stop()
+    loop_monitor.stop()
 
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the Dynamic PDP API"}
 
 # Include routers
+app.include_router(learning.router, prefix="/api/v1", tags=["learning"])  # First: hosts the heartbeat hot path
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["authentication"])
 app.include_router(profile.router, prefix="/api/v1", tags=["profile"])
 app.include_router(admin.router, prefix="/api/v1", tags=["admin"])
-app.include_router(learning.router, prefix="/api/v1", tags=["learning"])
 
 from app.api import analytics, notifications
 app.include_router(analytics.router, prefix="/api/v1", tags=["analytics"])
 app.include_router(notifications.router, prefix="/api/v1", tags=["notifications"])
 
 # Late import to avoid circular dependency if needed, or better organize admins
-from app.api import admin_assets, assets
+from app.api import admin_assets, assets, quizzes
 app.include_router(admin_assets.router, prefix="/api/v1/admin", tags=["admin-assets"])
 app.include_router(assets.router, prefix="/api/v1", tags=["library"])
+app.include_router(quizzes.router, prefix="/api/v1", tags=["quizzes"])
+
+from app.api import diagnostics
+app.include_router(diagnostics.router, prefix="/api/v1/admin", tags=["diagnostics"])
+
+from app.api import content
+app.include_router(content.router, prefix="/api/v1", tags=["content"])
+
+from app.api import leaderboards
+app.include_router(leaderboards.router, prefix="/api/v1", tags=["leaderboards"])
+
+from app.api import learning_paths
+app.include_router(learning_paths.router, prefix="/api/v1", tags=["learning-paths"])
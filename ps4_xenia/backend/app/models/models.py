@@ -1,6 +1,7 @@
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime
 from uuid import UUID, uuid4
+from sqlalchemy import Index, LargeBinary, UniqueConstraint
 from sqlmodel import SQLModel, Field, Relationship, Column, JSON
 from enum import Enum
 
@@ -27,6 +28,11 @@ class PathStatus(str, Enum):
     IN_PROGRESS = "in_progress"
     COMPLETED = "completed"
 
+class StepStatus(str, Enum):
+    PENDING = "pending"
+    COMPLETED = "completed"
+    SKIPPED = "skipped"  # Fast-tracked: the skill is already mastered
+
 # --- Models ---
 
 class User(SQLModel, table=True):
@@ -42,7 +48,7 @@ class User(SQLModel, table=True):
     
     # Enterprise profile fields
     role: str = Field(default="Employee")  # Job role (e.g., "Software Engineer")
-    department: Optional[str] = None  # e.g., "Engineering", "Sales"
+    department: Optional[str] = Field(default=None, index=True)  # e.g., "Engineering", "Sales"
     employee_id: Optional[str] = Field(default=None, unique=True, index=True)
     
     # Skills tracking
@@ -55,18 +61,21 @@ class User(SQLModel, table=True):
     
     # Timestamps
     created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow, index=True)  # Skill-gap refresh scans recent changes
 
     interactions: List["UserInteraction"] = Relationship(back_populates="user")
     learning_paths: List["LearningPath"] = Relationship(back_populates="user")
     skill_mastery: List["SkillMastery"] = Relationship(back_populates="user")
 
 class SkillMastery(SQLModel, table=True):
+    # One row per (user, skill) so mastery increments are a single UPDATE
+    __table_args__ = (UniqueConstraint("user_id", "skill_name", name="uq_skillmastery_user_skill"),)
+
     id: str = Field(default_factory=lambda: str(uuid4()), primary_key=True, index=True)
     user_id: str = Field(foreign_key="user.id", index=True)
     skill_name: str
     proficiency: float = Field(default=0.0) # 0.0 to 100.0
-    last_updated: datetime = Field(default_factory=datetime.utcnow)
+    last_updated: datetime = Field(default_factory=datetime.utcnow, index=True)
 
     user: User = Relationship(back_populates="skill_mastery")
 
@@ -112,14 +121,51 @@ class AssetVersion(SQLModel, table=True):
     
     asset: Asset = Relationship(back_populates="versions")
 
+class AssetUpload(SQLModel, table=True):
+    # Resumable (tus-style) upload. The bytes received so far live in the
+    # content store's partial file; this row is the source of truth for how
+    # many of them are acknowledged, so uploads survive worker restarts.
+    id: str = Field(default_factory=lambda: uuid4().hex, primary_key=True)
+    asset_id: str = Field(foreign_key="asset.id", index=True)
+    created_by: str = Field(foreign_key="user.id")
+    filename: str
+    content_type: Optional[str] = None
+    upload_length: int
+    upload_offset: int = Field(default=0)
+    locked_until: Optional[datetime] = None  # Lease held by the request appending a chunk
+    lease_token: Optional[str] = None  # Identifies that request; renew/release must present it
+    version_id: Optional[str] = None  # Set once finalized into an AssetVersion
+    sha256: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: datetime = Field(index=True)
+
 class LearningPath(SQLModel, table=True):
     id: str = Field(default_factory=lambda: str(uuid4()), primary_key=True, index=True)
-    user_id: str = Field(foreign_key="user.id")
+    user_id: str = Field(foreign_key="user.id", index=True)
     name: str
     status: PathStatus = Field(default=PathStatus.IN_PROGRESS)
+    # What the steps were planned against; a mismatch means re-plan
+    curriculum_version: Optional[str] = None
+    target_skills: List[str] = Field(default=[], sa_column=Column(JSON))
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
     
     user: User = Relationship(back_populates="learning_paths")
 
+class LearningPathStep(SQLModel, table=True):
+    # Materialized, ordered path: "next" is the first pending step by position
+    __table_args__ = (Index("ix_learningpathstep_path_status_position", "path_id", "status", "position"),)
+
+    path_id: str = Field(foreign_key="learningpath.id", primary_key=True)
+    position: int = Field(primary_key=True)
+    asset_id: str = Field(foreign_key="asset.id")
+    status: StepStatus = Field(default=StepStatus.PENDING)
+
+class SkillPrerequisite(SQLModel, table=True):
+    # skill requires prerequisite_skill (edges of the curriculum DAG)
+    skill: str = Field(primary_key=True)
+    prerequisite_skill: str = Field(primary_key=True)
+
 class UserInteraction(SQLModel, table=True):
     id: str = Field(default_factory=lambda: str(uuid4()), primary_key=True, index=True)
     user_id: str = Field(foreign_key="user.id")
@@ -129,10 +175,31 @@ class UserInteraction(SQLModel, table=True):
     time_spent_seconds: int = Field(default=0)
     attempts: int = Field(default=1)
     timestamp: datetime = Field(default_factory=datetime.utcnow)
+    # When the server stored the row (timestamp is client-supplied and may be
+    # backdated by replays); incremental readers watermark on this
+    ingested_at: datetime = Field(default_factory=datetime.utcnow, index=True)
 
     user: User = Relationship(back_populates="interactions")
     asset: Asset = Relationship(back_populates="interactions")
 
+class UserLearningStats(SQLModel, table=True):
+    # Running per-user aggregates, maintained by record_interaction so the
+    # dashboard never has to scan UserInteraction.
+    user_id: str = Field(foreign_key="user.id", primary_key=True)
+    completed_count: int = Field(default=0)
+    score_sum: float = Field(default=0.0)
+    score_count: int = Field(default=0)
+    total_seconds: int = Field(default=0)
+    last_activity: Optional[datetime] = None
+
+class UserActivityBitmap(SQLModel, table=True):
+    # One bit per UTC day since first_day: bit i of the little-endian `bits`
+    # is set if the user recorded any interaction on first_day + i.
+    # Streaks are computed with bit operations on it.
+    user_id: str = Field(foreign_key="user.id", primary_key=True)
+    first_day: date
+    bits: bytes = Field(default=b"", sa_column=Column(LargeBinary, nullable=False))
+
 class Notification(SQLModel, table=True):
     id: str = Field(default_factory=lambda: str(uuid4()), primary_key=True, index=True)
     user_id: str = Field(foreign_key="user.id", index=True)
@@ -140,3 +207,37 @@ class Notification(SQLModel, table=True):
     type: str = Field(default="info") # info, success, warning
     is_read: bool = Field(default=False)
     created_at: datetime = Field(default_factory=datetime.utcnow)
+
+class NotificationCounter(SQLModel, table=True):
+    # Maintained unread count per user so badges don't download the full list
+    user_id: str = Field(foreign_key="user.id", primary_key=True)
+    unread_count: int = Field(default=0)
+
+class AssetProgress(SQLModel, table=True):
+    # Live watch time per (user, asset), accumulated from heartbeats and
+    # flushed in bulk; the final interaction still carries time_spent_seconds.
+    user_id: str = Field(foreign_key="user.id", primary_key=True)
+    asset_id: str = Field(foreign_key="asset.id", primary_key=True)
+    watched_seconds: int = Field(default=0)
+    position_seconds: Optional[int] = None  # Last reported playback position
+    last_heartbeat: datetime = Field(default_factory=datetime.utcnow)
+
+class DailyLearningRollup(SQLModel, table=True):
+    # Per-user, per-day learning totals folded from InteractionRecorded events.
+    # Department analytics group these joined to User.department instead of
+    # scanning UserInteraction.
+    user_id: str = Field(foreign_key="user.id", primary_key=True)
+    day: date = Field(primary_key=True, index=True)
+    interactions: int = Field(default=0)
+    completed: int = Field(default=0)
+    score_sum: float = Field(default=0.0)
+    score_count: int = Field(default=0)
+    seconds: int = Field(default=0)  # Time spent
+    estimated_seconds: int = Field(default=0)  # Estimated duration of the completed assets
+
+class ProcessedEvent(SQLModel, table=True):
+    # Events an event-bus consumer has applied, written in the same transaction
+    # as its effects, so redeliveries (at-least-once) are skipped
+    subscriber: str = Field(primary_key=True)
+    event_key: str = Field(primary_key=True)  # Event.dedup_key
+    processed_at: datetime = Field(default_factory=datetime.utcnow, index=True)
@@ -0,0 +1,322 @@
+"""
+Columnar Parquet export for offline analytics (optional `pyarrow` dependency).
+
+Writes hive-partitioned datasets the data team can query with DuckDB, Spark
+or pandas instead of scraping the API:
+
+    interactions/month=2026-10/department=Engineering/part-<run>.parquet
+    skill_mastery/month=2026-10/department=Engineering/part-<run>.parquet
+    assets/assets.parquet
+
+Rows are read in chunks from a server-side cursor in watermark order, grouped
+per partition and written as Arrow record batches, so memory is bounded by
+the row-group buffers. Exports are incremental: `_state.json` keeps a
+(time, id) watermark per table and each run appends new part files with only
+the rows past it. Interactions watermark on the server-assigned ingested_at,
+not their (client-supplied) timestamp, so backdated replays are still picked
+up; they land in their activity month's partition as an extra part file.
+Rows younger than EXPORT_SAFETY_LAG are left for the next run so
+transactions still in flight are not skipped.
+
+skill_mastery rows are mutable: every run exports the rows updated since the
+last one, so readers keep the latest `last_updated` per (user_id, skill_name).
+Assets are a small dimension table and are re-exported in full each run.
+"""
+import json
+import logging
+import os
+import shutil
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote
+from uuid import uuid4
+from sqlalchemy import and_, or_
+from sqlmodel import Session, select
+from app.core.config import settings
+from app.models.models import Asset, SkillMastery, User, UserInteraction
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Optional dependency
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK_ROWS = 50000
+ROW_GROUP_ROWS = 50000
+EXPORT_SAFETY_LAG = timedelta(seconds=60)
+STATE_FILE = "_state.json"
+DEFAULT_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+
+
+def _schema(*fields) -> "pa.Schema":
+    return pa.schema([pa.field(name, dtype) for name, dtype in fields])
+
+
+def _interaction_schema():
+    return _schema(
+        ("id", pa.string()), ("user_id", pa.string()), ("asset_id", pa.string()), ("status", pa.string()),
+        ("score", pa.float64()), ("time_spent_seconds", pa.int64()), ("attempts", pa.int64()),
+        ("timestamp", pa.timestamp("us")), ("department", pa.string()), ("skill_tag", pa.string()),
+        ("difficulty_level", pa.int32()),
+    )
+
+
+def _mastery_schema():
+    return _schema(
+        ("id", pa.string()), ("user_id", pa.string()), ("skill_name", pa.string()),
+        ("proficiency", pa.float64()), ("last_updated", pa.timestamp("us")), ("department", pa.string()),
+    )
+
+
+def _asset_schema():
+    return _schema(
+        ("id", pa.string()), ("title", pa.string()), ("content_type", pa.string()), ("skill_tag", pa.string()),
+        ("difficulty_level", pa.int32()), ("estimated_duration_minutes", pa.int64()),
+        ("current_version", pa.int64()), ("file_size_bytes", pa.int64()), ("is_active", pa.bool_()),
+        ("is_archived", pa.bool_()), ("created_at", pa.timestamp("us")), ("updated_at", pa.timestamp("us")),
+    )
+
+
+class PartitionedWriter:
+    """
+    Buffers rows per (month, department) partition and writes them as Arrow
+    record batches, one ParquetWriter (one part file) per partition per run.
+    Files are written under a temporary name and renamed when closed.
+    """
+
+    def __init__(self, root: str, schema: "pa.Schema", run_id: str):
+        self.root = root
+        self.schema = schema
+        self.run_id = run_id
+        self.buffers: Dict[Tuple[str, str], Dict[str, list]] = {}
+        self.writers: Dict[Tuple[str, str], Tuple["pq.ParquetWriter", str]] = {}
+        self.parts: Dict[Tuple[str, str], int] = {}  # Part files opened per partition this run
+        self.files: List[str] = []
+        self.rows = 0
+
+    def _path(self, partition: Tuple[str, str]) -> str:
+        month, department = partition
+        directory = os.path.join(self.root, f"month={month}", f"department={quote(department, safe='')}")
+        os.makedirs(directory, exist_ok=True)
+        part = self.parts.get(partition, 0)
+        self.parts[partition] = part + 1
+        suffix = f"-{part}" if part else ""
+        return os.path.join(directory, f"part-{self.run_id}{suffix}.parquet")
+
+    def append(self, partition: Tuple[str, str], row: dict):
+        buffer = self.buffers.get(partition)
+        if buffer is None:
+            buffer = self.buffers[partition] = {name: [] for name in self.schema.names}
+        for name in self.schema.names:
+            buffer[name].append(row[name])
+        self.rows += 1
+        if len(buffer["id"]) >= ROW_GROUP_ROWS:
+            self._flush(partition)
+
+    def _flush(self, partition: Tuple[str, str]):
+        buffer = self.buffers.pop(partition, None)
+        if not buffer or not buffer["id"]:
+            return
+        batch = pa.RecordBatch.from_pydict(buffer, schema=self.schema)
+        if partition not in self.writers:
+            path = self._path(partition)
+            self.writers[partition] = (pq.ParquetWriter(f"{path}.tmp", self.schema, compression="zstd"), path)
+        self.writers[partition][0].write_batch(batch)
+
+    def close_months_before(self, month: str):
+        """
+        Input is (mostly) in time order, so partitions of earlier months are
+        usually complete; a late row reopens its partition in a new part file.
+        """
+        for partition in [p for p in set(self.buffers) | set(self.writers) if p[0] < month]:
+            self._close(partition)
+
+    def _close(self, partition: Tuple[str, str]):
+        self._flush(partition)
+        writer, path = self.writers.pop(partition, (None, None))
+        if writer is not None:
+            writer.close()
+            os.replace(f"{path}.tmp", path)
+            self.files.append(path)
+
+    def close(self):
+        for partition in list(set(self.buffers) | set(self.writers)):
+            self._close(partition)
+
+    def abort(self):
+        """Discard everything this run wrote, so a retry doesn't export rows twice."""
+        for writer, path in self.writers.values():
+            writer.close()
+            os.remove(f"{path}.tmp")
+        for path in self.files:
+            os.remove(path)
+        self.writers, self.buffers, self.files = {}, {}, []
+
+
+class AnalyticsExporter:
+    def __init__(self, session: Session, root: Optional[str] = None):
+        _require_pyarrow()
+        self.session = session
+        self.root = os.path.abspath(root or settings.ANALYTICS_EXPORT_DIR)
+        self.run_id = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid4().hex[:8]}"
+        os.makedirs(self.root, exist_ok=True)
+        self.state = self._load_state()
+
+    # --- Watermark state ---
+
+    def _load_state(self) -> dict:
+        path = os.path.join(self.root, STATE_FILE)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def _save_state(self):
+        path = os.path.join(self.root, STATE_FILE)
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(f"{path}.tmp", path)
+
+    def _watermark(self, table: str) -> Optional[Tuple[datetime, str]]:
+        entry = self.state.get(table)
+        return (datetime.fromisoformat(entry["timestamp"]), entry["id"]) if entry else None
+
+    def _reset(self, table: str):
+        shutil.rmtree(os.path.join(self.root, table), ignore_errors=True)
+        self.state.pop(table, None)
+        self._save_state()
+
+    @staticmethod
+    def _remove_partials(directory: str):
+        """Drop .tmp part files left behind by a crashed run."""
+        for dirpath, _, filenames in os.walk(directory):
+            for name in filenames:
+                if name.endswith(".tmp"):
+                    os.remove(os.path.join(dirpath, name))
+
+    # --- Incremental, partitioned tables ---
+
+    def _export_incremental(
+        self,
+        table: str,
+        statement,
+        watermark_column,
+        id_column,
+        schema: "pa.Schema",
+        to_row: Callable[[tuple], dict],
+        time_field: str,
+    ) -> dict:
+        """
+        Append the rows past the (watermark_column, id_column) watermark,
+        partitioned by the month of the row's `time_field`.
+        """
+        directory = os.path.join(self.root, table)
+        self._remove_partials(directory)
+        until = datetime.utcnow() - EXPORT_SAFETY_LAG
+        statement = statement.add_columns(watermark_column, id_column).where(watermark_column <= until)
+        watermark = self._watermark(table)
+        if watermark:
+            since, last_id = watermark
+            statement = statement.where(
+                or_(watermark_column > since, and_(watermark_column == since, id_column > last_id))
+            )
+        statement = statement.order_by(watermark_column, id_column).execution_options(yield_per=READ_CHUNK_ROWS)
+
+        writer = PartitionedWriter(directory, schema, self.run_id)
+        last = None
+        try:
+            for chunk in self.session.execute(statement).partitions():
+                for values in chunk:
+                    row = to_row(values[:-2])
+                    month = f"{row[time_field]:%Y-%m}"
+                    writer.append((month, row["department"] or DEFAULT_PARTITION), row)
+                    last = values[-2:]
+                writer.close_months_before(month)
+            writer.close()
+        except BaseException:
+            writer.abort()
+            raise
+
+        if last is not None:
+            self.state[table] = {"timestamp": last[0].isoformat(), "id": last[1]}
+            self._save_state()
+        return {"rows": writer.rows, "files": len(writer.files)}
+
+    def export_interactions(self) -> dict:
+        statement = (
+            select(
+                UserInteraction.id, UserInteraction.user_id, UserInteraction.asset_id, UserInteraction.status,
+                UserInteraction.score, UserInteraction.time_spent_seconds, UserInteraction.attempts,
+                UserInteraction.timestamp, User.department, Asset.skill_tag, Asset.difficulty_level,
+            )
+            .join(User, User.id == UserInteraction.user_id)
+            .outerjoin(Asset, Asset.id == UserInteraction.asset_id)
+        )
+        schema = _interaction_schema()
+
+        def to_row(values) -> dict:
+            row = dict(zip(schema.names, values))
+            row["status"] = getattr(row["status"], "value", row["status"])
+            return row
+
+        return self._export_incremental(
+            "interactions", statement, UserInteraction.ingested_at, UserInteraction.id, schema, to_row, "timestamp"
+        )
+
+    def export_skill_mastery(self) -> dict:
+        statement = (
+            select(
+                SkillMastery.id, SkillMastery.user_id, SkillMastery.skill_name, SkillMastery.proficiency,
+                SkillMastery.last_updated, User.department,
+            )
+            .join(User, User.id == SkillMastery.user_id)
+        )
+        schema = _mastery_schema()
+        return self._export_incremental(
+            "skill_mastery", statement, SkillMastery.last_updated, SkillMastery.id, schema,
+            lambda values: dict(zip(schema.names, values)), "last_updated",
+        )
+
+    # --- Dimension snapshot ---
+
+    def export_assets(self) -> dict:
+        schema = _asset_schema()
+        directory = os.path.join(self.root, "assets")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, "assets.parquet")
+        statement = select(*[getattr(Asset, name) for name in schema.names]).order_by(Asset.id)
+        rows = 0
+        with pq.ParquetWriter(f"{path}.tmp", schema, compression="zstd") as writer:
+            for chunk in self.session.execute(statement.execution_options(yield_per=READ_CHUNK_ROWS)).partitions():
+                columns = list(zip(*chunk))
+                writer.write_batch(pa.RecordBatch.from_arrays(
+                    [pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema
+                ))
+                rows += len(chunk)
+        os.replace(f"{path}.tmp", path)
+        return {"rows": rows, "files": 1}
+
+    # --- Entry point ---
+
+    def run(self, tables: Optional[List[str]] = None, full: bool = False) -> Dict[str, dict]:
+        """Export the given tables (default: all); `full` discards previous output and watermarks."""
+        exports = {
+            "interactions": self.export_interactions,
+            "skill_mastery": self.export_skill_mastery,
+            "assets": self.export_assets,
+        }
+        results = {}
+        for table in tables or list(exports):
+            if full:
+                self._reset(table)
+            results[table] = exports[table]()
+            logger.info(f"📦 Exported {results[table]['rows']} {table} row(s) to {results[table]['files']} file(s).")
+        return results
@@ -0,0 +1,80 @@
+"""
+Compiled quiz answer keys for server-side grading.
+
+The key for an asset maps question id -> correct option index. It is compiled
+once per asset version from Asset.quiz_data and kept in a small in-process
+map plus the shared cache, so grading a submission never loads quiz_data.
+Clients only ever receive questions stripped by public_questions().
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from sqlmodel import Session
+from app.core.cache import cache_store
+from app.models.models import Asset
+from app.services.resource_versions import asset_version
+
+ANSWER_KEY_TTL = 86400
+LOCAL_CAPACITY = 512  # Compiled keys kept in-process (LRU)
+
+# Question fields safe to send to clients
+PUBLIC_QUESTION_FIELDS = ("id", "question", "options")
+
+_local: "OrderedDict[Tuple[str, str], Dict[str, int]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def public_questions(quiz_data: Optional[List[dict]]) -> Optional[List[dict]]:
+    """Questions without answers (correct_index and anything else not whitelisted)."""
+    if quiz_data is None:
+        return None
+    return [{k: q[k] for k in PUBLIC_QUESTION_FIELDS if k in q} for q in quiz_data]
+
+
+def compile_answer_key(quiz_data: List[dict]) -> Dict[str, int]:
+    return {str(q["id"]): q["correct_index"] for q in quiz_data if "id" in q and "correct_index" in q}
+
+
+def get_answer_key(session: Session, asset_id: str) -> Optional[Dict[str, int]]:
+    """
+    Answer key for the asset's current version; None if the asset is missing,
+    inactive, archived or has no quiz. Only active versions get a key cached
+    (deactivating bumps updated_at, hence the version), so hits need no check.
+    """
+    version = asset_version(session, asset_id)
+    if version is None:
+        return None
+    local_key = (asset_id, version)
+    with _lock:
+        key = _local.get(local_key)
+        if key is not None:
+            _local.move_to_end(local_key)
+            return key
+
+    cache_key = f"answer_key:{asset_id}:{version}"
+    key = cache_store.get(cache_key)
+    if key is None:
+        asset = session.get(Asset, asset_id)
+        if not asset or not asset.is_active or asset.is_archived or not asset.quiz_data:
+            return None
+        key = compile_answer_key(asset.quiz_data)
+        cache_store.set(cache_key, key, expire=ANSWER_KEY_TTL)
+
+    with _lock:
+        _local[local_key] = key
+        if len(_local) > LOCAL_CAPACITY:
+            _local.popitem(last=False)
+    return key
+
+
+def grade(answer_key: Dict[str, int], answers: Dict[str, int]) -> Tuple[int, Dict[str, bool]]:
+    """Number of correct answers and per-question correctness (unanswered = wrong)."""
+    results = {qid: answers.get(qid) == correct for qid, correct in answer_key.items()}
+    return sum(results.values()), results
+
+
+def without_answers(asset: Asset) -> dict:
+    """Asset payload for learners: quiz questions without their answers."""
+    data = asset.model_dump(mode="json")
+    data["quiz_data"] = public_questions(asset.quiz_data)
+    return data
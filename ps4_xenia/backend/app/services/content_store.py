@@ -0,0 +1,245 @@
+"""
+Pluggable content store for uploaded asset files (video, PDF, SCORM packages).
+
+Stored content is addressed by a key of the form
+``{asset_id}/v{version}/{filename}``: every asset version gets its own
+immutable URL, so responses can be cached until the link expires. Assets whose content
+lives in the store have ``content_url = "store://{key}"``.
+
+Uploaded bytes are stored once, content-addressed by SHA-256 under
+``blobs/``; each version key is a hard link to its blob, so identical files
+across versions (or assets) share storage and a blob whose link count drops
+to one is unreferenced.
+
+Resumable uploads append to a partial file per upload under ``uploads/``
+that becomes a blob once complete.
+
+Downloads go through short-lived HMAC-signed links (key + expiry), verified
+without touching the database. Expiries are rounded up to a multiple of
+CONTENT_URL_TTL_SECONDS, so every signing within one window yields the same
+URL and clients can reuse their cached copy until it expires.
+"""
+import hashlib
+import hmac
+import math
+import os
+import re
+import shutil
+import time
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Optional
+from uuid import uuid4
+from urllib.parse import urlencode
+from app.core.config import settings
+
+STORE_SCHEME = "store://"
+CONTENT_ROUTE = "/api/v1/content"
+
+
+class ContentStore(ABC):
+    """Backend interface. Backends that can serve bytes locally return a filesystem path."""
+
+    @abstractmethod
+    def local_path(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def save(self, key: str, source: BinaryIO) -> int:
+        """Store the stream under key; returns the number of bytes written."""
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+    # Content-addressed blobs
+
+    @abstractmethod
+    def open_temp(self) -> BinaryIO:
+        """Writable scratch file inside the store (same filesystem as the blobs)."""
+
+    @abstractmethod
+    def commit_blob(self, temp_name: str, digest: str) -> bool:
+        """Move a finished temp file into place as blob `digest`; False if it already existed (dedup)."""
+
+    @abstractmethod
+    def link(self, digest: str, key: str):
+        """Make `key` refer to blob `digest`."""
+
+    @abstractmethod
+    def sweep_temp(self, older_than_seconds: int) -> int:
+        """Delete scratch files abandoned by crashed uploads; returns how many were removed."""
+
+    # Resumable uploads: one partial file per upload, appended to chunk by chunk
+
+    @abstractmethod
+    def partial_name(self, upload_id: str) -> str:
+        """Path of the partial file; usable with commit_blob() once complete."""
+
+    @abstractmethod
+    def partial_size(self, upload_id: str) -> int:
+        ...
+
+    @abstractmethod
+    def open_partial(self, upload_id: str, offset: int) -> BinaryIO:
+        """Writable partial file positioned at `offset`; bytes past it (an unacknowledged chunk) are dropped."""
+
+    @abstractmethod
+    def delete_partial(self, upload_id: str):
+        ...
+
+
+class LocalContentStore(ContentStore):
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def _resolve(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid content key: {key}")
+        return path
+
+    def local_path(self, key: str) -> Optional[str]:
+        path = self._resolve(key)
+        return path if os.path.isfile(path) else None
+
+    def exists(self, key: str) -> bool:
+        return self.local_path(key) is not None
+
+    def save(self, key: str, source: BinaryIO) -> int:
+        path = self._resolve(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.part"
+        with open(tmp_path, "wb") as target:
+            shutil.copyfileobj(source, target, length=1024 * 1024)
+        os.replace(tmp_path, path)
+        return os.path.getsize(path)
+
+    def delete(self, key: str):
+        path = self.local_path(key)
+        if path:
+            os.remove(path)
+
+    def open_temp(self) -> BinaryIO:
+        tmp_dir = os.path.join(self.root, "tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        return open(os.path.join(tmp_dir, uuid4().hex), "wb")
+
+    def commit_blob(self, temp_name: str, digest: str) -> bool:
+        path = self._resolve(blob_key(digest))
+        if os.path.exists(path):
+            os.remove(temp_name)
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(temp_name, path)
+        return True
+
+    def link(self, digest: str, key: str):
+        path = self._resolve(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            os.remove(path)
+        os.link(self._resolve(blob_key(digest)), path)
+
+    def sweep_temp(self, older_than_seconds: int) -> int:
+        tmp_dir = os.path.join(self.root, "tmp")
+        if not os.path.isdir(tmp_dir):
+            return 0
+        cutoff = time.time() - older_than_seconds
+        removed = 0
+        for entry in os.scandir(tmp_dir):
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        return removed
+
+    def partial_name(self, upload_id: str) -> str:
+        return self._resolve(f"uploads/{upload_id}")
+
+    def partial_size(self, upload_id: str) -> int:
+        path = self.partial_name(upload_id)
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+    def open_partial(self, upload_id: str, offset: int) -> BinaryIO:
+        path = self.partial_name(upload_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handle = open(path, "r+b" if os.path.exists(path) else "wb")
+        handle.truncate(offset)
+        handle.seek(offset)
+        return handle
+
+    def delete_partial(self, upload_id: str):
+        path = self.partial_name(upload_id)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+BACKENDS = {
+    "local": lambda: LocalContentStore(settings.CONTENT_STORE_ROOT),
+}
+
+
+def _create_store() -> ContentStore:
+    try:
+        return BACKENDS[settings.CONTENT_STORE_BACKEND]()
+    except KeyError:
+        raise RuntimeError(f"Unknown CONTENT_STORE_BACKEND '{settings.CONTENT_STORE_BACKEND}'")
+
+
+# --- Keys ---
+
+def blob_key(digest: str) -> str:
+    return f"blobs/{digest[:2]}/{digest}"
+
+
+def safe_filename(filename: str) -> str:
+    """URL- and filesystem-safe version of a client-supplied filename."""
+    name = re.sub(r"[^A-Za-z0-9._-]", "_", os.path.basename(filename or "")).lstrip(".")
+    return name or "content"
+
+
+def content_key(asset_id: str, version: int, filename: str) -> str:
+    return f"{asset_id}/v{version}/{safe_filename(filename)}"
+
+
+def stored_key(content_url: Optional[str]) -> Optional[str]:
+    """Store key for a ``store://`` content URL; None for external URLs."""
+    if content_url and content_url.startswith(STORE_SCHEME):
+        return content_url[len(STORE_SCHEME):]
+    return None
+
+
+# --- Signed links ---
+
+def _signing_key() -> bytes:
+    return (settings.CONTENT_SIGNING_KEY or settings.SECRET_KEY).encode()
+
+
+def _signature(key: str, expires: int) -> str:
+    return hmac.new(_signing_key(), f"{key}:{expires}".encode(), hashlib.sha256).hexdigest()
+
+
+def link_expiry(ttl: Optional[int] = None) -> int:
+    """Expiry for links signed now: at least ttl away, rounded up to a multiple of ttl."""
+    ttl = ttl or settings.CONTENT_URL_TTL_SECONDS
+    return math.ceil((time.time() + ttl) / ttl) * ttl
+
+
+def signed_url(key: str, ttl: Optional[int] = None) -> str:
+    """Absolute link (the frontend is served from another origin)."""
+    expires = link_expiry(ttl)
+    query = urlencode({"expires": expires, "sig": _signature(key, expires)})
+    return f"{settings.CONTENT_BASE_URL.rstrip('/')}{CONTENT_ROUTE}/{key}?{query}"
+
+
+def verify_signature(key: str, expires: int, sig: str) -> bool:
+    if expires < time.time():
+        return False
+    return hmac.compare_digest(_signature(key, expires), sig)
+
+
+# Global store instance
+content_store = _create_store()
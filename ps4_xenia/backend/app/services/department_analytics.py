@@ -0,0 +1,215 @@
+"""
+Department-level learning analytics.
+
+DailyLearningRollup keeps one row of totals per (user, day), maintained by the
+"rollups" event consumer with one additive bulk upsert per batch. Department
+views are grouped SQL over the rollup (or SkillMastery) joined to
+User.department, never a loop over users. Results are cached per department
+under department_version(), which the rollup and mastery consumers bump for
+every department they touch, at most once per
+DEPARTMENT_VERSION_MIN_INTERVAL_SECONDS so steady traffic doesn't defeat the
+cache (views lag by up to that interval).
+"""
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import case, distinct, func
+from sqlmodel import Session, select
+from app.core.database import dialect_insert
+from app.models.models import Asset, DailyLearningRollup, InteractionStatus, SkillMastery, User, UserInteraction
+from app.services.resource_versions import bump_department_version
+
+RollupKey = Tuple[str, date]
+
+# Mastery histogram buckets (lower bounds), aligned with the 50/80 mastery thresholds
+MASTERY_BUCKETS = [(0, "0-24"), (25, "25-49"), (50, "50-79"), (80, "80-100")]
+
+
+# --- Rollup maintenance ---
+
+def rollup_deltas(events) -> Dict[RollupKey, dict]:
+    """Fold InteractionRecorded events into one delta per (user, day)."""
+    deltas: Dict[RollupKey, dict] = {}
+    for event in events:
+        day = (event.timestamp or event.occurred_at).date()
+        delta = deltas.get((event.user_id, day))
+        if delta is None:
+            delta = deltas[(event.user_id, day)] = {
+                "interactions": 0, "completed": 0, "score_sum": 0.0, "score_count": 0,
+                "seconds": 0, "estimated_seconds": 0,
+            }
+        completed = event.status == InteractionStatus.COMPLETED
+        delta["interactions"] += 1
+        delta["seconds"] += event.time_spent_seconds or 0
+        if completed:
+            delta["completed"] += 1
+            delta["estimated_seconds"] += event.estimated_seconds
+            if event.score is not None:
+                delta["score_sum"] += event.score
+                delta["score_count"] += 1
+    return deltas
+
+
+def apply_rollup_deltas(session: Session, deltas: Dict[RollupKey, dict]):
+    """One additive upsert for the whole batch. Does not commit."""
+    if not deltas:
+        return
+    insert = dialect_insert(session)
+    statement = insert(DailyLearningRollup.__table__)
+    table = DailyLearningRollup.__table__
+    counters = ["interactions", "completed", "score_sum", "score_count", "seconds", "estimated_seconds"]
+    session.execute(
+        statement.on_conflict_do_update(
+            index_elements=["user_id", "day"],
+            set_={name: table.c[name] + statement.excluded[name] for name in counters},
+        ),
+        [{"user_id": user_id, "day": day, **delta} for (user_id, day), delta in deltas.items()],
+    )
+
+
+def invalidate_departments_of(session: Session, user_ids: Iterable[str]) -> Set[str]:
+    """Bump (throttled) the analytics version of every department these users belong to."""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return set()
+    departments = {
+        department for department in session.exec(
+            select(distinct(User.department)).where(User.id.in_(user_ids))
+        ).all() if department
+    }
+    for department in departments:
+        bump_department_version(department, throttle=True)
+    return departments
+
+
+def rebuild_rollups(session: Session) -> int:
+    """Recompute every rollup row from UserInteraction (backfill / repair). Does not commit."""
+    day = func.date(UserInteraction.timestamp)
+    completed = UserInteraction.status == InteractionStatus.COMPLETED
+    rows = session.exec(
+        select(
+            UserInteraction.user_id,
+            day,
+            func.count(UserInteraction.id),
+            func.sum(case((completed, 1), else_=0)),
+            func.sum(case((completed & UserInteraction.score.is_not(None), UserInteraction.score), else_=0.0)),
+            func.sum(case((completed & UserInteraction.score.is_not(None), 1), else_=0)),
+            func.sum(func.coalesce(UserInteraction.time_spent_seconds, 0)),
+            func.sum(case((completed, func.coalesce(Asset.estimated_duration_minutes, 0) * 60), else_=0)),
+        )
+        .outerjoin(Asset, Asset.id == UserInteraction.asset_id)
+        .group_by(UserInteraction.user_id, day)
+    ).all()
+    session.execute(DailyLearningRollup.__table__.delete())
+    if rows:
+        session.execute(DailyLearningRollup.__table__.insert(), [
+            {
+                "user_id": user_id,
+                "day": day_value if isinstance(day_value, date) else date.fromisoformat(day_value),
+                "interactions": interactions,
+                "completed": completed_count or 0,
+                "score_sum": score_sum or 0.0,
+                "score_count": score_count or 0,
+                "seconds": seconds or 0,
+                "estimated_seconds": estimated or 0,
+            }
+            for user_id, day_value, interactions, completed_count, score_sum, score_count, seconds, estimated in rows
+        ])
+    return len(rows)
+
+
+# --- Department views ---
+
+def _window(days: int) -> date:
+    return datetime.utcnow().date() - timedelta(days=days - 1)
+
+
+def department_overview(session: Session, department: str, days: int) -> Optional[dict]:
+    headcount = session.exec(select(func.count(User.id)).where(User.department == department)).one()
+    if not headcount:
+        return None
+    rollup = DailyLearningRollup
+    active, interactions, completed, score_sum, score_count, seconds, estimated = session.exec(
+        select(
+            func.count(distinct(rollup.user_id)),
+            func.sum(rollup.interactions),
+            func.sum(rollup.completed),
+            func.sum(rollup.score_sum),
+            func.sum(rollup.score_count),
+            func.sum(rollup.seconds),
+            func.sum(rollup.estimated_seconds),
+        )
+        .join(User, User.id == rollup.user_id)
+        .where(User.department == department)
+        .where(rollup.day >= _window(days))
+    ).one()
+    interactions, completed, seconds = interactions or 0, completed or 0, seconds or 0
+    weeks = days / 7
+    return {
+        "department": department,
+        "window_days": days,
+        "headcount": headcount,
+        "active_learners": active,
+        "participation_rate": round(active / headcount, 3),
+        "interactions": interactions,
+        "modules_completed": completed,
+        "completion_rate": round(completed / interactions, 3) if interactions else 0.0,
+        "average_score": round(score_sum / score_count, 1) if score_count else None,
+        "total_learning_hours": round(seconds / 3600, 1),
+        "hours_per_learner_per_week": round(seconds / 3600 / headcount / weeks, 2),
+        # >1.0: completed modules took less time than estimated
+        "efficiency": round(estimated / seconds, 2) if seconds and estimated else None,
+    }
+
+
+def department_weekly_hours(session: Session, department: str, weeks: int) -> List[dict]:
+    """Learning hours and completions per ISO week (Monday start), oldest first, empty weeks included."""
+    today = datetime.utcnow().date()
+    first_week = today - timedelta(days=today.weekday(), weeks=weeks - 1)
+    rollup = DailyLearningRollup
+    rows = session.exec(
+        select(rollup.day, func.sum(rollup.seconds), func.sum(rollup.completed))
+        .join(User, User.id == rollup.user_id)
+        .where(User.department == department)
+        .where(rollup.day >= first_week)
+        .where(rollup.day <= today)  # Future-dated (clock-skewed) activity has no week bucket
+        .group_by(rollup.day)
+    ).all()
+    totals = {first_week + timedelta(weeks=i): [0, 0] for i in range(weeks)}
+    for day, seconds, completed in rows:
+        day = day if isinstance(day, date) else date.fromisoformat(day)
+        week = totals[day - timedelta(days=day.weekday())]
+        week[0] += seconds or 0
+        week[1] += completed or 0
+    return [
+        {"week_start": week.isoformat(), "hours": round(seconds / 3600, 1), "modules_completed": completed}
+        for week, (seconds, completed) in sorted(totals.items())
+    ]
+
+
+def department_mastery_distribution(session: Session, department: str) -> List[dict]:
+    """Per skill: learners, average proficiency and a histogram over MASTERY_BUCKETS."""
+    bucket = case(
+        *[(SkillMastery.proficiency >= lower, label) for lower, label in reversed(MASTERY_BUCKETS[1:])],
+        else_=MASTERY_BUCKETS[0][1],
+    )
+    rows = session.exec(
+        select(SkillMastery.skill_name, bucket, func.count(SkillMastery.id), func.sum(SkillMastery.proficiency))
+        .join(User, User.id == SkillMastery.user_id)
+        .where(User.department == department)
+        .group_by(SkillMastery.skill_name, bucket)
+    ).all()
+    skills: Dict[str, dict] = {}
+    for skill, label, count, proficiency_sum in rows:
+        entry = skills.setdefault(skill, {
+            "skill": skill, "learners": 0, "proficiency_sum": 0.0,
+            "buckets": {label: 0 for _, label in MASTERY_BUCKETS},
+        })
+        entry["learners"] += count
+        entry["proficiency_sum"] += proficiency_sum or 0.0
+        entry["buckets"][label] += count
+    result = []
+    for entry in sorted(skills.values(), key=lambda e: -e["learners"]):
+        proficiency_sum = entry.pop("proficiency_sum")
+        entry["average_proficiency"] = round(proficiency_sum / entry["learners"], 1)
+        result.append(entry)
+    return result
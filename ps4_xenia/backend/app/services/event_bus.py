@@ -0,0 +1,434 @@
+"""
+Typed event bus for learning events.
+
+Request handlers publish events after their transaction commits; subscribers
+consume them in batches off the request path. Two backends:
+
+- memory: per-subscriber asyncio queues on the worker's loop (single node).
+- redis: one Redis Stream per event type and one consumer group per
+  subscriber, so each event is handled once per subscriber across all nodes
+  and unacknowledged events are redelivered after a crash (entries left
+  pending by a dead consumer are claimed after EVENT_BUS_CLAIM_IDLE_MS).
+
+A failed batch is retried, then its events are retried one at a time so a
+single poison event can't hold back the others. An event that fails
+EVENT_BUS_MAX_DELIVERIES times is dead-lettered: moved to the
+``events:dead:{subscriber}`` stream (redis), or logged with its payload and
+kept in EventBus.dead_letters (memory), counted in
+event_bus_dead_lettered_total.
+
+Subscribers are plain functions taking a list of events; sync functions run in
+a thread (they usually open a DB session), coroutines run on the loop.
+"""
+import asyncio
+import inspect
+import json
+import logging
+import os
+import socket
+from collections import deque
+from datetime import datetime
+from typing import Callable, ClassVar, Dict, List, Optional, Sequence, Type
+from uuid import uuid4
+from pydantic import BaseModel, Field
+from app.core.config import settings
+from app.core.database import redis_client
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+STREAM_PREFIX = "events:"
+DEAD_LETTER_PREFIX = "events:dead:"
+RETRY_BACKOFF_SECONDS = 1.0
+MAX_RETRY_BACKOFF_SECONDS = 30.0
+DEAD_LETTERS_KEPT = 1000  # Memory backend: most recent dead letters kept for inspection
+
+
+# --- Events ---
+
+class Event(BaseModel):
+    event_type: ClassVar[str] = "event"
+    event_id: str = Field(default_factory=lambda: uuid4().hex)
+    occurred_at: datetime = Field(default_factory=datetime.utcnow)
+
+    @property
+    def dedup_key(self) -> str:
+        """Identifies the event across redeliveries (consumers claim events by it)."""
+        return self.event_id
+
+
+class InteractionRecorded(Event):
+    event_type: ClassVar[str] = "interaction_recorded"
+    interaction_id: str
+    user_id: str
+    asset_id: str
+    status: str
+    score: Optional[float] = None
+    time_spent_seconds: int = 0
+    skill_tag: Optional[str] = None
+    difficulty_level: int = 1
+    estimated_seconds: int = 0  # Asset's estimated duration
+    timestamp: Optional[datetime] = None  # When the interaction happened (replays may be old)
+    ingested_at: Optional[datetime] = None  # When the server stored it
+
+    @property
+    def dedup_key(self) -> str:
+        # One interaction is one event, however often it is published
+        return f"interaction:{self.interaction_id}"
+
+
+class ProfileSkillsChanged(Event):
+    event_type: ClassVar[str] = "profile_skills_changed"
+    user_id: str
+    current_skills: List[str] = []
+    target_skills: List[str] = []
+
+
+class AssetPublished(Event):
+    event_type: ClassVar[str] = "asset_published"
+    asset_id: str
+    skill_tag: Optional[str] = None
+    version: int = 1
+
+
+class CatalogChanged(Event):
+    """One event for a bulk admin operation touching many assets."""
+    event_type: ClassVar[str] = "catalog_changed"
+    action: str  # created, updated, archived
+    asset_ids: List[str] = []
+
+
+class MasteryThresholdCrossed(Event):
+    event_type: ClassVar[str] = "mastery_threshold_crossed"
+    user_id: str
+    skill_name: str
+    threshold: int
+    proficiency: float
+
+
+EVENT_TYPES: Dict[str, Type[Event]] = {
+    cls.event_type: cls
+    for cls in (InteractionRecorded, ProfileSkillsChanged, AssetPublished, CatalogChanged, MasteryThresholdCrossed)
+}
+
+Handler = Callable[[List[Event]], object]
+
+
+class Subscriber:
+    def __init__(self, name: str, event_types: Sequence[Type[Event]], handler: Handler, batch_size: int):
+        self.name = name
+        self.event_types = [cls.event_type for cls in event_types]
+        self.handler = handler
+        self.batch_size = batch_size
+        self.queue: Optional[asyncio.Queue] = None
+
+    async def handle(self, events: List[Event]):
+        if inspect.iscoroutinefunction(self.handler):
+            await self.handler(events)
+        else:
+            await asyncio.to_thread(self.handler, events)
+        metrics.inc("event_bus_events_handled_total", len(events), subscriber=self.name)
+
+
+class EventBus:
+    def __init__(self):
+        self._subscribers: List[Subscriber] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: List[asyncio.Task] = []
+        self._redis = None  # redis.asyncio client when the streams backend is active
+        self._consumer_name = f"{socket.gethostname()}-{os.getpid()}"
+        # Events given up on by the memory backend, for inspection
+        self.dead_letters: deque = deque(maxlen=DEAD_LETTERS_KEPT)
+
+    @property
+    def backend(self) -> str:
+        return "redis" if self._redis is not None else "memory"
+
+    def subscribe(self, name: str, event_types: Sequence[Type[Event]], handler: Handler, batch_size: Optional[int] = None):
+        """Register a batched consumer. Must be called before start()."""
+        self._subscribers.append(Subscriber(name, event_types, handler, batch_size or settings.EVENT_BUS_BATCH_SIZE))
+
+    # --- Lifecycle ---
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        if settings.EVENT_BUS_BACKEND in ("auto", "redis") and redis_client is not None:
+            try:
+                import redis.asyncio as aioredis
+                self._redis = aioredis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+                await self._redis.ping()
+                for subscriber in self._subscribers:
+                    await self._ensure_groups(subscriber)
+                    self._tasks.append(asyncio.create_task(self._consume_stream(subscriber)))
+                logger.info(f"✅ Event bus using Redis Streams ({len(self._subscribers)} consumer groups).")
+                return
+            except Exception as e:
+                logger.warning(f"⚠️ Redis Streams not available ({e}). Event bus running in-process.")
+                self._redis = None
+
+        for subscriber in self._subscribers:
+            subscriber.queue = asyncio.Queue()
+            self._tasks.append(asyncio.create_task(self._consume_queue(subscriber)))
+
+    async def stop(self):
+        # Drain what is already queued in-process so shutdown doesn't lose events
+        for subscriber in self._subscribers:
+            if subscriber.queue is not None and not subscriber.queue.empty():
+                await subscriber.handle(self._drain(subscriber.queue, subscriber.queue.qsize()))
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+        self._loop = None
+
+    # --- Publishing ---
+
+    def publish(self, event: Event):
+        self.publish_many([event])
+
+    def publish_many(self, events: Sequence[Event]):
+        """
+        Publish events to every subscriber of their type. Safe to call from
+        sync handlers in the threadpool, from the loop, and from scripts
+        (no loop: handlers run inline).
+        """
+        if not events:
+            return
+        for event in events:
+            metrics.inc("event_bus_events_published_total", event_type=event.event_type)
+
+        if self._redis is not None or (self._loop is None and settings.EVENT_BUS_BACKEND != "memory" and redis_client):
+            try:
+                pipe = redis_client.pipeline(transaction=False)
+                for event in events:
+                    pipe.xadd(
+                        f"{STREAM_PREFIX}{event.event_type}",
+                        {"type": event.event_type, "data": event.model_dump_json()},
+                        maxlen=settings.EVENT_STREAM_MAXLEN,
+                        approximate=True,
+                    )
+                pipe.execute()
+                return
+            except Exception as e:
+                logger.warning(f"⚠️ Event publish to Redis failed ({e}). Delivering in-process.")
+
+        if self._loop is None or self._loop.is_closed():
+            self._dispatch_inline(events)
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._enqueue(events)
+        else:
+            self._loop.call_soon_threadsafe(self._enqueue, list(events))
+
+    def _enqueue(self, events: Sequence[Event]):
+        for subscriber in self._subscribers:
+            if subscriber.queue is None:
+                continue
+            for event in events:
+                if event.event_type in subscriber.event_types:
+                    subscriber.queue.put_nowait(event)
+
+    def _dispatch_inline(self, events: Sequence[Event]):
+        for subscriber in self._subscribers:
+            batch = [e for e in events if e.event_type in subscriber.event_types]
+            if not batch:
+                continue
+            if inspect.iscoroutinefunction(subscriber.handler):
+                asyncio.run(subscriber.handler(batch))
+            else:
+                subscriber.handler(batch)
+
+    # --- In-memory consumer ---
+
+    @staticmethod
+    def _drain(queue: asyncio.Queue, limit: int) -> List[Event]:
+        batch = []
+        while len(batch) < limit and not queue.empty():
+            batch.append(queue.get_nowait())
+        return batch
+
+    async def _consume_queue(self, subscriber: Subscriber):
+        max_wait = settings.EVENT_BUS_MAX_WAIT_MS / 1000.0
+        while True:
+            batch = [await subscriber.queue.get()]
+            # Give the batch a short window to fill up
+            if subscriber.queue.qsize() < subscriber.batch_size - 1:
+                await asyncio.sleep(max_wait)
+            batch.extend(self._drain(subscriber.queue, subscriber.batch_size - 1))
+            await self._handle_with_retry(subscriber, batch)
+
+    async def _try_handle(self, subscriber: Subscriber, events: List[Event]) -> Optional[Exception]:
+        try:
+            await subscriber.handle(events)
+            return None
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            metrics.inc("event_bus_handler_errors_total", subscriber=subscriber.name)
+            logger.error(f"❌ Event subscriber '{subscriber.name}' failed on {len(events)} event(s): {e}")
+            return e
+
+    async def _handle_with_retry(self, subscriber: Subscriber, batch: List[Event]):
+        """
+        Retry the batch with exponential backoff (transient errors such as a
+        database restart), then each event on its own; dead-letter what still fails.
+        """
+        attempts = settings.EVENT_BUS_MAX_DELIVERIES
+        for attempt in range(attempts):
+            if attempt:
+                await asyncio.sleep(min(RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1), MAX_RETRY_BACKOFF_SECONDS))
+            error = await self._try_handle(subscriber, batch)
+            if error is None:
+                return
+        if len(batch) > 1:
+            for event in batch:
+                error = await self._try_handle(subscriber, [event])
+                if error is not None:
+                    self._dead_letter_in_memory(subscriber, event, error)
+        else:
+            self._dead_letter_in_memory(subscriber, batch[0], error)
+
+    def _dead_letter_in_memory(self, subscriber: Subscriber, event: Event, error: Exception):
+        metrics.inc("event_bus_dead_lettered_total", subscriber=subscriber.name)
+        self.dead_letters.append((subscriber.name, event, str(error)))
+        logger.error(
+            f"❌ Dead-lettered {event.event_type} for '{subscriber.name}' after "
+            f"{settings.EVENT_BUS_MAX_DELIVERIES} attempt(s): {event.model_dump_json()}"
+        )
+
+    # --- Redis Streams consumer ---
+
+    async def _ensure_groups(self, subscriber: Subscriber):
+        for event_type in subscriber.event_types:
+            try:
+                await self._redis.xgroup_create(f"{STREAM_PREFIX}{event_type}", subscriber.name, id="0", mkstream=True)
+            except Exception as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+
+    @staticmethod
+    def _decode(entries) -> List[tuple]:
+        """(stream, message_id, fields, event); event is None if the entry can't be decoded."""
+        decoded = []
+        for stream, messages in entries or []:
+            for message_id, fields in messages:
+                event_cls = EVENT_TYPES.get(fields.get("type"))
+                try:
+                    event = event_cls(**json.loads(fields["data"])) if event_cls else None
+                except Exception as e:
+                    logger.error(f"❌ Undecodable event {message_id} on {stream}: {e}")
+                    event = None
+                decoded.append((stream, message_id, fields, event))
+        return decoded
+
+    async def _dead_letter(self, subscriber: Subscriber, stream: str, message_id: str, fields: dict, reason: str):
+        """Copy the entry to the subscriber's dead-letter stream and acknowledge it."""
+        await self._redis.xadd(
+            f"{DEAD_LETTER_PREFIX}{subscriber.name}",
+            {**fields, "stream": stream, "message_id": message_id, "reason": reason[:500]},
+            maxlen=settings.EVENT_STREAM_MAXLEN,
+            approximate=True,
+        )
+        await self._redis.xack(stream, subscriber.name, message_id)
+        metrics.inc("event_bus_dead_lettered_total", subscriber=subscriber.name)
+        logger.error(f"❌ Dead-lettered {message_id} from {stream} for '{subscriber.name}': {reason}")
+
+    async def _claim_orphans(self, subscriber: Subscriber, streams: List[str]):
+        """Take over entries left pending by consumers that died (a restarted worker has a new name)."""
+        for stream in streams:
+            try:
+                await self._redis.xautoclaim(
+                    stream, subscriber.name, self._consumer_name,
+                    min_idle_time=settings.EVENT_BUS_CLAIM_IDLE_MS, start_id="0-0", count=subscriber.batch_size,
+                )
+            except Exception as e:  # XAUTOCLAIM needs Redis >= 6.2
+                logger.debug(f"XAUTOCLAIM on {stream} skipped: {e}")
+
+    async def _delivery_counts(self, subscriber: Subscriber, stream: str, ids: List[str]) -> Dict[str, int]:
+        pending = await self._redis.xpending_range(
+            stream, subscriber.name, min=min(ids, key=_stream_id), max=max(ids, key=_stream_id),
+            count=len(ids), consumername=self._consumer_name,
+        )
+        return {entry["message_id"]: entry["times_delivered"] for entry in pending}
+
+    async def _replay_pending(self, subscriber: Subscriber, decoded: List[tuple]) -> bool:
+        """
+        Handle entries that were delivered before and not acknowledged, one at
+        a time, dead-lettering those delivered EVENT_BUS_MAX_DELIVERIES times.
+        Returns False if any entry failed again (it stays pending).
+        """
+        counts: Dict[str, int] = {}
+        for stream in {entry[0] for entry in decoded}:
+            counts.update(await self._delivery_counts(
+                subscriber, stream, [message_id for s, message_id, _, _ in decoded if s == stream]
+            ))
+        all_handled = True
+        for stream, message_id, fields, event in decoded:
+            if event is None:
+                await self._dead_letter(subscriber, stream, message_id, fields, "undecodable")
+                continue
+            error = await self._try_handle(subscriber, [event])
+            if error is None:
+                await self._redis.xack(stream, subscriber.name, message_id)
+            elif counts.get(message_id, 0) >= settings.EVENT_BUS_MAX_DELIVERIES:
+                await self._dead_letter(subscriber, stream, message_id, fields, str(error))
+            else:
+                all_handled = False
+        return all_handled
+
+    async def _consume_stream(self, subscriber: Subscriber):
+        streams = [f"{STREAM_PREFIX}{t}" for t in subscriber.event_types]
+        # First replay this consumer's own unacknowledged entries (crash recovery), then new ones
+        cursor = "0"
+        while True:
+            try:
+                if cursor == "0":
+                    await self._claim_orphans(subscriber, streams)
+                entries = await self._redis.xreadgroup(
+                    subscriber.name, self._consumer_name,
+                    {stream: cursor for stream in streams},
+                    count=subscriber.batch_size,
+                    block=None if cursor == "0" else settings.EVENT_BUS_MAX_WAIT_MS,
+                )
+                decoded = self._decode(entries)
+                if cursor == "0":
+                    if not decoded:
+                        cursor = ">"
+                    elif not await self._replay_pending(subscriber, decoded):
+                        await asyncio.sleep(RETRY_BACKOFF_SECONDS)
+                    continue
+                if not decoded:
+                    continue
+                events = [event for _, _, _, event in decoded if event is not None]
+                if events:
+                    await subscriber.handle(events)
+                for stream in streams:
+                    ids = [message_id for s, message_id, _, event in decoded if s == stream and event is not None]
+                    if ids:
+                        await self._redis.xack(stream, subscriber.name, *ids)
+                for stream, message_id, fields, event in decoded:
+                    if event is None:
+                        await self._dead_letter(subscriber, stream, message_id, fields, "undecodable")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Unacked entries stay pending and are replayed one by one from cursor "0"
+                metrics.inc("event_bus_handler_errors_total", subscriber=subscriber.name)
+                logger.error(f"❌ Event subscriber '{subscriber.name}' failed: {e}. Retrying...")
+                cursor = "0"
+                await asyncio.sleep(RETRY_BACKOFF_SECONDS)
+
+
+def _stream_id(message_id: str) -> tuple:
+    milliseconds, _, sequence = message_id.partition("-")
+    return int(milliseconds), int(sequence or 0)
+
+
+# Global bus instance (one per worker)
+event_bus = EventBus()
@@ -0,0 +1,139 @@
+"""
+Batched event-bus consumers for learning side effects.
+Each consumer opens its own session, handles a whole batch and commits once.
+Consumers applying additive deltas claim their events in that transaction
+(see processed_events), so a redelivered batch is not applied twice. Cache
+invalidation and follow-up events run after the commit and never fail the
+batch: a retry would skip the claimed events anyway.
+"""
+import logging
+from collections import defaultdict
+from typing import Callable, Dict, List, Set
+from sqlmodel import Session, select
+from app.core.database import engine
+from app.core.metrics import metrics
+from app.models.models import InteractionStatus, User
+from app.services.event_bus import (
+    AssetPublished, CatalogChanged, EventBus, InteractionRecorded, MasteryThresholdCrossed, ProfileSkillsChanged, event_bus
+)
+from app.services.department_analytics import apply_rollup_deltas, invalidate_departments_of, rollup_deltas
+from app.services.leaderboards import leaderboards
+from app.services.learning_paths import replan_after
+from app.services.learner_activity import apply_activity_days
+from app.services.mastery import apply_mastery_increments, fold_increments
+from app.services.notifications import add_notification, publish_notifications
+from app.services.processed_events import claim_events
+from app.services.resource_versions import bump_skill_gap_version, bump_state_version, invalidate_catalog
+
+logger = logging.getLogger(__name__)
+
+
+def _after_commit(consumer: str, effect: Callable[[], None]):
+    """Run post-commit work; a failure is logged and counted, not raised."""
+    try:
+        effect()
+    except Exception as e:
+        metrics.inc("event_consumer_after_commit_errors_total", subscriber=consumer)
+        logger.error(f"❌ Post-commit work of '{consumer}' failed: {e}")
+
+
+def update_mastery(events: List[InteractionRecorded]):
+    """Fold the batch into one mastery upsert per (user, skill); announce threshold crossings."""
+    if not fold_increments(events):
+        return
+    with Session(engine) as session:
+        increments = fold_increments(claim_events(session, "mastery", events))
+        crossings = apply_mastery_increments(session, increments) if increments else []
+        session.commit()
+        user_ids = {user_id for user_id, _ in increments}
+
+        def announce():
+            invalidate_departments_of(session, user_ids)
+            for user_id in user_ids:
+                bump_state_version(user_id)
+            bump_skill_gap_version()
+            event_bus.publish_many(crossings)
+
+        if increments:
+            _after_commit("mastery", announce)
+
+
+def update_rollups(events: List[InteractionRecorded]):
+    """One additive upsert of per-(user, day) totals, plus the same days in the activity bitmaps."""
+    with Session(engine) as session:
+        deltas = rollup_deltas(claim_events(session, "rollups", events))
+        apply_rollup_deltas(session, deltas)
+        apply_activity_days(session, deltas.keys())
+        session.commit()
+        _after_commit("rollups", lambda: invalidate_departments_of(session, {user_id for user_id, _ in deltas}))
+
+
+def update_leaderboards(events: List[InteractionRecorded]):
+    """
+    One pipeline of sorted-set increments per batch (org and department boards).
+    The boards are outside the transaction: they are written before the claims
+    commit, so a failed write leaves the events to the retry (only a crash
+    between the two can count a batch twice; reconcile_leaderboards.py repairs it).
+    """
+    with Session(engine) as session:
+        events = claim_events(session, "leaderboards", events)
+        if not events:
+            return
+        user_ids = {event.user_id for event in events}
+        departments = dict(session.exec(select(User.id, User.department).where(User.id.in_(user_ids))).all())
+        leaderboards.record(events, departments)
+        session.commit()
+
+
+def update_learning_paths(events: list):
+    """
+    Mark completed / fast-tracked steps in existing paths, one commit per batch.
+    Profile changes only need the staleness check: new targets re-plan the path.
+    """
+    completed: Dict[str, Set[str]] = defaultdict(set)
+    skills: Dict[str, Set[str]] = defaultdict(set)
+    user_ids = {event.user_id for event in events if isinstance(event, ProfileSkillsChanged)}
+    for event in events:
+        if isinstance(event, InteractionRecorded) and event.status == InteractionStatus.COMPLETED:
+            completed[event.user_id].add(event.asset_id)
+        elif isinstance(event, MasteryThresholdCrossed):
+            skills[event.user_id].add(event.skill_name)
+    user_ids.update(completed, skills)
+    with Session(engine) as session:
+        for user_id in sorted(user_ids):
+            replan_after(session, user_id, completed[user_id], skills[user_id])
+        session.commit()
+
+
+def notify_mastery(events: List[MasteryThresholdCrossed]):
+    """One notification per crossing, committed together; streams are pushed after the commit."""
+    with Session(engine) as session:
+        payloads = []
+        for event in claim_events(session, "notifications", events):
+            message = (
+                f"🏆 You've mastered {event.skill_name}!" if event.threshold >= 100
+                else f"🎯 You reached {event.threshold}% proficiency in {event.skill_name}."
+            )
+            payloads.append(add_notification(session, event.user_id, message, type="achievement"))
+        session.commit()
+    _after_commit("notifications", lambda: publish_notifications(payloads))
+
+
+def invalidate_recommendations(events: list):
+    """
+    Recommendations and skill views depend on profile skills and the catalog.
+    (Interaction history bumps the user's state version in the write path.)
+    """
+    for user_id in {e.user_id for e in events if isinstance(e, ProfileSkillsChanged)}:
+        bump_state_version(user_id)
+    if any(isinstance(e, (AssetPublished, CatalogChanged)) for e in events):
+        invalidate_catalog()
+
+
+def register_consumers(bus: EventBus):
+    bus.subscribe("mastery", [InteractionRecorded], update_mastery)
+    bus.subscribe("rollups", [InteractionRecorded], update_rollups)
+    bus.subscribe("leaderboards", [InteractionRecorded], update_leaderboards)
+    bus.subscribe("learning_paths", [InteractionRecorded, MasteryThresholdCrossed, ProfileSkillsChanged], update_learning_paths)
+    bus.subscribe("notifications", [MasteryThresholdCrossed], notify_mastery)
+    bus.subscribe("recommendations", [ProfileSkillsChanged, AssetPublished, CatalogChanged], invalidate_recommendations)
@@ -0,0 +1,540 @@
+"""
+In-memory columnar snapshot of UserInteraction for ad-hoc cohort analytics
+(optional `numpy` dependency).
+
+Questions like "average score by difficulty for new hires this quarter" are
+answered with vectorized filters and group-bys over NumPy arrays instead of
+one SQL query per cut:
+
+    snapshot = interaction_snapshot.get()
+    snapshot.query().where(joined_after=date(2026, 7, 1)).group_by("difficulty")
+
+One row per interaction: user index, asset index, score (0 when missing) and
+a scored flag, seconds, status code and day number (days since 1970-01-01),
+about 18 bytes per row (~180 MB for 10M interactions). User attributes
+(department, hire day) and asset attributes (difficulty, skill, content type)
+are small per-index dimension arrays; filters on them are evaluated per
+user/asset first and then gathered onto the rows.
+
+The snapshot is built on first use (or at startup with
+INTERACTION_SNAPSHOT_PRELOAD, since a first build over millions of rows takes
+minutes) and then refreshed incrementally in the background:
+interactions are append-only, so each refresh appends the rows past an
+(ingested_at, id) watermark and reloads the dimension arrays. The watermark
+is the server-assigned ingestion time, not the client-supplied timestamp, so
+backdated replays are appended too (rows are not in day order). Rows younger
+than SNAPSHOT_SAFETY_LAG are left for the next refresh so transactions still
+in flight are not skipped. Readers hold an immutable InteractionSnapshot; the
+store appends into spare capacity past the published length and swaps in a
+new snapshot, so queries never see a half-written refresh.
+"""
+import asyncio
+import logging
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+from sqlalchemy import and_, or_
+from sqlmodel import Session, select
+from app.core.config import settings
+from app.core.database import engine
+from app.core.metrics import metrics
+from app.models.models import Asset, InteractionStatus, User, UserInteraction
+
+try:
+    import numpy as np
+except ImportError:  # Optional dependency
+    np = None
+
+logger = logging.getLogger(__name__)
+
+LOAD_CHUNK_ROWS = 100000
+SNAPSHOT_SAFETY_LAG = timedelta(seconds=60)
+# Above this many (group, user) cells, distinct-learner counts sort instead of scattering into a bitmap
+DISTINCT_BITMAP_MAX_CELLS = 50_000_000
+
+STATUSES = list(InteractionStatus)
+STATUS_CODES = {status.value: code for code, status in enumerate(STATUSES)}
+OUTCOMES = 2 * len(STATUSES)  # (status, scored) combinations
+EPOCH = date(1970, 1, 1)
+EPOCH_ORDINAL = EPOCH.toordinal()
+
+# Dimensions accepted by CohortQuery.group_by
+GROUP_BY = ("difficulty", "skill", "content_type", "department", "status", "week", "month", "hire_month")
+
+Values = Union[None, str, int, Sequence]
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("Cohort analytics requires numpy (pip install numpy)")
+
+
+def _day_number(value: date) -> int:
+    return (value - EPOCH).days
+
+
+def _month_numbers(days: "np.ndarray") -> "np.ndarray":
+    """Day numbers -> months since 1970-01."""
+    return days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+
+
+def _month_label(month: int) -> str:
+    return f"{1970 + month // 12}-{month % 12 + 1:02d}"
+
+
+def _as_list(value: Values) -> Optional[list]:
+    if value is None:
+        return None
+    return list(value) if isinstance(value, (list, tuple, set)) else [value]
+
+
+class _Column:
+    """Append-only NumPy buffer with doubling capacity; published snapshots hold views of it."""
+
+    def __init__(self, dtype):
+        self.data = np.empty(1024, dtype=dtype)
+        self.size = 0
+
+    def extend(self, values: "np.ndarray"):
+        end = self.size + len(values)
+        if end > len(self.data):
+            # A new buffer: earlier views keep the old one, so readers are never affected
+            grown = np.empty(max(end, 2 * len(self.data)), dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size:end] = values
+        self.size = end
+
+    def view(self) -> "np.ndarray":
+        return self.data[:self.size]
+
+
+class _Vocabulary:
+    """Interns labels (departments, skills, content types) to dense integer codes."""
+
+    def __init__(self):
+        self.labels: List[Optional[str]] = []
+        self.codes: Dict[Optional[str], int] = {}
+
+    def code(self, label: Optional[str]) -> int:
+        code = self.codes.get(label)
+        if code is None:
+            code = self.codes[label] = len(self.labels)
+            self.labels.append(label)
+        return code
+
+
+class InteractionSnapshot:
+    """Immutable columnar view of the interactions plus their user and asset dimensions."""
+
+    def __init__(
+        self,
+        user_idx: "np.ndarray",
+        asset_idx: "np.ndarray",
+        score: "np.ndarray",
+        scored: "np.ndarray",
+        seconds: "np.ndarray",
+        status: "np.ndarray",
+        day: "np.ndarray",
+        user_department: "np.ndarray",
+        user_hire_day: "np.ndarray",
+        asset_difficulty: "np.ndarray",
+        asset_skill: "np.ndarray",
+        asset_content_type: "np.ndarray",
+        departments: List[Optional[str]],
+        skills: List[Optional[str]],
+        content_types: List[Optional[str]],
+        built_at: Optional[datetime] = None,
+        watermark: Optional[datetime] = None,
+    ):
+        _require_numpy()
+        self.user_idx, self.asset_idx = user_idx, asset_idx
+        self.score, self.scored = score, scored
+        self.seconds, self.status, self.day = seconds, status, day
+        self.user_department, self.user_hire_day = user_department, user_hire_day
+        self.asset_difficulty, self.asset_skill, self.asset_content_type = (
+            asset_difficulty, asset_skill, asset_content_type
+        )
+        self.departments, self.skills, self.content_types = departments, skills, content_types
+        self.built_at = built_at or datetime.utcnow()
+        self.watermark = watermark
+
+    @property
+    def rows(self) -> int:
+        return len(self.user_idx)
+
+    @property
+    def users(self) -> int:
+        return len(self.user_department)
+
+    def info(self) -> dict:
+        return {
+            "rows": self.rows,
+            "users": self.users,
+            "assets": len(self.asset_difficulty),
+            "built_at": self.built_at.isoformat(),
+            "watermark": self.watermark.isoformat() if self.watermark else None,
+        }
+
+    def query(self) -> "CohortQuery":
+        return CohortQuery(self)
+
+
+class CohortQuery:
+    """
+    Vectorized filter + group-by over a snapshot. Every filter accepts a single
+    value or a list (matching any of them); filters combine with AND.
+    """
+
+    def __init__(self, snapshot: InteractionSnapshot):
+        self.snapshot = snapshot
+        self.mask: Optional["np.ndarray"] = None
+        self._selected: Optional["np.ndarray"] = None
+
+    def _and(self, mask: "np.ndarray"):
+        self.mask = mask if self.mask is None else self.mask & mask
+        self._selected = None
+
+    @staticmethod
+    def _codes(vocabulary: List[Optional[str]], labels: list) -> list:
+        return [code for code, label in enumerate(vocabulary) if label in labels]
+
+    def where(
+        self,
+        department: Values = None,
+        skill: Values = None,
+        content_type: Values = None,
+        difficulty: Values = None,
+        status: Values = None,
+        since: Optional[date] = None,
+        until: Optional[date] = None,
+        joined_after: Optional[date] = None,
+        joined_before: Optional[date] = None,
+    ) -> "CohortQuery":
+        """`since`/`until` bound the interaction day, `joined_*` the user's creation day (inclusive)."""
+        s = self.snapshot
+
+        # User-level filters: evaluated once per user, then gathered onto the rows
+        user_ok = None
+        departments = _as_list(department)
+        if departments is not None:
+            user_ok = np.isin(s.user_department, self._codes(s.departments, departments))
+        if joined_after is not None:
+            ok = s.user_hire_day >= _day_number(joined_after)
+            user_ok = ok if user_ok is None else user_ok & ok
+        if joined_before is not None:
+            ok = s.user_hire_day <= _day_number(joined_before)
+            user_ok = ok if user_ok is None else user_ok & ok
+        if user_ok is not None:
+            self._and(user_ok[s.user_idx])
+
+        # Asset-level filters
+        asset_ok = None
+        for values, column, vocabulary in (
+            (_as_list(skill), s.asset_skill, s.skills),
+            (_as_list(content_type), s.asset_content_type, s.content_types),
+            (_as_list(difficulty), s.asset_difficulty, None),
+        ):
+            if values is None:
+                continue
+            ok = np.isin(column, self._codes(vocabulary, values) if vocabulary is not None else values)
+            asset_ok = ok if asset_ok is None else asset_ok & ok
+        if asset_ok is not None:
+            self._and(asset_ok[s.asset_idx])
+
+        # Row-level filters
+        statuses = _as_list(status)
+        if statuses is not None:
+            codes = [STATUS_CODES[getattr(value, "value", value)] for value in statuses]
+            self._and(np.isin(s.status, codes))
+        if since is not None:
+            self._and(s.day >= _day_number(since))
+        if until is not None:
+            self._and(s.day <= _day_number(until))
+        return self
+
+    # --- Aggregation ---
+
+    def _rows(self, column: "np.ndarray") -> "np.ndarray":
+        if self.mask is None:
+            return column
+        if self._selected is None:
+            # Resolve the mask to row numbers once; every column is then a cheap gather
+            self._selected = np.flatnonzero(self.mask)
+        return column[self._selected]
+
+    @staticmethod
+    def _dense(table: "np.ndarray") -> Tuple["np.ndarray", int]:
+        """Shift a small per-user/asset/day code table to start at 0 (as intp, so gathers need no cast)."""
+        offset = int(table.min()) if len(table) else 0
+        return (table - offset).astype(np.intp), offset
+
+    def _group_keys(self, dimension: str) -> Tuple["np.ndarray", Callable[[int], object], bool]:
+        """
+        Per-row group codes (0-based intp), a code -> label function, and
+        whether groups keep key order (else they are sorted by size). Codes
+        are looked up in small per-user/asset/day tables, never computed per row.
+        """
+        s = self.snapshot
+        if dimension in ("difficulty", "skill", "content_type"):
+            column, label = {
+                "difficulty": (s.asset_difficulty, int),
+                "skill": (s.asset_skill, s.skills.__getitem__),
+                "content_type": (s.asset_content_type, s.content_types.__getitem__),
+            }[dimension]
+            table, offset = self._dense(column)
+            return table[self._rows(s.asset_idx)], lambda code: label(code + offset), dimension == "difficulty"
+        if dimension in ("department", "hire_month"):
+            if dimension == "department":
+                table, offset = self._dense(s.user_department)
+                label = lambda code: s.departments[code + offset]
+            else:
+                table, offset = self._dense(_month_numbers(s.user_hire_day))
+                label = lambda code: _month_label(code + offset)
+            return table[self._rows(s.user_idx)], label, dimension == "hire_month"
+        if dimension == "status":
+            return self._rows(s.status).astype(np.intp), lambda code: STATUSES[code].value, False
+        if dimension in ("week", "month"):
+            days = self._rows(s.day)
+            if not len(days):
+                return days.astype(np.intp), str, True
+            first = int(days.min())
+            day_range = np.arange(first, int(days.max()) + 1)
+            if dimension == "week":
+                # 1970-01-01 was a Thursday: shift by 3 days so weeks start on Monday
+                table, offset = self._dense((day_range + 3) // 7)
+                label = lambda code: (EPOCH + timedelta(days=(code + offset) * 7 - 3)).isoformat()
+            else:
+                table, offset = self._dense(_month_numbers(day_range))
+                label = lambda code: _month_label(code + offset)
+            return table[days - first], label, True
+        raise ValueError(f"Unknown group_by dimension {dimension!r}; expected one of {', '.join(GROUP_BY)}")
+
+    def _distinct_users(self, keys: "np.ndarray", groups: int) -> "np.ndarray":
+        users = self.snapshot.users
+        cells = keys * users + self._rows(self.snapshot.user_idx)
+        if groups * users <= DISTINCT_BITMAP_MAX_CELLS:
+            seen = np.zeros(groups * users, dtype=bool)
+            seen[cells] = True
+            return seen.reshape(groups, users).sum(axis=1)
+        return np.bincount(np.unique(cells) // users, minlength=groups)
+
+    def group_by(self, dimension: str) -> List[dict]:
+        """Interactions, distinct learners, completions, average score and hours per group."""
+        keys, label, ordered = self._group_keys(dimension)
+        if not len(keys):
+            return []
+        groups = int(keys.max()) + 1
+
+        s = self.snapshot
+        # One bincount over (group, status, scored) yields interactions, completions and score counts
+        outcome = self._rows(s.status).astype(np.intp) * 2 + self._rows(s.scored)
+        outcomes = np.bincount(keys * OUTCOMES + outcome, minlength=groups * OUTCOMES).reshape(groups, OUTCOMES)
+        interactions = outcomes.sum(axis=1)
+        completed_code = STATUS_CODES["completed"] * 2
+        completed = outcomes[:, completed_code:completed_code + 2].sum(axis=1)
+        score_count = outcomes[:, 1::2].sum(axis=1)
+        score_sum = np.bincount(keys, weights=self._rows(s.score), minlength=groups)
+        seconds = np.bincount(keys, weights=self._rows(s.seconds), minlength=groups)
+        learners = self._distinct_users(keys, groups)
+
+        result = []
+        for code in np.flatnonzero(interactions):
+            count = int(interactions[code])
+            result.append({
+                "key": label(int(code)),
+                "interactions": count,
+                "learners": int(learners[code]),
+                "completed": int(completed[code]),
+                "completion_rate": round(float(completed[code]) / count, 3),
+                "average_score": round(float(score_sum[code] / score_count[code]), 1) if score_count[code] else None,
+                "hours": round(float(seconds[code]) / 3600, 1),
+            })
+        if not ordered:
+            result.sort(key=lambda group: -group["interactions"])
+        return result
+
+    def summary(self) -> dict:
+        """The same aggregates over every matching row."""
+        s = self.snapshot
+        user_idx = self._rows(s.user_idx)
+        count = len(user_idx)
+        seen = np.zeros(s.users, dtype=bool)
+        seen[user_idx] = True
+        completed = int(np.count_nonzero(self._rows(s.status) == STATUS_CODES["completed"]))
+        score_count = int(np.count_nonzero(self._rows(s.scored)))
+        score_sum = float(self._rows(s.score).sum(dtype=np.float64))
+        return {
+            "interactions": count,
+            "learners": int(np.count_nonzero(seen)),
+            "completed": completed,
+            "completion_rate": round(completed / count, 3) if count else 0.0,
+            "average_score": round(score_sum / score_count, 1) if score_count else None,
+            "hours": round(float(self._rows(s.seconds).sum(dtype=np.int64)) / 3600, 1),
+        }
+
+
+class InteractionSnapshotStore:
+    """Builds, incrementally refreshes and publishes the worker's snapshot."""
+
+    def __init__(self):
+        self._snapshot: Optional[InteractionSnapshot] = None
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._reset()
+
+    def _reset(self):
+        self._columns: Optional[Dict[str, _Column]] = None
+        self._user_index: Dict[str, int] = {}
+        self._asset_index: Dict[str, int] = {}
+        self._departments = _Vocabulary()
+        self._skills = _Vocabulary()
+        self._content_types = _Vocabulary()
+        self._watermark: Optional[Tuple[datetime, str]] = None
+
+    def get(self) -> InteractionSnapshot:
+        """The current snapshot, built on first use (later refreshes run in the background)."""
+        _require_numpy()
+        snapshot = self._snapshot
+        return snapshot if snapshot is not None else self.refresh()
+
+    # --- Refresh ---
+
+    def refresh(self, full: bool = False) -> InteractionSnapshot:
+        _require_numpy()
+        with self._lock:
+            if full or self._columns is None:
+                self._reset()
+                self._columns = {
+                    "user_idx": _Column(np.int32), "asset_idx": _Column(np.int32),
+                    "score": _Column(np.float32), "scored": _Column(np.bool_), "seconds": _Column(np.int32),
+                    "status": _Column(np.int8), "day": _Column(np.int32),
+                }
+            start = time.perf_counter()
+            try:
+                with Session(engine) as session:
+                    appended = self._append_interactions(session)
+                    dimensions = self._load_dimensions(session)
+            except BaseException:
+                self._columns = None  # Next refresh starts over from a clean build
+                raise
+            columns = self._columns
+            snapshot = InteractionSnapshot(
+                **{name: column.view() for name, column in columns.items()},
+                **dimensions,
+                departments=list(self._departments.labels),
+                skills=list(self._skills.labels),
+                content_types=list(self._content_types.labels),
+                watermark=self._watermark[0] if self._watermark else None,
+            )
+            self._snapshot = snapshot
+        metrics.inc("interaction_snapshot_refresh_total")
+        logger.info(
+            f"🧮 Interaction snapshot refreshed: +{appended} row(s), {snapshot.rows} total "
+            f"in {time.perf_counter() - start:.2f}s."
+        )
+        return snapshot
+
+    def _append_interactions(self, session: Session) -> int:
+        until = datetime.utcnow() - SNAPSHOT_SAFETY_LAG
+        statement = select(
+            UserInteraction.id, UserInteraction.user_id, UserInteraction.asset_id, UserInteraction.score,
+            UserInteraction.time_spent_seconds, UserInteraction.status, UserInteraction.timestamp,
+            UserInteraction.ingested_at,
+        ).where(UserInteraction.ingested_at <= until)
+        if self._watermark:
+            since, last_id = self._watermark
+            statement = statement.where(or_(
+                UserInteraction.ingested_at > since,
+                and_(UserInteraction.ingested_at == since, UserInteraction.id > last_id),
+            ))
+        statement = statement.order_by(UserInteraction.ingested_at, UserInteraction.id)
+
+        user_index, asset_index = self._user_index, self._asset_index
+        columns = self._columns
+        appended = 0
+        # Core rows (no ORM entity processing): the build is dominated by per-row Python work
+        result = session.connection().execute(statement.execution_options(yield_per=LOAD_CHUNK_ROWS))
+        for chunk in result.partitions():
+            ids, user_ids, asset_ids, scores, seconds, statuses, timestamps, ingested = zip(*chunk)
+            columns["user_idx"].extend(np.fromiter(
+                (user_index.setdefault(user_id, len(user_index)) for user_id in user_ids), np.int32, len(chunk)
+            ))
+            columns["asset_idx"].extend(np.fromiter(
+                (asset_index.setdefault(asset_id, len(asset_index)) for asset_id in asset_ids), np.int32, len(chunk)
+            ))
+            columns["score"].extend(np.array([s or 0.0 for s in scores], dtype=np.float32))
+            columns["scored"].extend(np.array([s is not None for s in scores], dtype=np.bool_))
+            columns["seconds"].extend(np.array([s or 0 for s in seconds], dtype=np.int32))
+            columns["status"].extend(np.fromiter(
+                (STATUS_CODES[getattr(s, "value", s)] for s in statuses), np.int8, len(chunk)
+            ))
+            columns["day"].extend(
+                np.fromiter((timestamp.toordinal() for timestamp in timestamps), np.int32, len(chunk)) - EPOCH_ORDINAL
+            )
+            self._watermark = (ingested[-1], ids[-1])
+            appended += len(chunk)
+        return appended
+
+    def _load_dimensions(self, session: Session) -> dict:
+        """Reload user and asset attributes (they are mutable) aligned with the row indexes."""
+        user_index, asset_index = self._user_index, self._asset_index
+        users = session.execute(select(User.id, User.department, User.created_at)).all()
+        for user_id, _, _ in users:
+            user_index.setdefault(user_id, len(user_index))
+        assets = session.execute(select(Asset.id, Asset.difficulty_level, Asset.skill_tag, Asset.content_type)).all()
+        for asset_id, _, _, _ in assets:
+            asset_index.setdefault(asset_id, len(asset_index))
+
+        # Ids whose row is gone keep these defaults
+        user_department = np.full(len(user_index), self._departments.code(None), dtype=np.int32)
+        user_hire_day = np.zeros(len(user_index), dtype=np.int32)
+        for user_id, department, created_at in users:
+            index = user_index[user_id]
+            user_department[index] = self._departments.code(department)
+            user_hire_day[index] = _day_number(created_at.date()) if created_at else 0
+
+        asset_difficulty = np.zeros(len(asset_index), dtype=np.int8)
+        asset_skill = np.full(len(asset_index), self._skills.code(None), dtype=np.int32)
+        asset_content_type = np.full(len(asset_index), self._content_types.code(None), dtype=np.int32)
+        for asset_id, difficulty, skill, content_type in assets:
+            index = asset_index[asset_id]
+            asset_difficulty[index] = difficulty or 0
+            asset_skill[index] = self._skills.code(skill)
+            asset_content_type[index] = self._content_types.code(content_type)
+
+        return {
+            "user_department": user_department, "user_hire_day": user_hire_day,
+            "asset_difficulty": asset_difficulty, "asset_skill": asset_skill,
+            "asset_content_type": asset_content_type,
+        }
+
+    # --- Background refresh ---
+
+    async def _run(self):
+        refresh = settings.INTERACTION_SNAPSHOT_PRELOAD
+        while True:
+            if refresh:
+                try:
+                    await asyncio.to_thread(self.refresh)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"❌ Interaction snapshot refresh failed: {e}")
+            await asyncio.sleep(settings.INTERACTION_SNAPSHOT_REFRESH_SECONDS)
+            # Not used on this worker yet: nothing to keep fresh
+            refresh = self._snapshot is not None
+
+    def start(self):
+        if np is not None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+
+# Global snapshot (one per worker, built on first use)
+interaction_snapshot = InteractionSnapshotStore()
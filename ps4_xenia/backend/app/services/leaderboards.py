@@ -0,0 +1,387 @@
+"""
+Leaderboards on sorted sets.
+
+Two metrics per user: completed modules and mastery points (the proficiency
+increments mastery_increment() awards, summed without the per-skill cap).
+Each is kept on an org-wide board and on a board per department, for all
+time and per ISO week:
+
+    leaderboard:{metric}:all:org
+    leaderboard:{metric}:2026-W42:dept:Engineering
+
+Boards live in Redis sorted sets (ZINCRBY / ZREVRANK / ZREVRANGE, all
+O(log n)), or, without Redis, in in-process SortedSet skiplists with the same
+ordering. The "leaderboards" event consumer folds each batch of
+InteractionRecorded events into one pipeline of increments. Weekly boards get
+an absolute expiry (end of the week + LEADERBOARD_WEEKLY_RETENTION_DAYS), so
+they roll over on their own. reconcile_leaderboards.py rebuilds every board
+from the interaction table; the in-process backend rebuilds itself on first
+use, since it starts empty in every worker. That build covers interactions
+ingested up to BUILD_SAFETY_LAG ago (so none still in flight) and the
+consumer skips events at or below that mark: each interaction is counted
+once, whether its event is consumed before or after the build.
+"""
+import calendar
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import and_, case, func
+from sqlmodel import Session, select
+from app.core.config import settings
+from app.core.database import engine, redis_client
+from app.core.sorted_set import SortedSet
+from app.models.models import Asset, InteractionStatus, User, UserInteraction
+from app.services.mastery import MASTERY_SCORE_THRESHOLD, mastery_increment
+
+logger = logging.getLogger(__name__)
+
+METRICS = ("completions", "points")
+PERIODS = ("week", "last_week", "all")
+KEY_PREFIX = "leaderboard:"
+BUILD_SAFETY_LAG = timedelta(seconds=60)
+
+Updates = Dict[str, Dict[str, float]]  # board key -> member -> increment
+
+
+# --- Keys and periods ---
+
+def week_id(day: date) -> str:
+    year, week, _ = day.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def week_expiry(day: date) -> datetime:
+    """When the board of `day`'s week is dropped."""
+    end = week_start(day) + timedelta(days=7 + settings.LEADERBOARD_WEEKLY_RETENTION_DAYS)
+    return datetime.combine(end, datetime.min.time())
+
+
+def period_id(period: str, today: Optional[date] = None) -> str:
+    today = today or datetime.utcnow().date()
+    if period == "all":
+        return "all"
+    if period == "last_week":
+        return week_id(today - timedelta(days=7))
+    return week_id(today)
+
+
+def board_key(metric: str, period: str, department: Optional[str] = None) -> str:
+    scope = f"dept:{department}" if department else "org"
+    return f"{KEY_PREFIX}{metric}:{period}:{scope}"
+
+
+# --- Backends ---
+
+def _epoch(moment: datetime) -> int:
+    """Naive UTC datetime -> Unix time (redis-py would read a naive datetime as local time)."""
+    return calendar.timegm(moment.utctimetuple())
+
+
+class RedisBoards:
+    def __init__(self, client):
+        self.client = client
+
+    def apply(self, updates: Updates, expiries: Dict[str, datetime]):
+        pipe = self.client.pipeline(transaction=False)
+        for key, increments in updates.items():
+            for member, amount in increments.items():
+                pipe.zincrby(key, amount, member)
+            if key in expiries:
+                pipe.expireat(key, _epoch(expiries[key]))
+        pipe.execute()
+
+    def replace(self, boards: Updates, expiries: Dict[str, datetime]):
+        """Swap in freshly computed boards (built under temporary keys, then RENAMEd) and drop the rest."""
+        stale = {key for key in self.client.scan_iter(match=f"{KEY_PREFIX}*") if ":rebuild:" not in key}
+        suffix = f":rebuild:{time.time_ns()}"
+        for key, scores in boards.items():
+            pipe = self.client.pipeline(transaction=False)
+            items = list(scores.items())
+            for i in range(0, len(items), 1000):
+                pipe.zadd(key + suffix, dict(items[i:i + 1000]))
+            pipe.rename(key + suffix, key)
+            if key in expiries:
+                pipe.expireat(key, _epoch(expiries[key]))
+            pipe.execute()
+            stale.discard(key)
+        if stale:
+            self.client.delete(*stale)
+
+    def set_score(self, key: str, member: str, score: float, expiry: Optional[datetime] = None):
+        pipe = self.client.pipeline(transaction=False)
+        pipe.zadd(key, {member: score})
+        if expiry is not None:
+            pipe.expireat(key, _epoch(expiry))
+        pipe.execute()
+
+    def remove(self, key: str, member: str):
+        self.client.zrem(key, member)
+
+    def score(self, key: str, member: str) -> Optional[float]:
+        return self.client.zscore(key, member)
+
+    def rev_rank(self, key: str, member: str) -> Optional[int]:
+        return self.client.zrevrank(key, member)
+
+    def rev_range(self, key: str, start: int, stop: int) -> List[Tuple[str, float]]:
+        return self.client.zrevrange(key, start, stop, withscores=True)
+
+    def size(self, key: str) -> int:
+        return self.client.zcard(key)
+
+
+class MemoryBoards:
+    """Per-worker SortedSets with Redis-like absolute expiry."""
+
+    def __init__(self):
+        self.boards: Dict[str, SortedSet] = {}
+        self.expiries: Dict[str, datetime] = {}
+        self.lock = threading.Lock()
+
+    def _board(self, key: str, create: bool = False) -> Optional[SortedSet]:
+        expiry = self.expiries.get(key)
+        if expiry is not None and expiry <= datetime.utcnow():
+            self.boards.pop(key, None)
+            self.expiries.pop(key, None)
+        board = self.boards.get(key)
+        if board is None and create:
+            board = self.boards[key] = SortedSet()
+        return board
+
+    def apply(self, updates: Updates, expiries: Dict[str, datetime]):
+        with self.lock:
+            for key, increments in updates.items():
+                board = self._board(key, create=True)
+                for member, amount in increments.items():
+                    board.incr(member, amount)
+            self.expiries.update((key, expiry) for key, expiry in expiries.items() if key in updates)
+
+    def replace(self, boards: Updates, expiries: Dict[str, datetime]):
+        fresh = {}
+        for key, scores in boards.items():
+            board = fresh[key] = SortedSet()
+            for member, score in scores.items():
+                board.add(member, score)
+        with self.lock:
+            self.boards = fresh
+            self.expiries = {key: expiry for key, expiry in expiries.items() if key in fresh}
+
+    def set_score(self, key: str, member: str, score: float, expiry: Optional[datetime] = None):
+        with self.lock:
+            self._board(key, create=True).add(member, score)
+            if expiry is not None:
+                self.expiries[key] = expiry
+
+    def remove(self, key: str, member: str):
+        with self.lock:
+            board = self._board(key)
+            if board is not None:
+                board.remove(member)
+
+    def score(self, key: str, member: str) -> Optional[float]:
+        with self.lock:
+            board = self._board(key)
+            return board.score(member) if board is not None else None
+
+    def rev_rank(self, key: str, member: str) -> Optional[int]:
+        with self.lock:
+            board = self._board(key)
+            return board.rev_rank(member) if board is not None else None
+
+    def rev_range(self, key: str, start: int, stop: int) -> List[Tuple[str, float]]:
+        with self.lock:
+            board = self._board(key)
+            return board.rev_range(start, stop) if board is not None else []
+
+    def size(self, key: str) -> int:
+        with self.lock:
+            board = self._board(key)
+            return len(board) if board is not None else 0
+
+
+# --- Leaderboards ---
+
+class Leaderboards:
+    def __init__(self):
+        self._boards = None
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        self._built_through: Optional[datetime] = None  # Ingestion high-water mark of the in-process build
+
+    @property
+    def boards(self):
+        """The backend, chosen on first use (LEADERBOARD_BACKEND: auto | redis | memory)."""
+        if self._boards is None:
+            if settings.LEADERBOARD_BACKEND in ("auto", "redis") and redis_client is not None:
+                self._boards = RedisBoards(redis_client)
+            else:
+                self._boards = MemoryBoards()
+        return self._boards
+
+    @property
+    def backend(self) -> str:
+        return "redis" if isinstance(self.boards, RedisBoards) else "memory"
+
+    def _ensure_loaded(self):
+        """The in-process backend starts empty in every worker: build it from the database once."""
+        if self._loaded or self.backend == "redis":
+            return
+        with self._load_lock:
+            if not self._loaded:
+                # Set before rebuild() flips _loaded, so record() never sees a build without its mark
+                self._built_through = datetime.utcnow() - BUILD_SAFETY_LAG
+                with Session(engine) as session:
+                    self.rebuild(session, through=self._built_through)
+
+    # --- Writes ---
+
+    def record(self, events: Iterable, departments: Dict[str, Optional[str]]):
+        """Fold InteractionRecorded events into board increments and apply them in one round trip."""
+        self._ensure_loaded()
+        if self._built_through is not None:
+            # Interactions ingested up to the mark are already in the in-process build
+            events = [
+                event for event in events
+                if getattr(event, "ingested_at", None) is None or event.ingested_at > self._built_through
+            ]
+        updates: Updates = defaultdict(lambda: defaultdict(float))
+        expiries: Dict[str, datetime] = {}
+        now = datetime.utcnow()
+        for event in events:
+            amounts = {
+                "completions": 1.0 if event.status == InteractionStatus.COMPLETED else 0.0,
+                "points": mastery_increment(event.status, event.score, event.skill_tag, event.difficulty_level),
+            }
+            day = (event.timestamp or event.occurred_at).date()
+            expiry = week_expiry(day)
+            periods = ["all"] if expiry <= now else ["all", week_id(day)]  # Replays of expired weeks
+            department = departments.get(event.user_id)
+            for metric, amount in amounts.items():
+                if not amount:
+                    continue
+                for period in periods:
+                    for scope in ([None, department] if department else [None]):
+                        key = board_key(metric, period, scope)
+                        updates[key][event.user_id] += amount
+                        if period != "all":
+                            expiries[key] = expiry
+        if updates:
+            self.boards.apply(updates, expiries)
+
+    def move_department(self, user_id: str, previous: Optional[str], department: Optional[str]):
+        """Carry a user's all-time and weekly scores over to their new department's boards."""
+        self._ensure_loaded()
+        today = datetime.utcnow().date()
+        periods = {"all": None}
+        for day in (today, today - timedelta(days=7)):
+            periods[week_id(day)] = week_expiry(day)
+        for metric in METRICS:
+            for period, expiry in periods.items():
+                # A department board entry always equals the org board entry
+                score = self.boards.score(board_key(metric, period), user_id)
+                if score is None:
+                    continue
+                if previous:
+                    self.boards.remove(board_key(metric, period, previous), user_id)
+                if department:
+                    self.boards.set_score(board_key(metric, period, department), user_id, score, expiry)
+
+    def rebuild(self, session: Session, through: Optional[datetime] = None) -> int:
+        """
+        Recompute every board from UserInteraction (current and previous week,
+        and all time), optionally only from interactions ingested up to `through`.
+        """
+        completed = UserInteraction.status == InteractionStatus.COMPLETED
+        # Mirrors mastery_increment(): difficulty * 2 * score / 100 for mastery-level completions
+        points = case(
+            (
+                and_(completed, UserInteraction.score >= MASTERY_SCORE_THRESHOLD, Asset.skill_tag != ""),
+                Asset.difficulty_level * 2 * UserInteraction.score / 100.0,
+            ),
+            else_=0.0,
+        )
+        today = datetime.utcnow().date()
+        windows = {"all": None}
+        for period in ("last_week", "week"):
+            start = week_start(today - timedelta(days=7 if period == "last_week" else 0))
+            windows[period_id(period, today)] = (start, start + timedelta(days=7))
+
+        boards: Updates = defaultdict(dict)
+        expiries: Dict[str, datetime] = {}
+        for period, window in windows.items():
+            statement = (
+                select(
+                    UserInteraction.user_id, User.department,
+                    func.sum(case((completed, 1), else_=0)), func.sum(points),
+                )
+                .join(User, User.id == UserInteraction.user_id)
+                .join(Asset, Asset.id == UserInteraction.asset_id)
+                .group_by(UserInteraction.user_id, User.department)
+            )
+            if through is not None:
+                statement = statement.where(UserInteraction.ingested_at <= through)
+            if window is not None:
+                start, end = window
+                statement = statement.where(
+                    UserInteraction.timestamp >= datetime.combine(start, datetime.min.time()),
+                    UserInteraction.timestamp < datetime.combine(end, datetime.min.time()),
+                )
+            for user_id, department, completions, earned in session.exec(statement).all():
+                for metric, score in (("completions", completions or 0), ("points", earned or 0.0)):
+                    if not score:
+                        continue
+                    for scope in ([None, department] if department else [None]):
+                        key = board_key(metric, period, scope)
+                        boards[key][user_id] = float(score)
+                        if window is not None:
+                            expiries[key] = week_expiry(window[0])
+        self.boards.replace(boards, expiries)
+        self._loaded = True
+        members = sum(len(scores) for scores in boards.values())
+        logger.info(f"🏅 Rebuilt {len(boards)} leaderboard(s) with {members} entries ({self.backend}).")
+        return len(boards)
+
+    # --- Reads ---
+
+    def standings(self, metric: str, period: str, department: Optional[str], start: int, stop: int) -> List[dict]:
+        """Entries at 0-based ranks start..stop (inclusive), best first."""
+        self._ensure_loaded()
+        key = board_key(metric, period_id(period), department)
+        return [
+            {"rank": rank, "user_id": member, "score": round(score, 1)}
+            for rank, (member, score) in enumerate(self.boards.rev_range(key, start, stop), start=start + 1)
+        ]
+
+    def position(self, metric: str, period: str, department: Optional[str], user_id: str) -> Optional[dict]:
+        """A user's 1-based rank and score, or None if they are not on the board."""
+        self._ensure_loaded()
+        key = board_key(metric, period_id(period), department)
+        rank = self.boards.rev_rank(key, user_id)
+        if rank is None:
+            return None
+        return {"rank": rank + 1, "score": round(self.boards.score(key, user_id) or 0.0, 1)}
+
+    def neighbourhood(
+        self, metric: str, period: str, department: Optional[str], user_id: str, radius: int
+    ) -> List[dict]:
+        """The entries `radius` places above and below a user (empty if they are not on the board)."""
+        position = self.position(metric, period, department, user_id)
+        if position is None:
+            return []
+        index = position["rank"] - 1
+        return self.standings(metric, period, department, max(index - radius, 0), index + radius)
+
+    def size(self, metric: str, period: str, department: Optional[str]) -> int:
+        self._ensure_loaded()
+        return self.boards.size(board_key(metric, period_id(period), department))
+
+
+# Global leaderboards (Redis shared across workers; in-process per worker)
+leaderboards = Leaderboards()
@@ -0,0 +1,195 @@
+"""
+Per-learner activity: day bitmaps, streaks and efficiency.
+
+UserActivityBitmap keeps one bit per UTC day since the learner's first active
+day (a year of history is 46 bytes). The "rollups" consumer ORs each batch's
+active days in, in the same transaction as the DailyLearningRollup upsert, so
+the bitmap always agrees with the rollup. Learners without a bitmap yet (their
+history predates it) are seeded from their rollup days.
+
+Streaks treat the bitmap as one integer and use whole-integer shifts and
+ANDs, each O(days / 64) machine words, instead of walking days:
+- current streak: the run of set bits ending today (or yesterday, so a streak
+  isn't broken before the day is over), up to the highest clear bit below it.
+- longest streak: doubling (bit i of x & (x >> k) means 2k active days from
+  day i) until no run is long enough, then a binary descent: O(log longest)
+  bitmap operations.
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import bindparam, func, update
+from sqlmodel import Session, select
+from app.core.database import dialect_insert
+from app.models.models import DailyLearningRollup, UserActivityBitmap
+
+EFFICIENCY_WINDOW_DAYS = 28  # Rollup window the efficiency score is computed over
+
+
+# --- Bitmap encoding ---
+
+def _to_int(bits: bytes) -> int:
+    return int.from_bytes(bits, "little")
+
+
+def _to_bytes(value: int) -> bytes:
+    return value.to_bytes((value.bit_length() + 7) // 8, "little")
+
+
+def _set_days(first_day: Optional[date], value: int, days: Iterable[date]) -> Tuple[date, int]:
+    """OR days into a bitmap, moving first_day back (shifting left) for earlier days."""
+    days = list(days)
+    earliest = min(days)
+    if first_day is None:
+        first_day = earliest
+    elif earliest < first_day:
+        value <<= (first_day - earliest).days
+        first_day = earliest
+    for day in days:
+        value |= 1 << (day - first_day).days
+    return first_day, value
+
+
+# --- Maintenance ---
+
+def _rollup_days(session: Session, user_id: str) -> List[date]:
+    return list(session.exec(select(DailyLearningRollup.day).where(DailyLearningRollup.user_id == user_id)).all())
+
+
+def _seed_bitmap(session: Session, user_id: str) -> bool:
+    """Insert a bitmap built from the user's rollup days; False if one already exists."""
+    days = _rollup_days(session, user_id)
+    if not days:
+        return True
+    first_day, value = _set_days(None, 0, days)
+    insert = dialect_insert(session)
+    result = session.execute(
+        insert(UserActivityBitmap.__table__)
+        .values(user_id=user_id, first_day=first_day, bits=_to_bytes(value))
+        .on_conflict_do_nothing(index_elements=["user_id"])
+    )
+    return bool(result.rowcount)
+
+
+def apply_activity_days(session: Session, keys: Iterable[Tuple[str, date]]):
+    """
+    OR (user, day) activity into the users' bitmaps. Run after the batch's
+    rollup upsert, which seeding reads. Rows are locked (FOR UPDATE; SQLite
+    serializes writers anyway) in user order, so concurrent batches merge
+    instead of overwriting each other. Does not commit.
+    """
+    days_by_user: Dict[str, Set[date]] = defaultdict(set)
+    for user_id, day in keys:
+        days_by_user[user_id].add(day)
+    if not days_by_user:
+        return
+    table = UserActivityBitmap.__table__
+    locked = select(table).order_by(table.c.user_id).with_for_update()
+    existing = {
+        row.user_id: row
+        for row in session.execute(locked.where(table.c.user_id.in_(sorted(days_by_user))))
+    }
+    updates = []
+    for user_id in sorted(days_by_user):
+        row = existing.get(user_id)
+        if row is None:
+            if _seed_bitmap(session, user_id):
+                continue
+            # Another transaction created the row first; merge into it
+            row = session.execute(locked.where(table.c.user_id == user_id)).one()
+        first_day, value = _set_days(row.first_day, _to_int(row.bits), days_by_user[user_id])
+        updates.append({"target": user_id, "new_first_day": first_day, "new_bits": _to_bytes(value)})
+    if updates:
+        session.execute(
+            update(table)
+            .where(table.c.user_id == bindparam("target"))
+            .values(first_day=bindparam("new_first_day"), bits=bindparam("new_bits")),
+            updates,
+        )
+
+
+def rebuild_activity_bitmaps(session: Session) -> int:
+    """Recompute every bitmap from DailyLearningRollup (backfill / repair). Does not commit."""
+    days_by_user: Dict[str, List[date]] = defaultdict(list)
+    for user_id, day in session.exec(select(DailyLearningRollup.user_id, DailyLearningRollup.day)).all():
+        days_by_user[user_id].append(day)
+    session.execute(UserActivityBitmap.__table__.delete())
+    rows = []
+    for user_id, days in days_by_user.items():
+        first_day, value = _set_days(None, 0, days)
+        rows.append({"user_id": user_id, "first_day": first_day, "bits": _to_bytes(value)})
+    if rows:
+        session.execute(UserActivityBitmap.__table__.insert(), rows)
+    return len(rows)
+
+
+# --- Streaks ---
+
+def current_run(value: int, end: int) -> int:
+    """Length of the run of set bits ending at bit `end` (0 if it is clear)."""
+    if end < 0:
+        return 0
+    mask = (1 << (end + 1)) - 1
+    gaps = ~value & mask
+    return end + 1 - gaps.bit_length()
+
+
+def longest_run(value: int) -> int:
+    """Length of the longest run of set bits."""
+    if not value:
+        return 0
+    masks = []  # masks[j]: bit i set iff bits i .. i + 2**j - 1 are all set
+    runs, length = value, 1
+    while True:
+        longer = runs & (runs >> length)
+        if not longer:
+            break
+        masks.append(runs)
+        runs, length = longer, length * 2
+    # `runs` marks starts of runs >= length; extend them by length/2, length/4, ... where possible
+    best, step = length, length
+    for mask in reversed(masks):
+        step //= 2
+        extended = runs & (mask >> best)
+        if extended:
+            runs, best = extended, best + step
+    return best
+
+
+def streaks(session: Session, user_id: str, today: Optional[date] = None) -> dict:
+    """Current and longest streaks (consecutive active days) and total active days."""
+    today = today or datetime.utcnow().date()
+    row = session.get(UserActivityBitmap, user_id)
+    if row is not None:
+        first_day, value = row.first_day, _to_int(row.bits)
+    else:
+        days = _rollup_days(session, user_id)
+        if not days:
+            return {"current_streak_days": 0, "longest_streak_days": 0, "active_days": 0}
+        first_day, value = _set_days(None, 0, days)
+    end = (today - first_day).days
+    current = current_run(value, end) or current_run(value, end - 1)
+    return {
+        "current_streak_days": current,
+        "longest_streak_days": longest_run(value),
+        "active_days": bin(value).count("1"),
+    }
+
+
+# --- Efficiency ---
+
+def efficiency_score(session: Session, user_id: str, days: int = EFFICIENCY_WINDOW_DAYS) -> Optional[int]:
+    """
+    Estimated duration of the modules completed in the window over the time
+    actually spent learning in it, as 0-100 (capped: finishing faster than
+    estimated is 100). None without time or completions to compare.
+    """
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+    seconds, estimated = session.exec(
+        select(func.sum(DailyLearningRollup.seconds), func.sum(DailyLearningRollup.estimated_seconds))
+        .where(DailyLearningRollup.user_id == user_id)
+        .where(DailyLearningRollup.day >= since)
+    ).one()
+    if not seconds or not estimated:
+        return None
+    return min(100, round(100 * estimated / seconds))
@@ -0,0 +1,364 @@
+"""
+Learning paths over a skill prerequisite DAG.
+
+The curriculum graph is built on *tiers*: the live assets of one skill at one
+difficulty level. A tier requires
+- the next lower populated tier of the same skill, and
+- for each prerequisite skill (SkillPrerequisite), that skill's highest
+  populated tier at or below the same difficulty (its lowest tier if none is).
+Tiers are topologically sorted once per curriculum version (catalog_version
+plus prerequisite_version) into one global asset order. Each worker keeps
+the compiled graph and rebuilds it only when the version changes.
+
+A learner's path is every asset in the prerequisite closure of their target
+skills, in that global order, materialized as LearningPathStep rows under
+their LearningPath. Assets they completed are marked completed, and basic
+assets (difficulty <= FAST_TRACK_MAX_DIFFICULTY) of skills already at
+PROFICIENT are skipped, as the adaptive engine fast-tracks them. The next
+asset is then the first pending step: one indexed lookup.
+
+The order depends only on the graph, so after an interaction the
+"learning_paths" consumer re-evaluates just the suffix starting at the first
+pending step the interaction (or a mastery threshold crossing) affects. A new
+curriculum version or changed target skills re-plans the whole path, lazily
+on the next read.
+"""
+import heapq
+import logging
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import bindparam, delete, insert, update
+from sqlmodel import Session, select
+from app.models.models import (
+    Asset, InteractionStatus, LearningPath, LearningPathStep, PathStatus, SkillMastery, SkillPrerequisite,
+    StepStatus, User, UserInteraction,
+)
+from app.services.resource_versions import catalog_version, prerequisite_version
+from app.services.skill_gaps import PROFICIENT
+
+logger = logging.getLogger(__name__)
+
+FAST_TRACK_MAX_DIFFICULTY = 2  # Highest difficulty skipped for skills already at PROFICIENT
+
+Tier = Tuple[str, int]  # (skill, difficulty)
+
+
+class PrerequisiteCycleError(ValueError):
+    pass
+
+
+# --- Curriculum graph ---
+
+@dataclass
+class CurriculumGraph:
+    version: str
+    order: List[str]  # Every live asset, topologically sorted
+    rank: Dict[str, int]  # asset -> position in order
+    tiers: Dict[Tier, List[str]]  # tier -> assets, in authoring order
+    requires: Dict[Tier, List[Tier]]
+    skill_tiers: Dict[str, List[Tier]]
+    asset_tier: Dict[str, Tier]
+
+    def closure(self, skills: Iterable[str]) -> List[str]:
+        """Assets of the skills and everything they (transitively) require, in path order."""
+        seen: Set[Tier] = set()
+        stack = [tier for skill in skills for tier in self.skill_tiers.get(skill, [])]
+        while stack:
+            tier = stack.pop()
+            if tier not in seen:
+                seen.add(tier)
+                stack.extend(self.requires[tier])
+        return sorted((asset for tier in seen for asset in self.tiers[tier]), key=self.rank.__getitem__)
+
+    def skill_assets(self, skill: str) -> List[str]:
+        return [asset for tier in self.skill_tiers.get(skill, []) for asset in self.tiers[tier]]
+
+
+def _prerequisite_map(session: Session) -> Dict[str, List[str]]:
+    prerequisites: Dict[str, List[str]] = defaultdict(list)
+    for skill, prerequisite in session.exec(select(SkillPrerequisite.skill, SkillPrerequisite.prerequisite_skill)).all():
+        prerequisites[skill].append(prerequisite)
+    return prerequisites
+
+
+def build_graph(session: Session, version: str) -> CurriculumGraph:
+    tiers: Dict[Tier, List[str]] = defaultdict(list)
+    for asset_id, skill, difficulty in session.exec(
+        select(Asset.id, Asset.skill_tag, Asset.difficulty_level)
+        .where(Asset.is_active == True, Asset.is_archived == False)
+        .order_by(Asset.created_at, Asset.id)
+    ).all():
+        tiers[(skill, difficulty)].append(asset_id)
+    levels: Dict[str, List[int]] = defaultdict(list)
+    for skill, difficulty in sorted(tiers):
+        levels[skill].append(difficulty)
+    prerequisites = _prerequisite_map(session)
+
+    requires: Dict[Tier, List[Tier]] = {}
+    for tier in tiers:
+        skill, difficulty = tier
+        own = levels[skill]
+        index = bisect_left(own, difficulty)
+        required = [(skill, own[index - 1])] if index else []
+        for prerequisite in prerequisites.get(skill, []):
+            other = levels.get(prerequisite)
+            if other:  # Prerequisites without live content don't block
+                index = bisect_right(other, difficulty)
+                required.append((prerequisite, other[index - 1] if index else other[0]))
+        requires[tier] = required
+
+    # Kahn's algorithm; among ready tiers, easier first, then by skill name
+    dependents: Dict[Tier, List[Tier]] = defaultdict(list)
+    indegree = {tier: len(required) for tier, required in requires.items()}
+    for tier, required in requires.items():
+        for prerequisite in required:
+            dependents[prerequisite].append(tier)
+    ready = [(difficulty, skill) for (skill, difficulty), count in indegree.items() if not count]
+    heapq.heapify(ready)
+    ordered: List[Tier] = []
+    while ready:
+        difficulty, skill = heapq.heappop(ready)
+        ordered.append((skill, difficulty))
+        for dependent in dependents[(skill, difficulty)]:
+            indegree[dependent] -= 1
+            if not indegree[dependent]:
+                heapq.heappush(ready, (dependent[1], dependent[0]))
+    if len(ordered) < len(tiers):
+        # Writes reject cycles; a cycle here means the table was edited by hand
+        cyclic = sorted((tier for tier, count in indegree.items() if count), key=lambda t: (t[1], t[0]))
+        logger.error(f"❌ Prerequisite cycle among {sorted({skill for skill, _ in cyclic})}; ordering them by difficulty.")
+        ordered.extend(cyclic)
+
+    order = [asset for tier in ordered for asset in tiers[tier]]
+    skill_tiers: Dict[str, List[Tier]] = defaultdict(list)
+    for tier in ordered:
+        skill_tiers[tier[0]].append(tier)
+    return CurriculumGraph(
+        version=version,
+        order=order,
+        rank={asset: index for index, asset in enumerate(order)},
+        tiers=dict(tiers),
+        requires=requires,
+        skill_tiers=dict(skill_tiers),
+        asset_tier={asset: tier for tier, assets in tiers.items() for asset in assets},
+    )
+
+
+class Curriculum:
+    """The compiled graph for the current curriculum version (one per worker)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._graph: Optional[CurriculumGraph] = None
+
+    def get(self, session: Session) -> CurriculumGraph:
+        version = f"{catalog_version(session)}:{prerequisite_version(session)}"
+        graph = self._graph
+        if graph is not None and graph.version == version:
+            return graph
+        with self._lock:
+            if self._graph is None or self._graph.version != version:
+                start = time.perf_counter()
+                self._graph = build_graph(session, version)
+                logger.info(
+                    f"🧭 Curriculum graph: {len(self._graph.order)} asset(s) in {len(self._graph.tiers)} tier(s), "
+                    f"built in {time.perf_counter() - start:.2f}s."
+                )
+            return self._graph
+
+
+# Global graph (rebuilt when the catalog or prerequisites change)
+curriculum = Curriculum()
+
+
+def set_prerequisites(session: Session, skill: str, prerequisites: List[str]):
+    """Replace a skill's prerequisites; raises PrerequisiteCycleError if that would create a cycle. Does not commit."""
+    prerequisites = sorted(set(prerequisites))
+    graph = _prerequisite_map(session)
+    graph[skill] = prerequisites
+    # A cycle through `skill` exists iff `skill` is reachable from one of its new prerequisites
+    seen: Set[str] = set()
+    stack = list(prerequisites)
+    while stack:
+        current = stack.pop()
+        if current == skill:
+            raise PrerequisiteCycleError(f"'{skill}' would (transitively) require itself")
+        if current not in seen:
+            seen.add(current)
+            stack.extend(graph.get(current, []))
+    session.execute(delete(SkillPrerequisite).where(SkillPrerequisite.skill == skill))
+    if prerequisites:
+        session.execute(
+            insert(SkillPrerequisite),
+            [{"skill": skill, "prerequisite_skill": prerequisite} for prerequisite in prerequisites],
+        )
+
+
+# --- Planning ---
+
+def _lock_user(session: Session, user_id: str):
+    """Serialize planning per user (FOR UPDATE on the user row; SQLite serializes writers anyway)."""
+    session.exec(select(User.id).where(User.id == user_id).with_for_update()).first()
+
+
+def _current_path(session: Session, user_id: str) -> Optional[LearningPath]:
+    return session.exec(
+        select(LearningPath).where(LearningPath.user_id == user_id).order_by(LearningPath.created_at.desc())
+    ).first()
+
+
+def _is_stale(path: LearningPath, user: User, graph: CurriculumGraph) -> bool:
+    return path.curriculum_version != graph.version or list(path.target_skills or []) != list(user.target_skills or [])
+
+
+def _mastered_skills(session: Session, user_id: str, skills: Optional[Iterable[str]] = None) -> Set[str]:
+    query = select(SkillMastery.skill_name).where(SkillMastery.user_id == user_id, SkillMastery.proficiency >= PROFICIENT)
+    if skills is not None:
+        query = query.where(SkillMastery.skill_name.in_(list(skills)))
+    return set(session.exec(query).all())
+
+
+def _step_status(graph: CurriculumGraph, asset_id: str, completed: Set[str], mastered: Set[str]) -> StepStatus:
+    if asset_id in completed:
+        return StepStatus.COMPLETED
+    skill, difficulty = graph.asset_tier[asset_id]
+    if skill in mastered and difficulty <= FAST_TRACK_MAX_DIFFICULTY:
+        return StepStatus.SKIPPED
+    return StepStatus.PENDING
+
+
+def plan_path(session: Session, user: User, graph: CurriculumGraph) -> LearningPath:
+    """(Re)materialize the user's whole path. Does not commit."""
+    targets = list(user.target_skills or [])
+    assets = graph.closure(targets)
+    completed = set(session.exec(
+        select(UserInteraction.asset_id)
+        .where(UserInteraction.user_id == user.id, UserInteraction.status == InteractionStatus.COMPLETED)
+        .distinct()
+    ).all())
+    mastered = _mastered_skills(session, user.id)
+    statuses = [_step_status(graph, asset_id, completed, mastered) for asset_id in assets]
+
+    path = _current_path(session, user.id) or LearningPath(user_id=user.id, name="")
+    path.name = f"Path to {', '.join(targets)}" if targets else "Learning path"
+    path.target_skills = targets
+    path.curriculum_version = graph.version
+    path.status = PathStatus.IN_PROGRESS if StepStatus.PENDING in statuses else PathStatus.COMPLETED
+    path.updated_at = datetime.utcnow()
+    session.add(path)
+    session.flush()
+    session.execute(delete(LearningPathStep).where(LearningPathStep.path_id == path.id))
+    if assets:
+        session.execute(insert(LearningPathStep), [
+            {"path_id": path.id, "position": position, "asset_id": asset_id, "status": status}
+            for position, (asset_id, status) in enumerate(zip(assets, statuses))
+        ])
+    return path
+
+
+def ensure_path(session: Session, user_id: str) -> Optional[LearningPath]:
+    """The user's up-to-date path, planned (and committed) on first use or when stale; None without targets."""
+    user = session.get(User, user_id)
+    if user is None:
+        return None
+    graph = curriculum.get(session)
+    path = _current_path(session, user_id)
+    if path is not None and not _is_stale(path, user, graph):
+        return path
+    if path is None and not user.target_skills:
+        return None
+    _lock_user(session, user_id)
+    path = _current_path(session, user_id)
+    if path is None or _is_stale(path, user, graph):
+        path = plan_path(session, user, graph)
+        session.commit()
+    return path
+
+
+def next_step_asset(session: Session, user_id: str) -> Optional[Asset]:
+    """First pending step of the user's path, or None (no targets, or path finished)."""
+    path = ensure_path(session, user_id)
+    if path is None or path.status == PathStatus.COMPLETED:
+        return None
+    return session.exec(
+        select(Asset)
+        .join(LearningPathStep, LearningPathStep.asset_id == Asset.id)
+        .where(LearningPathStep.path_id == path.id, LearningPathStep.status == StepStatus.PENDING)
+        .order_by(LearningPathStep.position)
+        .limit(1)
+    ).first()
+
+
+def path_steps(session: Session, path: LearningPath) -> List[dict]:
+    rows = session.exec(
+        select(LearningPathStep, Asset.title, Asset.skill_tag, Asset.difficulty_level)
+        .join(Asset, Asset.id == LearningPathStep.asset_id)
+        .where(LearningPathStep.path_id == path.id)
+        .order_by(LearningPathStep.position)
+    ).all()
+    return [
+        {
+            "position": step.position,
+            "asset_id": step.asset_id,
+            "title": title,
+            "skill": skill,
+            "difficulty_level": difficulty,
+            "status": step.status,
+        }
+        for step, title, skill, difficulty in rows
+    ]
+
+
+def replan_after(session: Session, user_id: str, completed: Set[str], skills: Set[str]):
+    """
+    Fold newly completed assets and mastery changes into an existing path,
+    rewriting only pending steps from the first affected one on. A stale path
+    is re-planned whole; users without a path are planned lazily on read.
+    Does not commit.
+    """
+    _lock_user(session, user_id)
+    path = _current_path(session, user_id)
+    user = session.get(User, user_id)
+    if path is None or user is None:
+        return
+    graph = curriculum.get(session)
+    if _is_stale(path, user, graph):
+        plan_path(session, user, graph)
+        return
+
+    affected = set(completed)
+    for skill in skills:
+        affected.update(graph.skill_assets(skill))
+    pending = session.exec(
+        select(LearningPathStep.position, LearningPathStep.asset_id)
+        .where(LearningPathStep.path_id == path.id, LearningPathStep.status == StepStatus.PENDING)
+        .order_by(LearningPathStep.position)
+    ).all()
+    start = next((index for index, (_, asset_id) in enumerate(pending) if asset_id in affected), None)
+    if start is None:
+        return
+    suffix = [(position, asset_id) for position, asset_id in pending[start:] if asset_id in graph.asset_tier]
+    mastered = _mastered_skills(session, user_id, {graph.asset_tier[asset_id][0] for _, asset_id in suffix})
+    changes = []
+    for position, asset_id in suffix:
+        status = _step_status(graph, asset_id, completed, mastered)
+        if status != StepStatus.PENDING:
+            changes.append({"target_position": position, "new_status": status})
+    if not changes:
+        return
+    table = LearningPathStep.__table__
+    session.execute(
+        update(table)
+        .where(table.c.path_id == path.id, table.c.position == bindparam("target_position"))
+        .values(status=bindparam("new_status")),
+        changes,
+    )
+    if len(changes) == len(pending):
+        path.status = PathStatus.COMPLETED
+    path.updated_at = datetime.utcnow()
+    session.add(path)
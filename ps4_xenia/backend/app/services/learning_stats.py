@@ -0,0 +1,167 @@
+"""
+Incremental per-user learning statistics.
+record_interaction folds each interaction into a UserLearningStats row inside
+the same transaction, so dashboard reads are a single primary-key lookup.
+"""
+from typing import Dict, List, Optional
+from sqlalchemy import case, func, update
+from sqlmodel import Session, select
+from app.core.database import dialect_insert
+from app.models.models import UserInteraction, UserLearningStats, InteractionStatus
+
+# Float tolerance used when comparing score sums during reconciliation
+SCORE_TOLERANCE = 1e-6
+
+
+def stats_delta(interaction: UserInteraction) -> Dict:
+    """Counter increments contributed by a single interaction."""
+    completed = interaction.status == InteractionStatus.COMPLETED
+    scored = completed and interaction.score is not None
+    return {
+        "completed_count": 1 if completed else 0,
+        "score_sum": float(interaction.score) if scored else 0.0,
+        "score_count": 1 if scored else 0,
+        "total_seconds": interaction.time_spent_seconds or 0,
+        "last_activity": interaction.timestamp,
+    }
+
+
+def apply_stats_delta(session: Session, user_id: str, delta: Dict):
+    """
+    Atomically add a delta to the user's stats row with a single UPDATE.
+    The interactions behind the delta must already be flushed: if the user has
+    no stats row yet it is seeded from the raw table, which then includes them.
+    Does not commit: the caller owns the transaction.
+    """
+    table = UserLearningStats.__table__
+    result = session.execute(
+        update(table)
+        .where(table.c.user_id == user_id)
+        .values(
+            completed_count=table.c.completed_count + delta["completed_count"],
+            score_sum=table.c.score_sum + delta["score_sum"],
+            score_count=table.c.score_count + delta["score_count"],
+            total_seconds=table.c.total_seconds + delta["total_seconds"],
+            last_activity=case(
+                (table.c.last_activity.is_(None), delta["last_activity"]),
+                (table.c.last_activity < delta["last_activity"], delta["last_activity"]),
+                else_=table.c.last_activity,
+            ),
+        )
+    )
+    if result.rowcount:
+        return
+
+    if not _seed_stats(session, user_id):
+        # Another transaction seeded the row first; its aggregate cannot see
+        # our uncommitted rows, so add the delta on top.
+        apply_stats_delta(session, user_id, delta)
+
+
+def _seed_stats(session: Session, user_id: str) -> bool:
+    """Insert a stats row computed from UserInteraction; False if one already exists."""
+    stats = compute_user_stats(session, user_id)
+    insert = dialect_insert(session)
+    result = session.execute(
+        insert(UserLearningStats.__table__)
+        .values(**stats.model_dump())
+        .on_conflict_do_nothing(index_elements=["user_id"])
+    )
+    return bool(result.rowcount)
+
+
+def apply_interaction(session: Session, interaction: UserInteraction):
+    """Fold a newly recorded (flushed) interaction into the user's stats row."""
+    session.flush()
+    apply_stats_delta(session, interaction.user_id, stats_delta(interaction))
+
+
+def _aggregate_query():
+    completed = UserInteraction.status == InteractionStatus.COMPLETED
+    scored = completed & UserInteraction.score.isnot(None)
+    return select(
+        UserInteraction.user_id,
+        func.sum(case((completed, 1), else_=0)),
+        func.coalesce(func.sum(case((scored, UserInteraction.score), else_=0.0)), 0.0),
+        func.sum(case((scored, 1), else_=0)),
+        func.coalesce(func.sum(UserInteraction.time_spent_seconds), 0),
+        func.max(UserInteraction.timestamp),
+    ).group_by(UserInteraction.user_id)
+
+
+def _row_to_stats(row) -> UserLearningStats:
+    user_id, completed, score_sum, score_count, seconds, last_activity = row
+    return UserLearningStats(
+        user_id=user_id,
+        completed_count=completed or 0,
+        score_sum=float(score_sum or 0.0),
+        score_count=score_count or 0,
+        total_seconds=seconds or 0,
+        last_activity=last_activity,
+    )
+
+
+def compute_user_stats(session: Session, user_id: str) -> UserLearningStats:
+    """Recompute a user's stats from the raw interaction table (SQL-side aggregate)."""
+    row = session.exec(_aggregate_query().where(UserInteraction.user_id == user_id)).first()
+    if not row:
+        return UserLearningStats(user_id=user_id)
+    return _row_to_stats(row)
+
+
+def get_user_stats(session: Session, user_id: str) -> UserLearningStats:
+    """
+    O(1) stats lookup. Users with history recorded before stats existed get
+    an aggregate over the raw table; reads never write, the row is seeded by
+    their next interaction (or reconcile_learning_stats(repair=True)).
+    """
+    stats = session.get(UserLearningStats, user_id)
+    if stats:
+        return stats
+    return compute_user_stats(session, user_id)
+
+
+def _differs(stored: Optional[UserLearningStats], actual: UserLearningStats) -> bool:
+    if stored is None:
+        return True
+    return (
+        stored.completed_count != actual.completed_count
+        or stored.score_count != actual.score_count
+        or stored.total_seconds != actual.total_seconds
+        or abs(stored.score_sum - actual.score_sum) > SCORE_TOLERANCE
+        or stored.last_activity != actual.last_activity
+    )
+
+
+def reconcile_learning_stats(session: Session, repair: bool = False) -> List[Dict]:
+    """
+    Verify every stats row against a grouped aggregate over UserInteraction.
+    Returns one entry per drifted user; with repair=True the rows are rewritten.
+    """
+    actual = {row[0]: _row_to_stats(row) for row in session.exec(_aggregate_query()).all()}
+    stored = {s.user_id: s for s in session.exec(select(UserLearningStats)).all()}
+
+    mismatches = []
+    for user_id in set(actual) | set(stored):
+        expected = actual.get(user_id, UserLearningStats(user_id=user_id))
+        current = stored.get(user_id)
+        if not _differs(current, expected):
+            continue
+        mismatches.append({
+            "user_id": user_id,
+            "stored": current.model_dump() if current else None,
+            "expected": expected.model_dump(),
+        })
+        if repair:
+            if current is None:
+                current = UserLearningStats(user_id=user_id)
+            current.completed_count = expected.completed_count
+            current.score_sum = expected.score_sum
+            current.score_count = expected.score_count
+            current.total_seconds = expected.total_seconds
+            current.last_activity = expected.last_activity
+            session.add(current)
+
+    if repair and mismatches:
+        session.commit()
+    return mismatches
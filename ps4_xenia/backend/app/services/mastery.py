@@ -0,0 +1,107 @@
+"""
+Skill mastery updates.
+Completed, high-scoring interactions boost proficiency in the asset's skill.
+The mastery event consumer folds a batch of InteractionRecorded events into
+one UPDATE per (user, skill) and reports MasteryThresholdCrossed events.
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import case, update
+from sqlmodel import Session, select
+from app.core.database import dialect_insert
+from app.models.models import InteractionStatus, SkillMastery
+from app.services.event_bus import InteractionRecorded, MasteryThresholdCrossed
+
+MASTERY_SCORE_THRESHOLD = 80  # Minimum score that counts towards mastery
+MASTERY_THRESHOLDS = (50, 80, 100)  # Proficiency levels that trigger MasteryThresholdCrossed
+MAX_PROFICIENCY = 100.0
+
+
+def mastery_increment(status: str, score: Optional[float], skill_tag: Optional[str], difficulty_level: int) -> float:
+    """Proficiency gained from one interaction (0 if it doesn't qualify)."""
+    if status != InteractionStatus.COMPLETED or score is None:
+        return 0.0
+    if score < MASTERY_SCORE_THRESHOLD or not skill_tag:
+        return 0.0
+    return difficulty_level * 2 * (score / 100.0)
+
+
+def fold_increments(events: Iterable[InteractionRecorded]) -> Dict[Tuple[str, str], float]:
+    """Sum increments per (user_id, skill_name). Capping at 100 commutes with summing."""
+    totals: Dict[Tuple[str, str], float] = defaultdict(float)
+    for event in events:
+        increment = mastery_increment(event.status, event.score, event.skill_tag, event.difficulty_level)
+        if increment > 0:
+            totals[(event.user_id, event.skill_tag)] += increment
+    return dict(totals)
+
+
+def crossed_thresholds(before: float, after: float) -> List[int]:
+    return [t for t in MASTERY_THRESHOLDS if before < t <= after]
+
+
+def apply_mastery_increment(session: Session, user_id: str, skill_name: str, increment: float):
+    """
+    Add an increment to a user's proficiency (capped at 100) with one UPDATE,
+    inserting the row if the user has none for this skill yet.
+    Does not commit: the caller owns the transaction.
+    """
+    table = SkillMastery.__table__
+    boosted = table.c.proficiency + increment
+    now = datetime.utcnow()
+    result = session.execute(
+        update(table)
+        .where(table.c.user_id == user_id, table.c.skill_name == skill_name)
+        .values(
+            proficiency=case((boosted > MAX_PROFICIENCY, MAX_PROFICIENCY), else_=boosted),
+            last_updated=now,
+        )
+    )
+    if result.rowcount:
+        return
+
+    insert = dialect_insert(session)
+    result = session.execute(
+        insert(table)
+        .values(**SkillMastery(
+            user_id=user_id,
+            skill_name=skill_name,
+            proficiency=min(MAX_PROFICIENCY, increment),
+            last_updated=now,
+        ).model_dump())
+        .on_conflict_do_nothing()
+    )
+    if not result.rowcount:
+        # Inserted concurrently by another transaction; add on top of it.
+        apply_mastery_increment(session, user_id, skill_name, increment)
+
+
+def apply_mastery_increments(
+    session: Session, increments: Dict[Tuple[str, str], float]
+) -> List[MasteryThresholdCrossed]:
+    """
+    Apply folded increments (one UPDATE/INSERT per (user, skill)) and return
+    the threshold crossings they caused. Does not commit.
+    """
+    if not increments:
+        return []
+    user_ids = {user_id for user_id, _ in increments}
+    current = {
+        (row[0], row[1]): row[2]
+        for row in session.exec(
+            select(SkillMastery.user_id, SkillMastery.skill_name, SkillMastery.proficiency)
+            .where(SkillMastery.user_id.in_(user_ids))
+        ).all()
+    }
+
+    crossings = []
+    for (user_id, skill_name), increment in increments.items():
+        apply_mastery_increment(session, user_id, skill_name, increment)
+        before = current.get((user_id, skill_name), 0.0)
+        after = min(MAX_PROFICIENCY, before + increment)
+        crossings.extend(
+            MasteryThresholdCrossed(user_id=user_id, skill_name=skill_name, threshold=t, proficiency=after)
+            for t in crossed_thresholds(before, after)
+        )
+    return crossings
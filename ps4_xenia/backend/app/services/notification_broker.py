@@ -0,0 +1,159 @@
+"""
+Notification fan-out for streaming (SSE / WebSocket) connections.
+
+Each worker keeps one Redis pub/sub subscription (pattern ``notifications:*``)
+and dispatches incoming messages to the local connections of that user, so
+Redis traffic is independent of the number of open dashboards. Without Redis
+the broker falls back to in-process delivery (single worker only).
+"""
+import asyncio
+import json
+import logging
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, Optional, Set
+from app.core.config import settings
+from app.core.database import redis_client
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "notifications:"
+
+
+class Subscription:
+    """
+    One streaming connection. Messages are buffered in a bounded deque; a slow
+    client that exceeds the message or byte cap is marked overflowed and the
+    stream tells it to resync instead of letting the buffer grow unbounded.
+    """
+    __slots__ = ("user_id", "_buffer", "_buffered_bytes", "_event", "overflowed")
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self._buffer: Deque[str] = deque()
+        self._buffered_bytes = 0
+        self._event = asyncio.Event()
+        self.overflowed = False
+
+    def offer(self, message: str):
+        if self.overflowed:
+            return
+        if (len(self._buffer) >= settings.NOTIFICATION_STREAM_MAX_QUEUE
+                or self._buffered_bytes + len(message) > settings.NOTIFICATION_STREAM_MAX_BYTES):
+            # Backpressure: drop the buffer and force the client to resync
+            self._buffer.clear()
+            self._buffered_bytes = 0
+            self.overflowed = True
+        else:
+            self._buffer.append(message)
+            self._buffered_bytes += len(message)
+        self._event.set()
+
+    async def next(self, timeout: float) -> Optional[str]:
+        """Next buffered message, or None if nothing arrived within timeout (heartbeat due)."""
+        if not self._buffer and not self.overflowed:
+            self._event.clear()
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        if not self._buffer:
+            return None
+        message = self._buffer.popleft()
+        self._buffered_bytes -= len(message)
+        return message
+
+
+class NotificationBroker:
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._redis = None
+        self._listener: Optional[asyncio.Task] = None
+
+    @property
+    def connection_count(self) -> int:
+        return sum(len(subs) for subs in self._subscribers.values())
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        try:
+            import redis.asyncio as aioredis
+            self._redis = aioredis.Redis.from_url(settings.REDIS_URL, decode_responses=True, socket_connect_timeout=1)
+            await self._redis.ping()
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+            self._listener = asyncio.create_task(self._listen(pubsub))
+            logger.info("✅ Notification broker using Redis pub/sub.")
+        except Exception as e:
+            logger.warning(f"⚠️ Redis pub/sub not available ({e}). Notifications fan out in-process only.")
+            self._redis = None
+
+    async def stop(self):
+        if self._listener:
+            self._listener.cancel()
+            self._listener = None
+        if self._redis:
+            await self._redis.close()
+            self._redis = None
+
+    async def _listen(self, pubsub):
+        while True:
+            try:
+                async for message in pubsub.listen():
+                    if message.get("type") != "pmessage":
+                        continue
+                    user_id = message["channel"][len(CHANNEL_PREFIX):]
+                    self._dispatch(user_id, message["data"])
+            except asyncio.CancelledError:
+                await pubsub.close()
+                raise
+            except Exception as e:
+                logger.error(f"❌ Notification listener error: {e}. Reconnecting...")
+                await asyncio.sleep(1)
+
+    def subscribe(self, user_id: str) -> Subscription:
+        subscription = Subscription(user_id)
+        self._subscribers[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subs = self._subscribers.get(subscription.user_id)
+        if subs is None:
+            return
+        subs.discard(subscription)
+        if not subs:
+            del self._subscribers[subscription.user_id]
+
+    def _dispatch(self, user_id: str, message: str):
+        for subscription in list(self._subscribers.get(user_id, ())):
+            subscription.offer(message)
+
+    def publish(self, user_id: str, payload: Dict[str, Any]):
+        """
+        Publish a notification payload to every connection of user_id, on any worker.
+        Safe to call from sync handlers running in the threadpool.
+        """
+        message = json.dumps(payload, default=str)
+        # Go through Redis whenever this process is not a worker with a dead
+        # subscription (scripts/cron jobs have no loop and still publish).
+        if redis_client and (self._loop is None or self._redis is not None):
+            try:
+                redis_client.publish(f"{CHANNEL_PREFIX}{user_id}", message)
+                return
+            except Exception as e:
+                logger.warning(f"⚠️ Redis publish failed ({e}). Delivering in-process.")
+
+        if self._loop is None or self._loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._dispatch(user_id, message)
+        else:
+            self._loop.call_soon_threadsafe(self._dispatch, user_id, message)
+
+
+# Global broker instance (one per worker)
+notification_broker = NotificationBroker()
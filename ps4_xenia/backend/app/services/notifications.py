@@ -0,0 +1,153 @@
+"""
+Notification creation, read-state and retention.
+All code paths that create or read Notification rows should go through here so
+that open notification streams receive them immediately and the per-user
+unread counter stays in step with the table.
+"""
+from datetime import datetime, timedelta
+from typing import List
+from sqlalchemy import case, delete, func, update
+from sqlmodel import Session, select
+from app.core.database import dialect_insert
+from app.models.models import Notification, NotificationCounter
+from app.services.notification_broker import notification_broker
+
+
+def notification_payload(notification: Notification) -> dict:
+    return {
+        "id": notification.id,
+        "user_id": notification.user_id,
+        "message": notification.message,
+        "type": notification.type,
+        "is_read": notification.is_read,
+        "created_at": notification.created_at.isoformat(),
+    }
+
+
+# --- Unread counter ---
+
+def _count_unread(session: Session, user_id: str) -> int:
+    return session.exec(
+        select(func.count(Notification.id))
+        .where(Notification.user_id == user_id)
+        .where(Notification.is_read == False)
+    ).one()
+
+
+def _seed_counter(session: Session, user_id: str) -> bool:
+    """Insert the counter row from a COUNT over the table; False if one already exists."""
+    insert = dialect_insert(session)
+    result = session.execute(
+        insert(NotificationCounter.__table__)
+        .values(user_id=user_id, unread_count=_count_unread(session, user_id))
+        .on_conflict_do_nothing(index_elements=["user_id"])
+    )
+    return bool(result.rowcount)
+
+
+def _adjust_unread(session: Session, user_id: str, delta: int):
+    """
+    Add delta to the user's unread counter in the caller's transaction.
+    Notification rows behind the delta must already be flushed.
+    """
+    table = NotificationCounter.__table__
+    adjusted = table.c.unread_count + delta
+    result = session.execute(
+        update(table)
+        .where(table.c.user_id == user_id)
+        .values(unread_count=case((adjusted < 0, 0), else_=adjusted))
+    )
+    if not result.rowcount and not _seed_counter(session, user_id):
+        _adjust_unread(session, user_id, delta)
+
+
+def get_unread_count(session: Session, user_id: str) -> int:
+    """Counter lookup; users without a counter row yet are counted (reads never write)."""
+    counter = session.get(NotificationCounter, user_id)
+    if counter is None:
+        return _count_unread(session, user_id)
+    return counter.unread_count
+
+
+# --- Writes ---
+
+def add_notification(session: Session, user_id: str, message: str, type: str = "info") -> dict:
+    """
+    Stage a notification (and its unread-counter increment) in the caller's
+    transaction. Returns its stream payload: pass it to publish_notifications()
+    once the transaction has committed.
+    """
+    notification = Notification(user_id=user_id, message=message, type=type)
+    session.add(notification)
+    session.flush()
+    _adjust_unread(session, user_id, 1)
+    return notification_payload(notification)
+
+
+def publish_notifications(payloads: List[dict]):
+    """Push committed notifications to their users' open streams."""
+    for payload in payloads:
+        notification_broker.publish(payload["user_id"], payload)
+
+
+def create_notification(session: Session, user_id: str, message: str, type: str = "info") -> Notification:
+    """Persist a single notification, commit, and push it to the user's open streams."""
+    payload = add_notification(session, user_id, message, type)
+    session.commit()
+    publish_notifications([payload])
+    return session.get(Notification, payload["id"])
+
+
+def mark_read(session: Session, user_id: str, notification_ids: List[str]) -> int:
+    """Mark the given notifications read with one UPDATE; returns how many changed."""
+    if not notification_ids:
+        return 0
+    result = session.execute(
+        update(Notification)
+        .where(Notification.user_id == user_id)
+        .where(Notification.id.in_(notification_ids))
+        .where(Notification.is_read == False)
+        .values(is_read=True)
+    )
+    if result.rowcount:
+        _adjust_unread(session, user_id, -result.rowcount)
+    session.commit()
+    return result.rowcount
+
+
+def mark_all_read(session: Session, user_id: str) -> int:
+    """Mark every unread notification of the user read with one UPDATE."""
+    result = session.execute(
+        update(Notification)
+        .where(Notification.user_id == user_id)
+        .where(Notification.is_read == False)
+        .values(is_read=True)
+    )
+    if result.rowcount:
+        _adjust_unread(session, user_id, -result.rowcount)
+    session.commit()
+    return result.rowcount
+
+
+# --- Retention ---
+
+def compact_read_notifications(session: Session, older_than_days: int, batch_size: int = 1000) -> int:
+    """
+    Delete read notifications older than the cutoff in batches of batch_size,
+    committing per batch so locks stay short. Unread rows are never removed,
+    so the unread counters are unaffected. Returns the number of rows deleted.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    deleted = 0
+    while True:
+        ids = session.exec(
+            select(Notification.id)
+            .where(Notification.is_read == True)
+            .where(Notification.created_at < cutoff)
+            .limit(batch_size)
+        ).all()
+        if not ids:
+            return deleted
+        session.execute(delete(Notification).where(Notification.id.in_(ids)))
+        session.commit()
+        deleted += len(ids)
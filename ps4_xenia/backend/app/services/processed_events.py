@@ -0,0 +1,61 @@
+"""
+Idempotent event consumers.
+
+The event bus delivers at least once: a batch is retried after a failure and
+Redis Streams replay entries that were handled but not acknowledged (a
+worker crash, a failed XACK). Consumers that apply additive deltas claim
+their events first: claim_events() records (subscriber, event key) rows in
+the consumer's own transaction and returns only the events not applied
+before, so the deltas and the record of having applied them commit together.
+Rows are only needed while a redelivery is possible; prune_processed_events.py
+deletes old ones.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, Sequence
+from sqlalchemy import delete, tuple_
+from sqlmodel import Session, select
+from app.models.models import ProcessedEvent
+from app.services.event_bus import Event
+
+
+def claim_events(session: Session, subscriber: str, events: Sequence[Event]) -> List[Event]:
+    """
+    Mark the events as processed by `subscriber` (does not commit) and return
+    those it has not processed before, without duplicates. A concurrent claim
+    of the same event fails the commit on the primary key; the retry skips it.
+    """
+    by_key: Dict[str, Event] = {}
+    for event in events:
+        by_key.setdefault(event.dedup_key, event)
+    if not by_key:
+        return []
+    done = set(session.exec(
+        select(ProcessedEvent.event_key)
+        .where(ProcessedEvent.subscriber == subscriber)
+        .where(ProcessedEvent.event_key.in_(list(by_key)))
+    ).all())
+    fresh = [event for key, event in by_key.items() if key not in done]
+    if fresh:
+        now = datetime.utcnow()
+        session.execute(
+            ProcessedEvent.__table__.insert(),
+            [{"subscriber": subscriber, "event_key": event.dedup_key, "processed_at": now} for event in fresh],
+        )
+    return fresh
+
+
+def prune_processed_events(session: Session, older_than_days: int, batch_size: int = 1000) -> int:
+    """Delete claims older than the cutoff in batches, committing per batch. Returns rows deleted."""
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    table = ProcessedEvent.__table__
+    deleted = 0
+    while True:
+        keys = session.execute(
+            select(table.c.subscriber, table.c.event_key).where(table.c.processed_at < cutoff).limit(batch_size)
+        ).all()
+        if not keys:
+            return deleted
+        pairs = [tuple(key) for key in keys]
+        session.execute(delete(table).where(tuple_(table.c.subscriber, table.c.event_key).in_(pairs)))
+        session.commit()
+        deleted += len(keys)
@@ -0,0 +1,174 @@
+"""
+Coalesced progress heartbeats.
+
+Players report watch time every few seconds. A heartbeat only adds to an
+in-process map keyed by (user, asset); a periodic task writes everything
+accumulated since the last flush to AssetProgress in one bulk upsert. The
+upsert is additive, so every worker flushes its own map independently and a
+crash loses at most one flush interval of watch time.
+
+Heartbeats are accepted without a database lookup, so ids are checked at
+flush time: keys whose user or asset doesn't exist are dropped (counted in
+progress_rows_dropped_total), and a row that still fails its foreign keys
+(deleted mid-flush) is dropped on its own rather than failing the batch.
+Only transient errors put time back for the next flush.
+"""
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+from app.core.config import settings
+from app.core.database import dialect_insert, engine
+from app.core.metrics import metrics
+from app.models.models import Asset, AssetProgress, User
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[str, str]
+
+
+class ProgressAccumulator:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (user_id, asset_id) -> [seconds, position, last_seen_epoch]
+        self._pending: Dict[Key, list] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, user_id: str, asset_id: str, seconds: int, position: Optional[int] = None):
+        now = time.time()
+        with self._lock:
+            entry = self._pending.get((user_id, asset_id))
+            if entry is None:
+                self._pending[(user_id, asset_id)] = [seconds, position, now]
+            else:
+                entry[0] += seconds
+                if position is not None:
+                    entry[1] = position
+                entry[2] = now
+
+    def pending_seconds(self, user_id: str, asset_id: str) -> int:
+        """Seconds accumulated on this worker but not yet flushed."""
+        with self._lock:
+            entry = self._pending.get((user_id, asset_id))
+            return entry[0] if entry else 0
+
+    # --- Flushing ---
+
+    def _restore(self, pending: Dict[Key, list]):
+        with self._lock:
+            for key, (seconds, position, seen) in pending.items():
+                entry = self._pending.get(key)
+                if entry is None:
+                    self._pending[key] = [seconds, position, seen]
+                else:
+                    entry[0] += seconds
+                    if entry[1] is None:
+                        entry[1] = position
+
+    @staticmethod
+    def _upsert(session: Session, rows: List[dict]):
+        insert = dialect_insert(session)
+        statement = insert(AssetProgress.__table__)
+        table = AssetProgress.__table__
+        session.execute(
+            statement.on_conflict_do_update(
+                index_elements=["user_id", "asset_id"],
+                set_={
+                    "watched_seconds": table.c.watched_seconds + statement.excluded.watched_seconds,
+                    "position_seconds": func.coalesce(
+                        statement.excluded.position_seconds, table.c.position_seconds
+                    ),
+                    "last_heartbeat": statement.excluded.last_heartbeat,
+                },
+            ),
+            rows,
+        )
+
+    @staticmethod
+    def _known_keys(session: Session, keys) -> set:
+        user_ids = {user_id for user_id, _ in keys}
+        asset_ids = {asset_id for _, asset_id in keys}
+        users = set(session.exec(select(User.id).where(User.id.in_(user_ids))).all())
+        assets = set(session.exec(select(Asset.id).where(Asset.id.in_(asset_ids))).all())
+        return {key for key in keys if key[0] in users and key[1] in assets}
+
+    def _upsert_rows_individually(self, session: Session, rows: List[dict]) -> List[dict]:
+        """Fallback after an IntegrityError: one savepoint per row, dropping the rows that fail."""
+        written = []
+        for row in rows:
+            try:
+                with session.begin_nested():
+                    self._upsert(session, [row])
+                written.append(row)
+            except IntegrityError:
+                logger.warning(f"⚠️ Dropping progress for unknown user/asset {row['user_id']}/{row['asset_id']}")
+        return written
+
+    def flush(self) -> int:
+        """Write everything accumulated so far in one bulk upsert; returns rows written."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        known = None
+        try:
+            with Session(engine) as session:
+                known = self._known_keys(session, pending.keys())
+                rows: List[dict] = [
+                    {
+                        "user_id": user_id,
+                        "asset_id": asset_id,
+                        "watched_seconds": seconds,
+                        "position_seconds": position,
+                        "last_heartbeat": datetime.utcfromtimestamp(seen),
+                    }
+                    for (user_id, asset_id), (seconds, position, seen) in pending.items()
+                    if (user_id, asset_id) in known
+                ]
+                if rows:
+                    try:
+                        with session.begin_nested():
+                            self._upsert(session, rows)
+                    except IntegrityError:
+                        rows = self._upsert_rows_individually(session, rows)
+                session.commit()
+        except Exception:
+            # Transient failure: keep the (valid) time for the next flush rather than dropping it
+            if known is not None:
+                pending = {key: value for key, value in pending.items() if key in known}
+            self._restore(pending)
+            raise
+        dropped = len(pending) - len(rows)
+        if dropped:
+            metrics.inc("progress_rows_dropped_total", dropped)
+        metrics.inc("progress_rows_flushed_total", len(rows))
+        return len(rows)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.PROGRESS_FLUSH_SECONDS)
+            try:
+                await asyncio.to_thread(self.flush)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Progress flush failed: {e}")
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        await asyncio.to_thread(self.flush)
+
+
+# Global accumulator (one per worker)
+progress_accumulator = ProgressAccumulator()
@@ -0,0 +1,60 @@
+"""
+Deferred next-asset recommendations.
+record_interaction (and the batch endpoint, for every high scorer at once)
+schedules the computation as a background task and returns a handle; the
+result is cached under that handle for the client to pick up.
+"""
+import json
+import logging
+from typing import Dict, Optional
+from uuid import uuid4
+from sqlmodel import Session
+from app.core.cache import cache_store
+from app.core.database import engine
+from app.core.serialization import dumps
+from app.services.adaptive_engine import AdaptiveEngine
+from app.services.answer_keys import without_answers
+
+logger = logging.getLogger(__name__)
+
+RECOMMENDATION_TTL = 600
+
+PENDING = "pending"
+READY = "ready"
+
+
+def _key(user_id: str, handle: str) -> str:
+    return f"recommendation:{user_id}:{handle}"
+
+
+def reserve_recommendation(user_id: str) -> str:
+    """Create a handle in the pending state; the caller schedules compute_recommendation."""
+    handle = uuid4().hex
+    cache_store.set_bytes(_key(user_id, handle), dumps({"status": PENDING}), expire=RECOMMENDATION_TTL)
+    return handle
+
+
+def compute_recommendation(user_id: str, handle: str):
+    """Background task: runs after the response is sent, with its own session."""
+    compute_recommendations({user_id: handle})
+
+
+def compute_recommendations(handles: Dict[str, str]):
+    """Background task for several users ({user_id: handle}), sharing one session."""
+    with Session(engine) as session:
+        adaptive = AdaptiveEngine(session)
+        for user_id, handle in handles.items():
+            try:
+                asset = adaptive.recommend_next_asset(user_id)
+                payload = {"status": READY, "asset": without_answers(asset) if asset else None}
+            except Exception as e:
+                session.rollback()
+                logger.error(f"❌ Recommendation for {user_id} failed: {e}")
+                payload = {"status": READY, "asset": None}
+            cache_store.set_bytes(_key(user_id, handle), dumps(payload), expire=RECOMMENDATION_TTL)
+
+
+def get_recommendation(user_id: str, handle: str) -> Optional[dict]:
+    """{'status': 'pending'} or {'status': 'ready', 'asset': ...}; None for unknown/expired handles."""
+    raw = cache_store.get_bytes(_key(user_id, handle))
+    return json.loads(raw) if raw is not None else None
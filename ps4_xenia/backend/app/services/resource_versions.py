@@ -0,0 +1,155 @@
+"""
+Version tokens for ETag generation.
+
+Each token is derived from row versions (Asset.current_version/updated_at,
+User.updated_at, catalog aggregates) and kept in the cache, so conditional GETs
+can be answered with 304 without touching the database. Writers invalidate the
+relevant token; the next read re-derives it from the row.
+"""
+import hashlib
+import time
+from typing import Callable, Iterable, Optional
+from uuid import uuid4
+from sqlalchemy import func
+from sqlmodel import Session, select
+from app.core.cache import cache_store
+from app.core.config import settings
+from app.models.models import Asset, SkillPrerequisite, User
+
+VERSION_TTL = 86400
+
+
+def _cached_version(key: str, load: Callable[[], Optional[str]]) -> Optional[str]:
+    version = cache_store.get(key)
+    if version is None:
+        version = load()
+        if version is not None:
+            cache_store.set(key, version, expire=VERSION_TTL)
+    return version
+
+
+def catalog_version(session: Session) -> str:
+    """Changes whenever any live asset is added, edited or archived."""
+    def load():
+        count, last_updated, version_sum = session.exec(
+            select(func.count(Asset.id), func.max(Asset.updated_at), func.sum(Asset.current_version))
+            .where(Asset.is_active == True, Asset.is_archived == False)
+        ).one()
+        return f"{count}:{last_updated}:{version_sum}"
+    return _cached_version("version:catalog", load)
+
+
+def asset_version(session: Session, asset_id: str) -> Optional[str]:
+    """Version of a single non-archived asset, or None if it doesn't exist / is archived."""
+    def load():
+        row = session.exec(
+            select(Asset.current_version, Asset.updated_at)
+            .where(Asset.id == asset_id, Asset.is_archived == False)
+        ).first()
+        return f"{row[0]}:{row[1]}" if row else None
+    return _cached_version(f"version:asset:{asset_id}", load)
+
+
+def user_version(session: Session, user_id: str) -> Optional[str]:
+    def load():
+        row = session.exec(select(User.updated_at, User.last_login).where(User.id == user_id)).first()
+        return f"{row[0]}:{row[1]}" if row else None
+    return _cached_version(f"version:user:{user_id}", load)
+
+
+def state_version(user_id: str) -> str:
+    """
+    Per-user learning state version (interactions, mastery). There is no single
+    row to derive it from, so it is a random token regenerated on every change;
+    losing it from the cache only costs clients one full download.
+    """
+    return _cached_version(f"version:state:{user_id}", lambda: uuid4().hex)
+
+
+def _minted_token() -> str:
+    return f"{int(time.time())}.{uuid4().hex}"
+
+
+def _minted_at(token: str) -> float:
+    try:
+        return float(token.split(".", 1)[0])
+    except ValueError:
+        return 0.0
+
+
+def department_version(department: str) -> str:
+    """
+    Department analytics version; a random token like state_version, stamped
+    with its mint time. The rollup consumers bump it at most once per
+    DEPARTMENT_VERSION_MIN_INTERVAL_SECONDS: a change within the interval only
+    marks the token stale, and the first read after the interval re-mints it.
+    """
+    key = f"version:department:{department}"
+    version = _cached_version(key, _minted_token)
+    interval = settings.DEPARTMENT_VERSION_MIN_INTERVAL_SECONDS
+    if time.time() - _minted_at(version) >= interval and cache_store.get(f"{key}:stale"):
+        cache_store.delete(f"{key}:stale")
+        version = _minted_token()
+        cache_store.set(key, version, expire=VERSION_TTL)
+    return version
+
+
+def skill_gap_version() -> str:
+    """Org skill-gap version; bumped by profile skill changes and mastery updates."""
+    return _cached_version("version:skill_gaps", lambda: uuid4().hex)
+
+
+def prerequisite_version(session: Session) -> str:
+    """Digest of the skill prerequisite edges (a small table, hashed only on a cache miss)."""
+    def load():
+        edges = session.exec(
+            select(SkillPrerequisite.skill, SkillPrerequisite.prerequisite_skill)
+            .order_by(SkillPrerequisite.skill, SkillPrerequisite.prerequisite_skill)
+        ).all()
+        return hashlib.md5(repr(edges).encode()).hexdigest()[:16]
+    return _cached_version("version:prerequisites", load)
+
+
+# --- Invalidation ---
+
+def invalidate_catalog():
+    cache_store.delete("version:catalog")
+
+
+def invalidate_asset(asset_id: str):
+    cache_store.delete(f"version:asset:{asset_id}")
+    invalidate_catalog()
+
+
+def invalidate_assets(asset_ids: Iterable[str]):
+    """Bulk variant: drop each asset's token, then the catalog token once."""
+    for asset_id in asset_ids:
+        cache_store.delete(f"version:asset:{asset_id}")
+    invalidate_catalog()
+
+
+def invalidate_user(user_id: str):
+    cache_store.delete(f"version:user:{user_id}")
+
+
+def bump_state_version(user_id: str):
+    cache_store.set(f"version:state:{user_id}", uuid4().hex, expire=VERSION_TTL)
+
+
+def bump_department_version(department: str, throttle: bool = False):
+    """`throttle`: only mark a token minted within the last interval stale (see department_version)."""
+    key = f"version:department:{department}"
+    if throttle:
+        version = cache_store.get(key)
+        if version is not None and time.time() - _minted_at(version) < settings.DEPARTMENT_VERSION_MIN_INTERVAL_SECONDS:
+            cache_store.set(f"{key}:stale", "1", expire=VERSION_TTL)
+            return
+    cache_store.set(key, _minted_token(), expire=VERSION_TTL)
+
+
+def bump_skill_gap_version():
+    cache_store.set("version:skill_gaps", uuid4().hex, expire=VERSION_TTL)
+
+
+def invalidate_prerequisites():
+    cache_store.delete("version:prerequisites")
@@ -0,0 +1,315 @@
+"""
+Resumable (tus-style) uploads.
+
+An upload is created with its total length, then filled with PATCH requests
+that each append a chunk at the current offset; after a dropped connection
+the client asks for the offset (HEAD) and continues from there. Finalizing a
+complete upload turns its partial file into a content-addressed blob and a
+new AssetVersion.
+
+The AssetUpload row is the source of truth: the offset is only advanced after
+a chunk is on disk, and a PATCH first truncates the partial file to the
+recorded offset, so a crash mid-chunk just loses that chunk. A short lease on
+the row keeps two requests (on any worker) from appending at once. The lease
+carries a token: a PATCH that stalled past its lease and was taken over can
+neither renew it nor record its offset, so it stops writing instead.
+
+Hashing: each worker keeps the running SHA-256 of uploads it is appending to;
+if the chunks were spread over workers or a restart lost it, finalize
+re-hashes the partial file from disk.
+"""
+import asyncio
+import base64
+import binascii
+import hashlib
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+from uuid import uuid4
+from sqlalchemy import or_, update
+from sqlmodel import Session, select
+from app.core.config import settings
+from app.core.database import engine
+from app.core.metrics import metrics
+from app.models.models import Asset, AssetUpload, AssetVersion
+from app.services.content_store import content_store
+from app.services.uploads import StoredBlob, UploadError, announce_content_version, stage_content_version
+
+logger = logging.getLogger(__name__)
+
+TUS_VERSION = "1.0.0"
+CONTENT_TYPE = "application/offset+octet-stream"
+HASH_BLOCK = 1024 * 1024
+
+# upload_id -> (offset the hash covers, running sha256) for uploads appended on this worker
+_hashers: Dict[str, Tuple[int, "hashlib._Hash"]] = {}
+_hashers_lock = threading.Lock()
+
+
+def parse_metadata(header: Optional[str]) -> Dict[str, str]:
+    """Decode an Upload-Metadata header: comma-separated `key base64value` pairs."""
+    metadata = {}
+    for pair in (header or "").split(","):
+        parts = pair.strip().split(" ")
+        if not parts[0]:
+            continue
+        try:
+            metadata[parts[0]] = base64.b64decode(parts[1]).decode() if len(parts) > 1 else ""
+        except (binascii.Error, UnicodeDecodeError):
+            raise UploadError(400, f"Invalid Upload-Metadata value for '{parts[0]}'")
+    return metadata
+
+
+def _expiry() -> datetime:
+    return datetime.utcnow() + timedelta(hours=settings.UPLOAD_EXPIRY_HOURS)
+
+
+def create_upload(session: Session, asset: Asset, user_id: str, length: int, metadata: Dict[str, str]) -> AssetUpload:
+    if length < 0:
+        raise UploadError(400, "Upload-Length must be non-negative")
+    if length > settings.MAX_UPLOAD_BYTES:
+        raise UploadError(413, f"Upload exceeds {settings.MAX_UPLOAD_BYTES} bytes")
+    upload = AssetUpload(
+        asset_id=asset.id,
+        created_by=user_id,
+        filename=metadata.get("filename") or "content",
+        content_type=metadata.get("content_type"),
+        upload_length=length,
+        expires_at=_expiry(),
+    )
+    session.add(upload)
+    session.commit()
+    session.refresh(upload)
+    metrics.inc("resumable_uploads_created_total")
+    return upload
+
+
+def get_upload(session: Session, upload_id: str) -> AssetUpload:
+    upload = session.get(AssetUpload, upload_id)
+    if not upload or upload.expires_at < datetime.utcnow():
+        raise UploadError(404, "Upload not found")
+    # The partial file can only be behind the row if the disk lost data; trust the disk.
+    # Not committed here (HEAD must not write): a PATCH or finalize persists it with its own commit.
+    if upload.version_id is None and content_store.partial_size(upload.id) < upload.upload_offset:
+        upload.upload_offset = content_store.partial_size(upload.id)
+        session.add(upload)
+    return upload
+
+
+# --- Appending chunks ---
+
+def _lease_lost() -> UploadError:
+    metrics.inc("resumable_upload_leases_lost_total")
+    return UploadError(409, "Upload lease was taken over by another request; resume from the current offset")
+
+
+def claim(session: Session, upload: AssetUpload, offset: int) -> str:
+    """
+    Take the append lease for a chunk starting at `offset` (409 on offset
+    mismatch, 423 if busy); returns the lease token for renew_lease/release.
+    """
+    if upload.version_id is not None:
+        raise UploadError(409, "Upload is already finalized")
+    if offset != upload.upload_offset:
+        raise UploadError(409, f"Upload-Offset {offset} does not match current offset {upload.upload_offset}")
+    now = datetime.utcnow()
+    lease = uuid4().hex
+    result = session.execute(
+        update(AssetUpload)
+        .where(AssetUpload.id == upload.id)
+        .where(AssetUpload.upload_offset == offset)
+        .where(or_(AssetUpload.locked_until.is_(None), AssetUpload.locked_until < now))
+        .values(locked_until=now + timedelta(seconds=settings.UPLOAD_LEASE_SECONDS), lease_token=lease)
+    )
+    session.commit()
+    if result.rowcount == 0:
+        raise UploadError(423, "Another request is appending to this upload")
+    return lease
+
+
+def renew_lease(session: Session, upload_id: str, lease: str):
+    """Extend the lease; 409 if another request has taken the upload over since."""
+    result = session.execute(
+        update(AssetUpload)
+        .where(AssetUpload.id == upload_id)
+        .where(AssetUpload.lease_token == lease)
+        .values(locked_until=datetime.utcnow() + timedelta(seconds=settings.UPLOAD_LEASE_SECONDS))
+    )
+    session.commit()
+    if result.rowcount == 0:
+        raise _lease_lost()
+
+
+class ChunkWriter:
+    """Appends one PATCH body to the partial file, keeping this worker's running hash in step."""
+
+    def __init__(self, upload: AssetUpload):
+        self.upload_id = upload.id
+        self.limit = upload.upload_length
+        self.start = self.offset = upload.upload_offset
+        self.file = content_store.open_partial(upload.id, self.offset)
+        with _hashers_lock:
+            cached = _hashers.pop(upload.id, None)
+        if cached is not None and cached[0] == self.offset:
+            self.sha256 = cached[1]
+        elif self.offset == 0:
+            self.sha256 = hashlib.sha256()
+        else:
+            self.sha256 = None  # Earlier chunks went elsewhere; finalize re-hashes from disk
+
+    def write(self, data: bytes):
+        if self.offset + len(data) > self.limit:
+            raise UploadError(413, f"Chunk extends past Upload-Length {self.limit}")
+        self.file.write(data)
+        self.file.flush()  # Nothing buffered may reach the file after the lease is lost
+        if self.sha256 is not None:
+            self.sha256.update(data)
+        self.offset += len(data)
+
+    def close(self) -> int:
+        """Make the chunk durable and return the new offset."""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        return self.offset
+
+    def keep_hash(self):
+        """Cache the running hash for this worker's next chunk (only once the offset is recorded)."""
+        if self.sha256 is not None:
+            with _hashers_lock:
+                _hashers[self.upload_id] = (self.offset, self.sha256)
+
+
+def release(session: Session, upload: AssetUpload, writer: ChunkWriter, lease: str):
+    """
+    Close the chunk, record the bytes now on disk and drop the lease. If the
+    lease was taken over the row is left alone (409): the new holder already
+    truncated the partial file to the offset it recorded.
+    """
+    offset = writer.close()
+    result = session.execute(
+        update(AssetUpload)
+        .where(AssetUpload.id == upload.id)
+        .where(AssetUpload.lease_token == lease)
+        .values(upload_offset=offset, locked_until=None, lease_token=None, expires_at=_expiry())
+    )
+    session.commit()
+    if result.rowcount == 0:
+        raise _lease_lost()
+    writer.keep_hash()
+    metrics.inc("resumable_upload_bytes_total", offset - writer.start)
+
+
+# --- Finalize / terminate ---
+
+def _digest(upload: AssetUpload) -> str:
+    with _hashers_lock:
+        cached = _hashers.pop(upload.id, None)
+    if cached is not None and cached[0] == upload.upload_length:
+        return cached[1].hexdigest()
+    sha256 = hashlib.sha256()
+    with open(content_store.partial_name(upload.id), "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            sha256.update(block)
+    metrics.inc("resumable_upload_rehash_total")
+    return sha256.hexdigest()
+
+
+def finalize(session: Session, upload: AssetUpload, user_id: str) -> Tuple[AssetVersion, StoredBlob]:
+    """Turn a complete upload into the asset's next version. Repeating it returns the same version."""
+    if upload.version_id is not None:
+        # Retried finalize (e.g. the first response was lost): nothing new is stored
+        version = session.get(AssetVersion, upload.version_id)
+        return version, StoredBlob(digest=upload.sha256, size=upload.upload_length, deduplicated=True)
+    if upload.upload_offset != upload.upload_length:
+        raise UploadError(409, f"Upload incomplete: {upload.upload_offset} of {upload.upload_length} bytes received")
+    if upload.locked_until and upload.locked_until > datetime.utcnow():
+        raise UploadError(423, "Upload is still being written")
+
+    asset = session.get(Asset, upload.asset_id)
+    if not asset:
+        raise UploadError(404, "Asset not found")
+
+    content_store.open_partial(upload.id, upload.upload_length).close()  # Drop any unacknowledged tail
+    digest = _digest(upload)
+    created = content_store.commit_blob(content_store.partial_name(upload.id), digest)
+    blob = StoredBlob(digest=digest, size=upload.upload_length, deduplicated=not created)
+
+    # The new version and the upload's link to it commit together, so a crash can't
+    # leave a version the upload doesn't know about (and a retry publishing another)
+    version = stage_content_version(session, asset, blob, upload.filename, user_id, content_type=upload.content_type)
+    upload.sha256 = digest
+    upload.version_id = version.id
+    session.add(upload)
+    session.commit()
+    session.refresh(version)
+    announce_content_version(asset, version)
+    metrics.inc("resumable_uploads_finalized_total")
+    return version, blob
+
+
+def terminate(session: Session, upload: AssetUpload):
+    with _hashers_lock:
+        _hashers.pop(upload.id, None)
+    content_store.delete_partial(upload.id)
+    session.delete(upload)
+    session.commit()
+
+
+# --- Garbage collection ---
+
+def expire_uploads(session: Session) -> int:
+    """Delete uploads idle past their expiry (and their partial files); returns how many."""
+    now = datetime.utcnow()
+    expired = session.exec(
+        select(AssetUpload)
+        .where(AssetUpload.expires_at < now)
+        .where(or_(AssetUpload.locked_until.is_(None), AssetUpload.locked_until < now))
+    ).all()
+    for upload in expired:
+        with _hashers_lock:
+            _hashers.pop(upload.id, None)
+        content_store.delete_partial(upload.id)
+        session.delete(upload)
+    session.commit()
+    return len(expired)
+
+
+class UploadJanitor:
+    """Periodically removes abandoned resumable uploads and stale scratch files."""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def sweep(self) -> Tuple[int, int]:
+        with Session(engine) as session:
+            uploads = expire_uploads(session)
+        temp_files = content_store.sweep_temp(settings.UPLOAD_EXPIRY_HOURS * 3600)
+        if uploads or temp_files:
+            metrics.inc("resumable_uploads_expired_total", uploads)
+            logger.info(f"🧹 Removed {uploads} abandoned upload(s) and {temp_files} stale temp file(s).")
+        return uploads, temp_files
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.sweep)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Upload cleanup failed: {e}")
+            await asyncio.sleep(settings.UPLOAD_GC_INTERVAL_SECONDS)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+
+# Global janitor (one per worker; sweeps are idempotent)
+upload_janitor = UploadJanitor()
@@ -0,0 +1,275 @@
+"""
+Organization skill-gap matrix.
+
+A sparse users x skills structure built from User.current_skills,
+User.target_skills and SkillMastery.proficiency, over an interned skill
+vocabulary (skill name -> dense integer code):
+
+- a user's *gaps* are their target skills they don't hold yet: not listed in
+  current_skills and below PROFICIENT in SkillMastery. The gap size is
+  1 - proficiency / 100.
+- a user's *holdings* are current_skills (weight 1.0) plus any skill with
+  SkillMastery progress (proficiency / 100).
+
+Per-department counters of (learners with gap, gap sum) per skill are kept up
+to date as rows change, so org-wide and per-department gap reports cost
+O(skills), not O(users). Similar-learner lookups use an inverted index from
+feature (skill held / skill wanted) to users, so a lookup only touches users
+sharing at least one feature.
+
+Each worker keeps its own matrix, refreshed per user rather than rebuilt:
+profile and mastery writers bump skill_gap_version(); the next read that sees
+a new token (or finds the matrix older than SKILL_GAP_MAX_AGE_SECONDS) reloads
+only the users whose User.updated_at or SkillMastery.last_updated moved past
+the last refresh (minus REFRESH_SAFETY_LAG for transactions in flight).
+"""
+import heapq
+import logging
+import math
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlmodel import Session, select
+from app.core.config import settings
+from app.core.database import engine
+from app.models.models import SkillMastery, User
+from app.services.resource_versions import skill_gap_version
+
+logger = logging.getLogger(__name__)
+
+PROFICIENT = 80  # Proficiency at which a target skill no longer counts as a gap
+REFRESH_SAFETY_LAG = timedelta(seconds=60)
+LOAD_BATCH_USERS = 1000  # Users per IN (...) when reloading changed rows
+HELD, WANTED = 0, 1  # Feature kinds for similarity: feature code = skill code * 2 + kind
+
+
+class SkillVocabulary:
+    """Interns skill names to dense integer codes (append-only)."""
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.codes: Dict[str, int] = {}
+
+    def code(self, name: str) -> int:
+        code = self.codes.get(name)
+        if code is None:
+            code = self.codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+
+@dataclass
+class SkillRow:
+    """One user's sparse row: skill code -> weight."""
+    department: Optional[str]
+    held: Dict[int, float] = field(default_factory=dict)
+    gaps: Dict[int, float] = field(default_factory=dict)
+    targets: Set[int] = field(default_factory=set)
+    norm: float = 0.0
+
+    def features(self) -> Iterable[Tuple[int, float]]:
+        for skill, weight in self.held.items():
+            yield skill * 2 + HELD, weight
+        for skill, weight in self.gaps.items():
+            yield skill * 2 + WANTED, weight
+
+
+class SkillGapMatrix:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        self.vocabulary = SkillVocabulary()
+        self.rows: Dict[str, SkillRow] = {}
+        # Column side: feature -> {user_id: weight}, for similarity candidates
+        self.postings: Dict[int, Dict[str, float]] = defaultdict(dict)
+        # department -> skill -> [learners with gap, gap sum, learners targeting]
+        self.department_counts: Dict[Optional[str], Dict[int, List[float]]] = defaultdict(
+            lambda: defaultdict(lambda: [0, 0.0, 0])
+        )
+        self.refreshed_at: Optional[datetime] = None
+        self._checked_at = 0.0
+        self._seen_version: Optional[str] = None
+
+    # --- Row maintenance ---
+
+    def _build_row(
+        self,
+        department: Optional[str],
+        current_skills: Optional[List[str]],
+        target_skills: Optional[List[str]],
+        proficiency: Dict[str, float],
+    ) -> SkillRow:
+        code = self.vocabulary.code
+        row = SkillRow(department=department)
+        for name, value in proficiency.items():
+            if value > 0:
+                row.held[code(name)] = min(value, 100.0) / 100
+        for name in current_skills or []:
+            row.held[code(name)] = 1.0
+        for name in target_skills or []:
+            skill = code(name)
+            row.targets.add(skill)
+            held = row.held.get(skill, 0.0)
+            if held * 100 < PROFICIENT:
+                row.gaps[skill] = 1 - held
+        row.norm = math.sqrt(sum(weight * weight for _, weight in row.features()))
+        return row
+
+    def _remove(self, user_id: str):
+        row = self.rows.pop(user_id, None)
+        if row is None:
+            return
+        counts = self.department_counts[row.department]
+        for skill in row.targets:
+            counts[skill][2] -= 1
+        for skill, gap in row.gaps.items():
+            entry = counts[skill]
+            entry[0] -= 1
+            entry[1] -= gap
+        for feature, _ in row.features():
+            self.postings[feature].pop(user_id, None)
+
+    def _add(self, user_id: str, row: SkillRow):
+        self.rows[user_id] = row
+        counts = self.department_counts[row.department]
+        for skill in row.targets:
+            counts[skill][2] += 1
+        for skill, gap in row.gaps.items():
+            entry = counts[skill]
+            entry[0] += 1
+            entry[1] += gap
+        for feature, weight in row.features():
+            self.postings[feature][user_id] = weight
+
+    def _load_users(self, session: Session, user_ids: Optional[Set[str]] = None) -> int:
+        """(Re)load rows for the given users, or everyone. Does not take the lock."""
+        users = select(User.id, User.department, User.current_skills, User.target_skills)
+        mastery = select(SkillMastery.user_id, SkillMastery.skill_name, SkillMastery.proficiency)
+        if user_ids is not None:
+            users = users.where(User.id.in_(user_ids))
+            mastery = mastery.where(SkillMastery.user_id.in_(user_ids))
+        proficiency: Dict[str, Dict[str, float]] = defaultdict(dict)
+        for user_id, skill_name, value in session.execute(mastery):
+            proficiency[user_id][skill_name] = value or 0.0
+        loaded = 0
+        for user_id, department, current_skills, target_skills in session.execute(users):
+            self._remove(user_id)
+            self._add(user_id, self._build_row(department, current_skills, target_skills, proficiency[user_id]))
+            loaded += 1
+        return loaded
+
+    # --- Refresh ---
+
+    def refresh(self, full: bool = False) -> int:
+        """Reload changed users (or everyone); returns the number of rows loaded."""
+        start = time.perf_counter()
+        with self._lock:
+            version = skill_gap_version()
+            started_at = datetime.utcnow()
+            rebuilt = full or self.refreshed_at is None
+            with Session(engine) as session:
+                if rebuilt:
+                    self._clear()
+                    loaded = self._load_users(session)
+                else:
+                    since = self.refreshed_at - REFRESH_SAFETY_LAG
+                    changed = set(session.exec(select(User.id).where(User.updated_at > since)).all())
+                    changed.update(session.exec(
+                        select(SkillMastery.user_id).where(SkillMastery.last_updated > since).distinct()
+                    ).all())
+                    changed = list(changed)
+                    loaded = 0
+                    for i in range(0, len(changed), LOAD_BATCH_USERS):
+                        loaded += self._load_users(session, set(changed[i:i + LOAD_BATCH_USERS]))
+            self.refreshed_at = started_at
+            self._seen_version = version
+            self._checked_at = time.monotonic()
+        if rebuilt or loaded > LOAD_BATCH_USERS:
+            logger.info(f"🧩 Skill gap matrix: loaded {loaded} user row(s) in {time.perf_counter() - start:.2f}s.")
+        return loaded
+
+    def ensure_fresh(self):
+        """Refresh if a writer bumped the version or the matrix is older than SKILL_GAP_MAX_AGE_SECONDS."""
+        stale = time.monotonic() - self._checked_at > settings.SKILL_GAP_MAX_AGE_SECONDS
+        if self.refreshed_at is None or stale or skill_gap_version() != self._seen_version:
+            self.refresh()
+
+    # --- Queries ---
+
+    def gap_counts(self, department: Optional[str] = None, limit: Optional[int] = None) -> List[dict]:
+        """Per skill: learners with a gap, learners targeting it and the average gap, largest first."""
+        with self._lock:
+            if department is not None:
+                sources = [self.department_counts.get(department, {})]
+            else:
+                sources = list(self.department_counts.values())
+            totals: Dict[int, List[float]] = defaultdict(lambda: [0, 0.0, 0])
+            for counts in sources:
+                for skill, (learners, gap_sum, targeting) in counts.items():
+                    total = totals[skill]
+                    total[0] += learners
+                    total[1] += gap_sum
+                    total[2] += targeting
+            names = self.vocabulary.names
+        result = [
+            {
+                "skill": names[skill],
+                "learners_with_gap": learners,
+                "learners_targeting": targeting,
+                "average_gap": round(gap_sum / learners, 3) if learners else 0.0,
+            }
+            for skill, (learners, gap_sum, targeting) in totals.items() if learners
+        ]
+        result.sort(key=lambda entry: (-entry["learners_with_gap"], -entry["average_gap"], entry["skill"]))
+        return result[:limit] if limit else result
+
+    def top_gaps_by_department(self, limit: int = 5) -> Dict[str, List[dict]]:
+        with self._lock:
+            departments = [department for department in self.department_counts if department]
+        return {department: self.gap_counts(department, limit) for department in sorted(departments)}
+
+    def has_department(self, department: str) -> bool:
+        return department in self.department_counts
+
+    def similar_learners(self, user_id: str, limit: int = 10) -> List[dict]:
+        """
+        Cosine similarity over held + wanted skill features, scored only
+        against users sharing a feature. Each match lists the skills it can
+        help with (my gaps it holds at PROFICIENT or above).
+        """
+        with self._lock:
+            row = self.rows.get(user_id)
+            if row is None or not row.norm:
+                return []
+            dots: Dict[str, float] = defaultdict(float)
+            for feature, weight in row.features():
+                for other_id, other_weight in self.postings.get(feature, {}).items():
+                    if other_id != user_id:
+                        dots[other_id] += weight * other_weight
+            ranked = heapq.nlargest(
+                limit, ((dot / (row.norm * self.rows[other_id].norm), other_id) for other_id, dot in dots.items())
+            )
+            names = self.vocabulary.names
+            result = []
+            for similarity, other_id in ranked:
+                other = self.rows[other_id]
+                result.append({
+                    "user_id": other_id,
+                    "department": other.department,
+                    "similarity": round(similarity, 3),
+                    "shared_skills": sorted(names[s] for s in row.held.keys() & other.held.keys()),
+                    "shared_gaps": sorted(names[s] for s in row.gaps.keys() & other.gaps.keys()),
+                    "can_help_with": sorted(
+                        names[s] for s in row.gaps if other.held.get(s, 0.0) * 100 >= PROFICIENT
+                    ),
+                })
+        return result
+
+
+# Global matrix (one per worker, built on first use)
+skill_gap_matrix = SkillGapMatrix()
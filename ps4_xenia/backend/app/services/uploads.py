@@ -0,0 +1,226 @@
+"""
+Streaming, content-addressed uploads.
+
+Request bodies are parsed incrementally (python-multipart's push parser) and
+the file part is written straight into a temp file in the content store while
+being hashed, so memory use is constant regardless of file size. The finished
+file becomes blob sha256 (or is dropped if that blob already exists) and the
+new AssetVersion's key is linked to it.
+"""
+import hashlib
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Optional
+from sqlmodel import Session
+from app.models.models import Asset, AssetVersion
+from app.services.content_store import STORE_SCHEME, ContentStore, content_key, content_store
+from app.services.event_bus import AssetPublished, event_bus
+from app.services.resource_versions import invalidate_asset
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+MAX_FIELD_BYTES = 64 * 1024  # Non-file form fields are small metadata
+
+
+class UploadError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+@dataclass
+class StoredBlob:
+    digest: str
+    size: int
+    deduplicated: bool
+
+
+class HashingWriter:
+    """Writes a byte stream to a temp file in the store while computing its SHA-256."""
+
+    def __init__(self, store: ContentStore, max_bytes: int):
+        self.store = store
+        self.max_bytes = max_bytes
+        self.file = store.open_temp()
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data: bytes):
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise UploadError(413, f"Upload exceeds {self.max_bytes} bytes")
+        self.file.write(data)
+        self.sha256.update(data)
+
+    def finish(self) -> StoredBlob:
+        self.file.close()
+        digest = self.sha256.hexdigest()
+        created = self.store.commit_blob(self.file.name, digest)
+        return StoredBlob(digest=digest, size=self.size, deduplicated=not created)
+
+    def abort(self):
+        self.file.close()
+        if os.path.exists(self.file.name):
+            os.remove(self.file.name)
+
+
+@dataclass
+class ParsedUpload:
+    blob: Optional[StoredBlob] = None
+    filename: Optional[str] = None
+    content_type: Optional[str] = None
+    fields: Dict[str, str] = field(default_factory=dict)
+
+
+class StreamingMultipartUpload:
+    """
+    Incremental multipart/form-data parser: the part named `file_field` is
+    streamed into a HashingWriter, other parts are kept as small text fields.
+    feed() does blocking disk I/O; call it from a worker thread.
+    """
+
+    def __init__(self, content_type_header: str, max_bytes: int, store: ContentStore = content_store,
+                 file_field: str = "file"):
+        content_type, params = parse_options_header(content_type_header)
+        if content_type != b"multipart/form-data" or b"boundary" not in params:
+            raise UploadError(415, "Expected multipart/form-data")
+        self.store = store
+        self.max_bytes = max_bytes
+        self.file_field = file_field
+        self.result = ParsedUpload()
+        self._writer: Optional[HashingWriter] = None
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._part_name: Optional[str] = None
+        self._field_data = bytearray()
+        self._parser = MultipartParser(params[b"boundary"], {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+
+    # Parser callbacks
+
+    def _on_part_begin(self):
+        self._headers = {}
+        self._part_name = None
+        self._field_data = bytearray()
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        self._part_name = options.get(b"name", b"").decode("latin-1")
+        if self._part_name == self.file_field:
+            if self._writer is not None:
+                raise UploadError(400, f"Only one '{self.file_field}' part is allowed")
+            self.result.filename = options.get(b"filename", b"").decode("utf-8", "replace")
+            self.result.content_type = self._headers.get(b"content-type", b"").decode("latin-1") or None
+            self._writer = HashingWriter(self.store, self.max_bytes)
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._part_name == self.file_field:
+            self._writer.write(data[start:end])
+        else:
+            self._field_data += data[start:end]
+            if len(self._field_data) > MAX_FIELD_BYTES:
+                raise UploadError(413, f"Form field '{self._part_name}' is too large")
+
+    def _on_part_end(self):
+        if self._part_name != self.file_field and self._part_name:
+            self.result.fields[self._part_name] = self._field_data.decode("utf-8", "replace")
+
+    # Driving the parser
+
+    def feed(self, chunk: bytes):
+        self._parser.write(chunk)
+
+    def finish(self) -> ParsedUpload:
+        self._parser.finalize()
+        if self._writer is None:
+            raise UploadError(400, f"Missing '{self.file_field}' part")
+        self.result.blob = self._writer.finish()
+        return self.result
+
+    def abort(self):
+        """Discard the partial temp file (safe to call more than once)."""
+        if self._writer is not None:
+            self._writer.abort()
+
+
+def stage_content_version(
+    session: Session,
+    asset: Asset,
+    blob: StoredBlob,
+    filename: str,
+    user_id: str,
+    content_type: Optional[str] = None,
+) -> AssetVersion:
+    """
+    Create the next AssetVersion pointing at a stored blob and make it current,
+    in the caller's transaction. Call announce_content_version() once committed.
+    """
+    # Lock and reload the asset row so concurrent uploads can't both take the same next version
+    session.get(Asset, asset.id, with_for_update=True, populate_existing=True)
+    version_num = asset.current_version + 1
+    key = content_key(asset.id, version_num, filename)
+    content_store.link(blob.digest, key)
+
+    version = AssetVersion(
+        asset_id=asset.id,
+        version=version_num,
+        content_url=f"{STORE_SCHEME}{key}",
+        content_type=content_type or asset.content_type,
+        file_size_bytes=blob.size,
+        created_by=user_id,
+    )
+    session.add(version)
+    asset.content_url = version.content_url
+    asset.content_type = version.content_type
+    asset.current_version = version_num
+    asset.file_size_bytes = blob.size
+    asset.updated_at = datetime.utcnow()
+    session.add(asset)
+    session.flush()
+    return version
+
+
+def announce_content_version(asset: Asset, version: AssetVersion):
+    """Post-commit side effects of a new version: cache invalidation and the AssetPublished event."""
+    invalidate_asset(asset.id)
+    event_bus.publish(AssetPublished(asset_id=asset.id, skill_tag=asset.skill_tag, version=version.version))
+
+
+def publish_content_version(
+    session: Session,
+    asset: Asset,
+    blob: StoredBlob,
+    filename: str,
+    user_id: str,
+    content_type: Optional[str] = None,
+) -> AssetVersion:
+    """Stage the next version, commit and announce it."""
+    version = stage_content_version(session, asset, blob, filename, user_id, content_type=content_type)
+    session.commit()
+    session.refresh(version)
+    announce_content_version(asset, version)
+    return version
@@ -0,0 +1,83 @@
+"""
+Benchmark: cohort analytics over the in-memory interaction snapshot.
+
+Builds a synthetic snapshot (no database) and times typical admin cuts, e.g.
+"average score by difficulty for new hires this quarter". Needs numpy.
+
+    python bench_cohort_analytics.py --rows 10000000 --users 100000
+"""
+import argparse
+import time
+from datetime import date, timedelta
+import numpy as np
+from app.services.interaction_snapshot import EPOCH, STATUS_CODES, InteractionSnapshot
+
+DEPARTMENTS = ["Engineering", "Sales", "Marketing", "Finance", "Support", None]
+SKILLS = ["Python", "React", "System Design", "DevOps", "Data Science", "Security"]
+CONTENT_TYPES = ["video", "pdf", "scorm", "html5"]
+
+
+def synthetic_snapshot(rows: int, users: int, assets: int, days: int) -> InteractionSnapshot:
+    rng = np.random.default_rng(42)
+    today = (date.today() - EPOCH).days
+    scored = rng.random(rows) >= 0.3
+    score = np.where(scored, rng.uniform(0, 100, rows), 0).astype(np.float32)
+    return InteractionSnapshot(
+        user_idx=rng.integers(0, users, rows, dtype=np.int32),
+        asset_idx=rng.integers(0, assets, rows, dtype=np.int32),
+        score=score,
+        scored=scored,
+        seconds=rng.integers(0, 3600, rows, dtype=np.int32),
+        status=rng.integers(0, len(STATUS_CODES), rows, dtype=np.int8),
+        day=rng.integers(today - days, today + 1, rows, dtype=np.int32),
+        user_department=rng.integers(0, len(DEPARTMENTS), users, dtype=np.int32),
+        user_hire_day=rng.integers(today - 5 * 365, today + 1, users, dtype=np.int32),
+        asset_difficulty=rng.integers(1, 6, assets, dtype=np.int8),
+        asset_skill=rng.integers(0, len(SKILLS), assets, dtype=np.int32),
+        asset_content_type=rng.integers(0, len(CONTENT_TYPES), assets, dtype=np.int32),
+        departments=DEPARTMENTS,
+        skills=SKILLS,
+        content_types=CONTENT_TYPES,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--assets", type=int, default=5_000)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    snapshot = synthetic_snapshot(args.rows, args.users, args.assets, args.days)
+    print(f"🧮 Synthetic snapshot: {snapshot.rows:,} rows, {snapshot.users:,} users "
+          f"({time.perf_counter() - start:.1f}s to generate)")
+
+    quarter = date.today() - timedelta(days=90)
+    cuts = {
+        "score by difficulty, new hires this quarter":
+            lambda: snapshot.query().where(joined_after=quarter).group_by("difficulty"),
+        "completion by department, all time":
+            lambda: snapshot.query().group_by("department"),
+        "weekly hours, Engineering, last 12 weeks":
+            lambda: snapshot.query().where(department="Engineering", since=date.today() - timedelta(weeks=12)).group_by("week"),
+        "by hire month, Python, completed":
+            lambda: snapshot.query().where(skill="Python", status="completed").group_by("hire_month"),
+        "by month, difficulty 4-5, video":
+            lambda: snapshot.query().where(difficulty=[4, 5], content_type="video").group_by("month"),
+        "summary, Sales since last quarter":
+            lambda: snapshot.query().where(department="Sales", since=quarter).summary(),
+    }
+    for name, run in cuts.items():
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        print(f"  {name:<45} best {min(timings) * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark: heartbeat throughput and flush cost.
+
+Drives POST /learning/heartbeat in-process (ASGI transport, no network) with
+a pool of concurrent players, then times the bulk flush that turns the
+accumulated ticks into AssetProgress rows.
+
+Against a running worker instead:
+    python bench_heartbeat.py --base-url http://localhost:8001/api/v1
+"""
+import argparse
+import asyncio
+import time
+import httpx
+from app.core.database import create_db_and_tables
+from app.main import app
+from app.services.progress import progress_accumulator
+
+HEARTBEATS = 20000
+CONCURRENCY = 50
+PLAYERS = 500
+
+
+class TimedApp:
+    """Accumulates time spent inside the ASGI app, separating server cost from client overhead."""
+
+    def __init__(self, app):
+        self.app = app
+        self.seconds = 0.0
+
+    async def __call__(self, scope, receive, send):
+        start = time.perf_counter()
+        await self.app(scope, receive, send)
+        self.seconds += time.perf_counter() - start
+
+
+async def run(base_url: str):
+    timed = TimedApp(app)
+    transport = None if base_url.startswith("http") else httpx.ASGITransport(app=timed)
+    async with httpx.AsyncClient(transport=transport, base_url=base_url) as client:
+        queue: asyncio.Queue = asyncio.Queue()
+        for i in range(HEARTBEATS):
+            queue.put_nowait(i)
+
+        async def player():
+            while not queue.empty():
+                i = queue.get_nowait()
+                r = await client.post("/learning/heartbeat", json={
+                    "user_id": f"bench-user-{i % PLAYERS}",
+                    "asset_id": "bench-asset",
+                    "seconds": 5,
+                    "position_seconds": i,
+                })
+                assert r.status_code == 204, r.text
+
+        start = time.perf_counter()
+        await asyncio.gather(*(player() for _ in range(CONCURRENCY)))
+        elapsed = time.perf_counter() - start
+    print(f"💓 {HEARTBEATS} heartbeats in {elapsed:.2f}s -> {HEARTBEATS / elapsed:,.0f}/s (including client)")
+    if transport is not None:
+        per_request = timed.seconds / HEARTBEATS
+        print(f"⏱️ Server time {per_request * 1e6:.0f}µs/heartbeat -> ~{1 / per_request:,.0f}/s per worker")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="asgi://bench/api/v1")
+    args = parser.parse_args()
+
+    create_db_and_tables()
+    asyncio.run(run(args.base_url))
+
+    if not args.base_url.startswith("http"):
+        # Foreign keys aren't enforced on SQLite by default, so bench ids are fine
+        start = time.perf_counter()
+        rows = progress_accumulator.flush()
+        print(f"✅ Flushed {rows} (user, asset) rows in one upsert: {(time.perf_counter() - start) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
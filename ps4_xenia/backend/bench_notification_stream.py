@@ -0,0 +1,93 @@
+"""
+Benchmark: hold many idle notification streams open against one worker.
+
+Opens N SSE connections to /notifications/{user_id}/stream using raw asyncio
+sockets (cheap on the client side), waits for every stream to see a heartbeat,
+and reports the server's resident memory per connection.
+
+Usage:
+    uvicorn app.main:app --port 8001 --workers 1   (raise `ulimit -n` first)
+    python bench_notification_stream.py --connections 10000 --server-pid <uvicorn pid>
+"""
+import argparse
+import asyncio
+import time
+
+HOST = "localhost"
+PORT = 8001
+PATH = "/api/v1/notifications/{user_id}/stream"
+
+
+def read_rss_kb(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+async def open_stream(index: int, ready: asyncio.Event, stats: dict, hold_seconds: float):
+    user_id = f"bench-user-{index % 1000}"
+    try:
+        reader, writer = await asyncio.open_connection(HOST, PORT)
+    except OSError:
+        stats["failed"] += 1
+        return
+    writer.write(
+        f"GET {PATH.format(user_id=user_id)} HTTP/1.1\r\nHost: {HOST}\r\nAccept: text/event-stream\r\n\r\n".encode()
+    )
+    await writer.drain()
+    try:
+        status_line = await reader.readline()
+        if b"200" not in status_line:
+            stats["failed"] += 1
+            return
+        stats["connected"] += 1
+        deadline = time.monotonic() + hold_seconds
+        while time.monotonic() < deadline:
+            line = await asyncio.wait_for(reader.readline(), timeout=hold_seconds)
+            if not line:
+                stats["dropped"] += 1
+                return
+            if line.startswith(b": heartbeat"):
+                stats["heartbeats"] += 1
+        await ready.wait()
+    except (asyncio.TimeoutError, ConnectionError):
+        stats["dropped"] += 1
+    finally:
+        writer.close()
+
+
+async def run(connections: int, hold_seconds: float, server_pid: int):
+    stats = {"connected": 0, "failed": 0, "dropped": 0, "heartbeats": 0}
+    ready = asyncio.Event()
+    rss_before = read_rss_kb(server_pid) if server_pid else 0
+
+    print(f"🚀 Opening {connections} idle notification streams...")
+    start = time.time()
+    tasks = []
+    for i in range(connections):
+        tasks.append(asyncio.create_task(open_stream(i, ready, stats, hold_seconds)))
+        if i % 500 == 499:
+            await asyncio.sleep(0.05)  # Avoid overflowing the listen backlog
+    await asyncio.sleep(hold_seconds)
+    print(f"   Connected: {stats['connected']}  Failed: {stats['failed']}  ({time.time() - start:.1f}s)")
+
+    if server_pid:
+        rss_after = read_rss_kb(server_pid)
+        per_conn = (rss_after - rss_before) / max(1, stats["connected"])
+        print(f"   Server RSS: {rss_before / 1024:.1f}MB -> {rss_after / 1024:.1f}MB ({per_conn:.1f}KB per connection)")
+
+    ready.set()
+    await asyncio.gather(*tasks)
+    print(f"   Heartbeats received: {stats['heartbeats']}  Dropped streams: {stats['dropped']}")
+    print("✅ Done" if stats["dropped"] == 0 and stats["failed"] == 0 else "❌ Some streams failed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--connections", type=int, default=10000)
+    parser.add_argument("--hold-seconds", type=float, default=40.0, help="Should exceed the heartbeat interval")
+    parser.add_argument("--server-pid", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(run(args.connections, args.hold_seconds, args.server_pid))
@@ -0,0 +1,114 @@
+"""
+Benchmark: per-hit cost of cached responses on /library and /profile/{user_id}.
+
+"before" replays the old cache-hit pipeline: json.loads the cached entry,
+rebuild the Pydantic models, then let FastAPI validate and serialize them.
+"after" is the raw-bytes fast path: fetch the stored body and wrap it in a
+Response. Both run in-process against the same payloads, so the numbers
+isolate serialization cost from network and auth overhead.
+
+Optionally also times real HTTP hits against a running server:
+    python bench_response_cache.py --base-url http://localhost:8001/api/v1
+"""
+import argparse
+import time
+from datetime import datetime
+from typing import List
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from app.api.assets import AssetPublicResponse
+from app.api.profile import ProfileResponse
+from app.core.cache import cache_store
+from app.core.serialization import DefaultResponse, dumps
+
+ITERATIONS = 2000
+
+
+def sample_library(n: int = 50) -> List[dict]:
+    return [
+        {
+            "id": f"asset-{i}",
+            "title": f"Module {i}: Advanced Topics",
+            "description": "A reasonably long description of the learning module content. " * 3,
+            "content_type": "video",
+            "skill_tag": "Python",
+            "difficulty_level": 1 + i % 5,
+            "estimated_duration_minutes": 15,
+            "created_at": datetime.utcnow().isoformat(),
+        }
+        for i in range(n)
+    ]
+
+
+def sample_profile() -> dict:
+    now = datetime.utcnow().isoformat()
+    return {
+        "id": "user-1", "email": "ned@example.com", "full_name": "Newbie Ned", "role": "Software Engineer",
+        "department": "Engineering", "employee_id": "E-1001", "current_skills": ["Python", "SQL"],
+        "target_skills": ["React", "System Design", "DevOps"], "preferred_learning_style": "video",
+        "learning_pace": "medium", "is_admin": False, "created_at": now, "updated_at": now, "last_login": now,
+    }
+
+
+def time_per_call(fn, iterations: int = ITERATIONS) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6  # microseconds
+
+
+def bench_in_process():
+    cases = {
+        "/library": (sample_library(), TypeAdapter(List[AssetPublicResponse]), lambda d: [AssetPublicResponse(**i) for i in d]),
+        "/profile/{user_id}": (sample_profile(), TypeAdapter(ProfileResponse), lambda d: ProfileResponse(**d)),
+    }
+    print(f"{'endpoint':<22}{'before (us/hit)':>18}{'after (us/hit)':>18}{'speedup':>10}")
+    for name, (payload, adapter, rebuild) in cases.items():
+        legacy_key, raw_key = f"bench:legacy:{name}", f"bench:raw:{name}"
+        cache_store.set(legacy_key, payload, expire=300)
+        cache_store.set_bytes(raw_key, dumps(payload), expire=300)
+
+        def before():
+            # Old path: cached JSON -> models -> response_model validation -> JSON
+            data = cache_store.get(legacy_key)
+            models = rebuild(data)
+            validated = adapter.validate_python(jsonable_encoder(models))
+            return DefaultResponse(content=jsonable_encoder(validated))
+
+        def after():
+            return Response(content=cache_store.get_bytes(raw_key), media_type="application/json")
+
+        b, a = time_per_call(before), time_per_call(after)
+        print(f"{name:<22}{b:>18.1f}{a:>18.1f}{b / a:>9.1f}x")
+
+
+def bench_http(base_url: str, email: str, password: str, iterations: int = 200):
+    import requests
+    tokens = requests.post(f"{base_url}/auth/login", json={"email": email, "password": password}).json()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    user_id = requests.get(f"{base_url}/profile", headers=headers).json()["id"]
+
+    for path in ["/library", f"/profile/{user_id}"]:
+        requests.get(f"{base_url}{path}", headers=headers)  # Warm the cache
+        start = time.perf_counter()
+        for _ in range(iterations):
+            requests.get(f"{base_url}{path}", headers=headers)
+        elapsed_ms = (time.perf_counter() - start) / iterations * 1000
+        print(f"HTTP {path:<40} {elapsed_ms:.2f}ms per cached hit")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default=None)
+    parser.add_argument("--email", default="newbie@example.com")
+    parser.add_argument("--password", default="password123")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("CACHED RESPONSE HIT COST (in-process)")
+    print("=" * 70)
+    bench_in_process()
+    if args.base_url:
+        print()
+        bench_http(args.base_url, args.email, args.password)
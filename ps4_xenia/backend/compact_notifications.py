@@ -0,0 +1,20 @@
+"""
+Notification retention job.
+Deletes read notifications older than NOTIFICATION_RETENTION_DAYS in small
+batches. Schedule it daily (cron / k8s CronJob).
+"""
+import argparse
+from sqlmodel import Session
+from app.core.config import settings
+from app.core.database import engine
+from app.services.notifications import compact_read_notifications
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=settings.NOTIFICATION_RETENTION_DAYS)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        deleted = compact_read_notifications(session, args.days, args.batch_size)
+    print(f"✅ Compacted {deleted} read notifications older than {args.days} days.")
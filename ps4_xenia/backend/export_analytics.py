@@ -0,0 +1,27 @@
+"""
+Offline analytics export job.
+Writes UserInteraction, SkillMastery and Asset to Parquet under
+ANALYTICS_EXPORT_DIR, partitioned by month and department. Runs are
+incremental (only rows past the last exported timestamp); schedule it hourly
+or nightly (cron / k8s CronJob). Requires pyarrow.
+"""
+import argparse
+from sqlmodel import Session
+from app.core.config import settings
+from app.core.database import engine
+from app.services.analytics_export import AnalyticsExporter
+
+TABLES = ["interactions", "skill_mastery", "assets"]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output", default=settings.ANALYTICS_EXPORT_DIR)
+    parser.add_argument("--tables", nargs="+", choices=TABLES, default=TABLES)
+    parser.add_argument("--full", action="store_true", help="Discard previous output and export everything again")
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        results = AnalyticsExporter(session, args.output).run(args.tables, full=args.full)
+    for table, result in results.items():
+        print(f"✅ {table}: {result['rows']} row(s), {result['files']} file(s)")
+    print(f"📦 Export written to {args.output}")
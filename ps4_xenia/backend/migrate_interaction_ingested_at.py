@@ -0,0 +1,26 @@
+"""
+Add UserInteraction.ingested_at (and its index) to an existing database.
+Existing rows are backfilled from their timestamp, so incremental exports
+and snapshots keep their watermarks. New databases get it from the models.
+"""
+from sqlalchemy import inspect, text
+from app.core.database import engine
+from app.models.models import UserInteraction
+
+def migrate():
+    print("🚀 Adding ingestion times to interactions...")
+    existing = {column["name"] for column in inspect(engine).get_columns("userinteraction")}
+    with engine.begin() as connection:
+        if "ingested_at" in existing:
+            print("ℹ️ 'ingested_at' column already exists.")
+        else:
+            connection.execute(text("ALTER TABLE userinteraction ADD COLUMN ingested_at TIMESTAMP"))
+            print("✅ Added 'ingested_at' column.")
+        connection.execute(text("UPDATE userinteraction SET ingested_at = timestamp WHERE ingested_at IS NULL"))
+    for index in UserInteraction.__table__.indexes:
+        if "ingested_at" in index.columns.keys():
+            index.create(engine, checkfirst=True)
+            print(f"✅ Index '{index.name}' in place.")
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,36 @@
+"""
+Bring an existing database up to the learning-path planner: the new columns
+on LearningPath (plan version, targets, timestamps), its user_id index, and
+the LearningPathStep / SkillPrerequisite tables. New databases get all of
+this from the models.
+"""
+from sqlalchemy import inspect, text
+from app.core.database import engine, create_db_and_tables
+from app.models.models import LearningPath
+
+NEW_COLUMNS = {
+    "curriculum_version": "VARCHAR",
+    "target_skills": "JSON",
+    "created_at": "TIMESTAMP",
+    "updated_at": "TIMESTAMP",
+}
+
+def migrate():
+    print("🚀 Migrating learning paths...")
+    create_db_and_tables()
+    existing = {column["name"] for column in inspect(engine).get_columns("learningpath")}
+    with engine.begin() as connection:
+        for name, sql_type in NEW_COLUMNS.items():
+            if name in existing:
+                print(f"ℹ️ '{name}' column already exists.")
+                continue
+            connection.execute(text(f"ALTER TABLE learningpath ADD COLUMN {name} {sql_type}"))
+            print(f"✅ Added '{name}' column.")
+        connection.execute(text("UPDATE learningpath SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL"))
+        connection.execute(text("UPDATE learningpath SET updated_at = CURRENT_TIMESTAMP WHERE updated_at IS NULL"))
+    for index in LearningPath.__table__.indexes:
+        index.create(engine, checkfirst=True)
+        print(f"✅ Index '{index.name}' in place.")
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,18 @@
+"""
+Add the User.updated_at and SkillMastery.last_updated indexes to an existing
+database. New databases get them from the models; the skill-gap matrix uses
+them to find users changed since its last refresh without a full scan.
+"""
+from app.core.database import engine
+from app.models.models import SkillMastery, User
+
+def migrate():
+    print("🚀 Indexing change timestamps for the skill-gap matrix...")
+    for table, column in ((User.__table__, "updated_at"), (SkillMastery.__table__, "last_updated")):
+        for index in table.indexes:
+            if column in index.columns.keys():
+                index.create(engine, checkfirst=True)
+                print(f"✅ Index '{index.name}' in place.")
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,36 @@
+"""
+Add the (user_id, skill_name) unique index to an existing skillmastery table.
+New databases get it from the model; older ones may hold duplicate rows from
+concurrent inserts, which are merged (highest proficiency wins) first.
+"""
+from sqlalchemy import text
+from app.core.database import engine
+
+def migrate():
+    print("🚀 Enforcing one SkillMastery row per (user, skill)...")
+    with engine.begin() as conn:
+        duplicates = conn.execute(text(
+            "SELECT user_id, skill_name, MAX(last_updated) FROM skillmastery "
+            "GROUP BY user_id, skill_name HAVING COUNT(*) > 1"
+        )).all()
+        for user_id, skill_name, last_updated in duplicates:
+            keep = conn.execute(text(
+                "SELECT id FROM skillmastery WHERE user_id = :u AND skill_name = :s "
+                "ORDER BY proficiency DESC LIMIT 1"
+            ), {"u": user_id, "s": skill_name}).scalar()
+            conn.execute(text(
+                "DELETE FROM skillmastery WHERE user_id = :u AND skill_name = :s AND id != :keep"
+            ), {"u": user_id, "s": skill_name, "keep": keep})
+            conn.execute(text(
+                "UPDATE skillmastery SET last_updated = :t WHERE id = :keep"
+            ), {"t": last_updated, "keep": keep})
+        if duplicates:
+            print(f"✅ Merged duplicates for {len(duplicates)} (user, skill) pair(s).")
+
+        conn.execute(text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_skillmastery_user_skill ON skillmastery (user_id, skill_name)"
+        ))
+    print("✅ Unique index 'uq_skillmastery_user_skill' in place.")
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,23 @@
+"""
+Processed-event retention job.
+Deletes consumer claims (ProcessedEvent rows) older than
+PROCESSED_EVENT_RETENTION_DAYS in small batches; redeliveries only happen
+within minutes, so old claims only take space. Schedule it daily (cron / k8s
+CronJob).
+"""
+import argparse
+from sqlmodel import Session
+from app.core.config import settings
+from app.core.database import engine, create_db_and_tables
+from app.services.processed_events import prune_processed_events
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=settings.PROCESSED_EVENT_RETENTION_DAYS)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    create_db_and_tables()
+    with Session(engine) as session:
+        deleted = prune_processed_events(session, args.days, args.batch_size)
+    print(f"✅ Pruned {deleted} processed-event claims older than {args.days} days.")
@@ -0,0 +1,19 @@
+"""
+Rebuild every leaderboard (all time, this week and last week; org-wide and
+per department) from the raw UserInteraction table.
+Run to recover after a Redis flush or data loss, or to repair drift. Boards
+are maintained by the event-bus "leaderboards" consumer, so increments that
+land while the rebuild runs may be lost; run it while traffic is quiet.
+Without Redis, each worker builds its in-process boards on first use.
+"""
+from sqlmodel import Session
+from app.core.database import engine, create_db_and_tables
+from app.services.leaderboards import leaderboards
+
+if __name__ == "__main__":
+    create_db_and_tables()
+    if leaderboards.backend != "redis":
+        print("⚠️ Redis is not available: boards are in-process and rebuilt by each worker on first use.")
+    with Session(engine) as session:
+        boards = leaderboards.rebuild(session)
+    print(f"✅ Rebuilt {boards} leaderboard(s) from the interaction table ({leaderboards.backend}).")
@@ -0,0 +1,25 @@
+"""
+Rebuild DailyLearningRollup from the raw UserInteraction table, then the
+per-user activity bitmaps (streaks) from the rollup.
+Run once to backfill department analytics and streaks, or to repair drift. Rollups are
+maintained by the event-bus "rollups" consumer, so run it while no
+interactions are being recorded (or accept a few seconds of double counting).
+"""
+from sqlmodel import Session
+from app.core.database import engine, create_db_and_tables
+from app.models.models import User
+from app.services.department_analytics import rebuild_rollups
+from app.services.learner_activity import rebuild_activity_bitmaps
+
+if __name__ == "__main__":
+    create_db_and_tables()
+    # Older databases predate the User.department index the department views join on
+    for index in User.__table__.indexes:
+        if "department" in index.columns.keys():
+            index.create(engine, checkfirst=True)
+    with Session(engine) as session:
+        rows = rebuild_rollups(session)
+        bitmaps = rebuild_activity_bitmaps(session)
+        session.commit()
+    print(f"✅ Rebuilt {rows} daily rollup row(s) from the interaction table.")
+    print(f"✅ Rebuilt {bitmaps} activity bitmap(s) from the rollup.")
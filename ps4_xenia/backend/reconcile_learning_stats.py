@@ -0,0 +1,27 @@
+"""
+Reconcile UserLearningStats against the raw UserInteraction table.
+Run periodically (e.g. nightly cron) to detect drift in the dashboard counters.
+Pass --repair to rewrite drifted rows; also used once to backfill existing users.
+"""
+import sys
+from sqlmodel import Session
+from app.core.database import engine, create_db_and_tables
+from app.services.learning_stats import reconcile_learning_stats
+
+def reconcile(repair: bool = False):
+    create_db_and_tables()
+    with Session(engine) as session:
+        mismatches = reconcile_learning_stats(session, repair=repair)
+
+    if not mismatches:
+        print("✅ Learning stats are consistent with the interaction table.")
+        return
+
+    print(f"⚠️ {len(mismatches)} user(s) with drifted stats:")
+    for m in mismatches:
+        print(f"  - {m['user_id']}: stored={m['stored']} expected={m['expected']}")
+    if repair:
+        print("✅ Drifted rows repaired.")
+
+if __name__ == "__main__":
+    reconcile(repair="--repair" in sys.argv)
@@ -0,0 +1,145 @@
+"""
+Test script for idempotent event-bus consumers.
+Runs against a throwaway SQLite database (no server needed) and checks that
+mastery, daily rollups and leaderboards apply an InteractionRecorded event
+once when delivery repeats it: a failure after the consumer's commit that
+makes the bus retry the batch, and a plain redelivery (stream replay).
+
+    python test_event_idempotency.py
+"""
+import os
+import sys
+import tempfile
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "events.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["LEADERBOARD_BACKEND"] = "memory"
+
+import asyncio
+from sqlmodel import Session, select
+from app.core.database import create_db_and_tables, engine
+from app.models.models import Asset, DailyLearningRollup, InteractionStatus, SkillMastery, User, UserInteraction
+from app.services import event_bus as event_bus_module, event_consumers
+from app.services.event_bus import EventBus, InteractionRecorded, Subscriber
+from app.services.leaderboards import leaderboards
+
+event_bus_module.RETRY_BACKOFF_SECONDS = 0.0
+failures = 0
+
+
+def print_header(text):
+    print("\n" + "="*70)
+    print(f"  {text}")
+    print("="*70)
+
+
+def check(label, actual, expected):
+    global failures
+    if actual == expected:
+        print(f"✓ {label}: {actual}")
+    else:
+        failures += 1
+        print(f"✗ {label}: expected {expected}, got {actual}")
+
+
+def create_user(email) -> str:
+    with Session(engine) as session:
+        user = User(email=email, full_name="Learner", hashed_password="x", department="Engineering")
+        session.add(user)
+        session.commit()
+        return user.id
+
+
+def create_asset(user_id) -> str:
+    with Session(engine) as session:
+        asset = Asset(title="Intro", description="d", content_url="http://x", skill_tag="Python",
+                      difficulty_level=1, estimated_duration_minutes=10, created_by=user_id)
+        session.add(asset)
+        session.commit()
+        return asset.id
+
+
+def complete(user_id, asset_id) -> InteractionRecorded:
+    """Commit a completed interaction and return the event the write path would publish."""
+    with Session(engine) as session:
+        interaction = UserInteraction(
+            user_id=user_id, asset_id=asset_id, status=InteractionStatus.COMPLETED, score=90.0
+        )
+        session.add(interaction)
+        session.commit()
+        session.refresh(interaction)
+        return InteractionRecorded(
+            interaction_id=interaction.id, user_id=user_id, asset_id=asset_id, status=interaction.status,
+            score=interaction.score, skill_tag="Python", difficulty_level=1,
+            timestamp=interaction.timestamp, ingested_at=interaction.ingested_at,
+        )
+
+
+def deliver(name, handler, events):
+    """Hand a batch to a consumer the way the in-memory bus does (with retries)."""
+    bus = EventBus()
+    asyncio.run(bus._handle_with_retry(Subscriber(name, [InteractionRecorded], handler, 100), events))
+    return bus
+
+
+def state(user_id):
+    with Session(engine) as session:
+        proficiency = session.exec(select(SkillMastery.proficiency).where(SkillMastery.user_id == user_id)).first()
+        completed = session.exec(select(DailyLearningRollup.completed).where(DailyLearningRollup.user_id == user_id)).first()
+    position = leaderboards.position("completions", "all", None, user_id)
+    return proficiency, completed, position["score"] if position else 0.0
+
+
+def fail_once(original):
+    """Wrap a step so its first call raises."""
+    calls = []
+
+    def wrapper(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 1:
+            raise RuntimeError("cache unavailable")
+        return original(*args, **kwargs)
+    return wrapper
+
+
+print_header("IDEMPOTENT EVENT CONSUMERS")
+create_db_and_tables()
+asset_id = create_asset(create_user("author@example.com"))
+leaderboards.position("completions", "all", None, "nobody")  # Build the boards before any event
+
+print("\n[1] Post-commit step fails on the first delivery")
+user_id = create_user("l1@example.com")
+event = complete(user_id, asset_id)
+original = event_consumers.invalidate_departments_of
+for name, handler in (("mastery", event_consumers.update_mastery), ("rollups", event_consumers.update_rollups)):
+    event_consumers.invalidate_departments_of = fail_once(original)
+    try:
+        bus = deliver(name, handler, [event])
+    finally:
+        event_consumers.invalidate_departments_of = original
+    check(f"{name} dead letters", len(bus.dead_letters), 0)
+deliver("leaderboards", event_consumers.update_leaderboards, [event])
+once = state(user_id)
+check("mastery applied", once[0] is not None and once[0] > 0, True)
+check("rollup completions", once[1], 1)
+check("leaderboard completions", once[2], 1.0)
+
+print("\n[2] The same batch is delivered again (stream replay)")
+for name, handler in (("mastery", event_consumers.update_mastery), ("rollups", event_consumers.update_rollups),
+                      ("leaderboards", event_consumers.update_leaderboards)):
+    deliver(name, handler, [event, event])
+check("state unchanged", state(user_id), once)
+
+print("\n[3] A failure before the commit is retried and applied once")
+user_id = create_user("l2@example.com")
+event = complete(user_id, asset_id)
+original = event_consumers.apply_activity_days
+event_consumers.apply_activity_days = fail_once(original)
+try:
+    deliver("rollups", event_consumers.update_rollups, [event])
+finally:
+    event_consumers.apply_activity_days = original
+check("rollup completions", state(user_id)[1], 1)
+
+print_header("PASSED" if not failures else f"FAILED ({failures})")
+sys.exit(1 if failures else 0)
@@ -0,0 +1,146 @@
+"""
+Test script for streaming asset uploads.
+Streams a multi-GB multipart body to POST /admin/assets/{id}/content without
+ever holding it in memory on either side, checks the SHA-256 and size the
+server reports, re-uploads the same bytes to verify deduplication, and (with
+--pid, server on this host) checks that the worker's resident memory did not
+grow with the file size.
+
+    python test_large_upload.py --size-gb 4 --pid $(pgrep -f "uvicorn app.main" | head -1)
+"""
+import argparse
+import hashlib
+import os
+import time
+import requests
+
+BASE_URL = "http://localhost:8001/api/v1"
+CHUNK = 1024 * 1024
+BOUNDARY = "----skillstream-large-upload"
+MAX_RSS_GROWTH_MB = 64
+
+
+def print_header(text):
+    print("\n" + "="*70)
+    print(f"  {text}")
+    print("="*70)
+
+
+def login(base_url, email, password):
+    response = requests.post(f"{base_url}/auth/login", json={"email": email, "password": password})
+    if response.status_code == 200:
+        return response.json()['access_token']
+    raise Exception(f"Login failed for {email}: {response.text}")
+
+
+def rss_mb(pid):
+    """Current and peak resident memory of a local process, in MB."""
+    values = {}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith(("VmRSS:", "VmHWM:")):
+                key, value, _ = line.split()
+                values[key.rstrip(":")] = int(value) / 1024
+    return values.get("VmRSS", 0.0), values.get("VmHWM", 0.0)
+
+
+def payload(size_bytes, digest, seed):
+    """Pseudo-random bytes determined by `seed`, generated (and hashed) chunk by chunk."""
+    seed = (hashlib.sha256(seed).digest() * (CHUNK // 32))[:CHUNK]
+    sent = 0
+    counter = 0
+    while sent < size_bytes:
+        # Vary every chunk so the file is not a repeated block
+        block = hashlib.sha256(counter.to_bytes(8, "big")).digest() + seed[32:]
+        block = block[:min(CHUNK, size_bytes - sent)]
+        digest.update(block)
+        sent += len(block)
+        counter += 1
+        yield block
+
+
+def multipart_body(size_bytes, digest, filename, seed):
+    yield (
+        f"--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f"Content-Type: application/octet-stream\r\n\r\n"
+    ).encode()
+    yield from payload(size_bytes, digest, seed)
+    yield f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+def upload(base_url, headers, asset_id, size_bytes, filename, seed):
+    digest = hashlib.sha256()
+    start = time.time()
+    response = requests.post(
+        f"{base_url}/admin/assets/{asset_id}/content",
+        data=multipart_body(size_bytes, digest, filename, seed),
+        headers={**headers, "Content-Type": f"multipart/form-data; boundary={BOUNDARY}"},
+    )
+    elapsed = time.time() - start
+    if response.status_code != 200:
+        raise Exception(f"Upload failed ({response.status_code}): {response.text}")
+    return response.json(), digest.hexdigest(), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--email", default="admin@example.com")
+    parser.add_argument("--password", default="password123")
+    parser.add_argument("--asset-id", help="Asset to upload to (default: create one)")
+    parser.add_argument("--size-gb", type=float, default=2.0)
+    parser.add_argument("--pid", type=int, help="Server worker pid, for the memory check")
+    args = parser.parse_args()
+
+    print_header("STREAMING UPLOAD TEST")
+    headers = {"Authorization": f"Bearer {login(args.base_url, args.email, args.password)}"}
+
+    asset_id = args.asset_id
+    if not asset_id:
+        response = requests.post(f"{args.base_url}/admin/assets", headers=headers, json={
+            "title": "Large Upload Test",
+            "description": "Created by test_large_upload.py",
+            "content_type": "video",
+            "content_url": "https://example.com/placeholder.mp4",
+            "skill_tag": "Testing",
+            "difficulty_level": 1,
+            "estimated_duration_minutes": 1,
+        })
+        response.raise_for_status()
+        asset_id = response.json()["id"]
+    print(f"✓ Uploading to asset {asset_id}")
+
+    size_bytes = int(args.size_gb * 1024 ** 3)
+    if args.pid:
+        rss_before, _ = rss_mb(args.pid)
+        print(f"  Server RSS before: {rss_before:.1f} MB")
+
+    print(f"\n[1] Uploading {args.size_gb} GB...")
+    result, expected_digest, elapsed = upload(args.base_url, headers, asset_id, size_bytes, "large-upload.bin", os.urandom(16))
+    print(f"  {elapsed:.1f}s ({size_bytes / elapsed / 1024 ** 2:.0f} MB/s)")
+    assert result["sha256"] == expected_digest, f"SHA-256 mismatch: {result['sha256']} != {expected_digest}"
+    assert result["size_bytes"] == size_bytes, f"Size mismatch: {result['size_bytes']} != {size_bytes}"
+    assert result["version"]["file_size_bytes"] == size_bytes
+    print(f"✓ SHA-256 and size match, stored as version {result['version']['version']}")
+
+    if args.pid:
+        rss_after, peak = rss_mb(args.pid)
+        growth = peak - rss_before
+        print(f"  Server RSS after: {rss_after:.1f} MB (peak {peak:.1f} MB, +{growth:.1f} MB)")
+        assert growth < MAX_RSS_GROWTH_MB, f"Server memory grew by {growth:.1f} MB during the upload"
+        print(f"✓ Server memory stayed flat (< {MAX_RSS_GROWTH_MB} MB growth)")
+
+    print("\n[2] Uploading the same bytes twice under different names...")
+    seed = os.urandom(16)
+    first, _, _ = upload(args.base_url, headers, asset_id, CHUNK * 3, "dedup.bin", seed)
+    second, _, _ = upload(args.base_url, headers, asset_id, CHUNK * 3, "dedup-copy.bin", seed)
+    assert first["sha256"] == second["sha256"]
+    assert not first["deduplicated"] and second["deduplicated"], "Identical upload was stored twice"
+    print(f"✓ Second copy deduplicated (blob {second['sha256'][:12]}…)")
+
+    print_header("✅ STREAMING UPLOAD TEST PASSED")
+
+
+if __name__ == "__main__":
+    main()
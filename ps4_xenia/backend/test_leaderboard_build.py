@@ -0,0 +1,115 @@
+"""
+Test script for the in-process leaderboard build.
+Runs against a throwaway SQLite database (no server needed) and checks that
+an interaction is counted exactly once whether its InteractionRecorded event
+is consumed before or after the worker's first build of the boards.
+
+    python test_leaderboard_build.py
+"""
+import os
+import sys
+import tempfile
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "leaderboards.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["LEADERBOARD_BACKEND"] = "memory"
+
+from datetime import datetime, timedelta
+from sqlmodel import Session
+from app.core.database import create_db_and_tables, engine
+from app.models.models import Asset, InteractionStatus, User, UserInteraction
+from app.services.event_bus import InteractionRecorded
+from app.services.leaderboards import Leaderboards
+
+failures = 0
+
+
+def print_header(text):
+    print("\n" + "="*70)
+    print(f"  {text}")
+    print("="*70)
+
+
+def check(label, actual, expected):
+    global failures
+    if actual == expected:
+        print(f"✓ {label}: {actual}")
+    else:
+        failures += 1
+        print(f"✗ {label}: expected {expected}, got {actual}")
+
+
+def create_user(email) -> str:
+    with Session(engine) as session:
+        user = User(email=email, full_name="Leader", hashed_password="x", department="Engineering")
+        session.add(user)
+        session.commit()
+        return user.id
+
+
+def create_asset(user_id) -> str:
+    with Session(engine) as session:
+        asset = Asset(title="Intro", description="d", content_url="http://x", skill_tag="Python",
+                      difficulty_level=1, estimated_duration_minutes=10, created_by=user_id)
+        session.add(asset)
+        session.commit()
+        return asset.id
+
+
+def complete(user_id, asset_id, ingested_at=None) -> InteractionRecorded:
+    """Commit a completed interaction and return the event the write path would publish."""
+    with Session(engine) as session:
+        interaction = UserInteraction(
+            user_id=user_id, asset_id=asset_id, status=InteractionStatus.COMPLETED, score=90.0
+        )
+        if ingested_at is not None:
+            interaction.timestamp = interaction.ingested_at = ingested_at
+        session.add(interaction)
+        session.commit()
+        session.refresh(interaction)
+        return InteractionRecorded(
+            interaction_id=interaction.id, user_id=user_id, asset_id=asset_id, status=interaction.status,
+            score=interaction.score, skill_tag="Python", difficulty_level=1,
+            timestamp=interaction.timestamp, ingested_at=interaction.ingested_at,
+        )
+
+
+def completions(boards, user_id):
+    position = boards.position("completions", "all", None, user_id)
+    return position["score"] if position else 0.0
+
+
+print_header("IN-PROCESS LEADERBOARD BUILD")
+create_db_and_tables()
+asset_id = create_asset(create_user("author@example.com"))
+
+# Each scenario uses a fresh Leaderboards (a fresh worker) and its own learner
+
+print("\n[1] Event consumed after a read built the boards (interaction just ingested)")
+user_id, boards = create_user("l1@example.com"), Leaderboards()
+event = complete(user_id, asset_id)
+completions(boards, user_id)  # First read builds the boards
+boards.record([event], {user_id: "Engineering"})
+check("org completions", completions(boards, user_id), 1.0)
+
+print("\n[2] Event consumed after a read built the boards (interaction older than the build lag)")
+user_id, boards = create_user("l2@example.com"), Leaderboards()
+event = complete(user_id, asset_id, ingested_at=datetime.utcnow() - timedelta(minutes=5))
+completions(boards, user_id)
+boards.record([event], {user_id: "Engineering"})
+check("org completions", completions(boards, user_id), 1.0)
+
+print("\n[3] Event consumed before any read (the consumer triggers the build)")
+user_id, boards = create_user("l3@example.com"), Leaderboards()
+event = complete(user_id, asset_id, ingested_at=datetime.utcnow() - timedelta(minutes=5))
+boards.record([event], {user_id: "Engineering"})
+check("org completions", completions(boards, user_id), 1.0)
+
+print("\n[4] Interaction recorded after the build")
+event = complete(user_id, asset_id)
+boards.record([event], {user_id: "Engineering"})
+check("org completions", completions(boards, user_id), 2.0)
+check("department completions", boards.position("completions", "all", "Engineering", user_id)["score"], 2.0)
+
+print_header("PASSED" if not failures else f"FAILED ({failures})")
+sys.exit(1 if failures else 0)
@@ -0,0 +1,135 @@
+"""
+Test script for resumable (tus-style) asset uploads.
+Runs in-process against a throwaway SQLite database and content store (no
+server needed): uploads a file in two PATCHes with a HEAD in between, checks
+offset conflicts, lets a second request take over a stalled PATCH's expired
+lease (the stalled one can neither renew nor record its offset), and
+finalizes into a version whose SHA-256 matches the bytes sent.
+
+    python test_resumable_upload.py
+"""
+import os
+import sys
+import tempfile
+
+WORK_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORK_DIR, 'uploads.db')}"
+os.environ["CONTENT_STORE_ROOT"] = os.path.join(WORK_DIR, "content_store")
+
+import base64
+import hashlib
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+from sqlmodel import Session
+from app.core.database import create_db_and_tables, engine
+from app.core.security import create_access_token
+from app.main import app
+from app.models.models import Asset, AssetUpload, User
+from app.services import resumable_uploads
+from app.services.uploads import UploadError
+
+BASE = "/api/v1/admin"
+TUS = {"Tus-Resumable": resumable_uploads.TUS_VERSION}
+failures = 0
+
+
+def print_header(text):
+    print("\n" + "="*70)
+    print(f"  {text}")
+    print("="*70)
+
+
+def check(label, actual, expected):
+    global failures
+    if actual == expected:
+        print(f"✓ {label}: {actual}")
+    else:
+        failures += 1
+        print(f"✗ {label}: expected {expected}, got {actual}")
+
+
+def create_admin_and_asset():
+    with Session(engine) as session:
+        admin = User(email="admin@example.com", full_name="Admin", hashed_password="x", is_admin=True)
+        session.add(admin)
+        session.commit()
+        asset = Asset(title="Intro", description="d", content_url="http://x", skill_tag="Python",
+                      difficulty_level=1, estimated_duration_minutes=10, created_by=admin.id)
+        session.add(asset)
+        session.commit()
+        return admin.id, asset.id
+
+
+def patch(client, headers, upload_url, offset, data):
+    return client.patch(upload_url, content=data, headers={
+        **headers, **TUS, "Upload-Offset": str(offset), "Content-Type": resumable_uploads.CONTENT_TYPE,
+    })
+
+
+def expire_lease(upload_id):
+    with Session(engine) as session:
+        session.execute(update(AssetUpload).where(AssetUpload.id == upload_id)
+                        .values(locked_until=datetime.utcnow() - timedelta(seconds=1)))
+        session.commit()
+
+
+def lease_lost(action) -> bool:
+    try:
+        action()
+    except UploadError as e:
+        return e.status_code == 409
+    return False
+
+
+print_header("RESUMABLE UPLOADS")
+create_db_and_tables()
+admin_id, asset_id = create_admin_and_asset()
+headers = {"Authorization": f"Bearer {create_access_token({'sub': admin_id})}"}
+payload = os.urandom(300 * 1024)
+half = len(payload) // 2
+
+with TestClient(app) as client:
+    print("\n[1] Create the upload")
+    filename = base64.b64encode(b"intro.bin").decode()
+    response = client.post(f"{BASE}/assets/{asset_id}/uploads", headers={
+        **headers, **TUS, "Upload-Length": str(len(payload)), "Upload-Metadata": f"filename {filename}",
+    })
+    check("status", response.status_code, 201)
+    upload_url = response.headers["Location"].replace("/api/v1/admin", BASE)
+    upload_id = response.json()["id"]
+
+    print("\n[2] First chunk, then resume from the offset HEAD reports")
+    check("first PATCH", patch(client, headers, upload_url, 0, payload[:half]).status_code, 204)
+    response = client.head(upload_url, headers={**headers, **TUS})
+    check("HEAD offset", int(response.headers["Upload-Offset"]), half)
+    check("PATCH at a stale offset", patch(client, headers, upload_url, 0, payload[half:]).status_code, 409)
+
+    print("\n[3] A stalled PATCH loses its expired lease to the resumed one")
+    with Session(engine) as session:
+        upload = session.get(AssetUpload, upload_id)
+        stalled_lease = resumable_uploads.claim(session, upload, half)
+        stalled = resumable_uploads.ChunkWriter(upload)
+        stalled.write(b"bytes written before the stall")
+    check("PATCH while the lease is held", patch(client, headers, upload_url, half, payload[half:]).status_code, 423)
+    expire_lease(upload_id)
+    response = patch(client, headers, upload_url, half, payload[half:])
+    check("resumed PATCH", response.status_code, 204)
+    check("offset after resume", int(response.headers["Upload-Offset"]), len(payload))
+    with Session(engine) as session:
+        upload = session.get(AssetUpload, upload_id)
+        check("stalled renewal refused",
+              lease_lost(lambda: resumable_uploads.renew_lease(session, upload_id, stalled_lease)), True)
+        check("stalled release refused",
+              lease_lost(lambda: resumable_uploads.release(session, upload, stalled, stalled_lease)), True)
+        session.refresh(upload)
+        check("offset kept", upload.upload_offset, len(payload))
+
+    print("\n[4] Finalize")
+    response = client.post(f"{upload_url}/finalize", headers=headers)
+    check("status", response.status_code, 200)
+    check("sha256", response.json()["sha256"], hashlib.sha256(payload).hexdigest())
+    check("size", response.json()["size_bytes"], len(payload))
+
+print_header("PASSED" if not failures else f"FAILED ({failures})")
+sys.exit(1 if failures else 0)
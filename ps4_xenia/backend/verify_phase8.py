@@ -1,6 +1,7 @@
 import requests
 import json
 import random
+import time
 from typing import Dict
 
 BASE_URL = "http://localhost:8001/api/v1"
@@ -49,7 +50,6 @@ def verify():
     print("🚀 Starting Phase 8 Verification...")
     
     # 1. Login/Register New User to ensure fresh recommendations
-    import time
     email = f"test_phase8_{int(time.time())}@example.com"
     password = "password123"
     
@@ -89,8 +89,18 @@ def verify():
     if resp_high.status_code == 200:
         data = resp_high.json()
         print(f"   Message: {data.get('message')}")
-        if data.get('next_recommendation'):
-            print(f"   ✅ Received Next Recommendation: {data['next_recommendation']['title']}")
+        handle = data.get('recommendation_handle')
+        recommendation = None
+        for _ in range(5):  # Computed in the background after the response
+            if not handle:
+                break
+            rec_resp = requests.get(f"{BASE_URL}/learning/{user_id}/recommendation/{handle}")
+            if rec_resp.status_code != 202:
+                recommendation = rec_resp.json() if rec_resp.status_code == 200 else None
+                break
+            time.sleep(0.5)
+        if recommendation:
+            print(f"   ✅ Received Next Recommendation: {recommendation['title']}")
         else:
             print("   ℹ️ No specific recommendation (maybe no harder asset exists?)")
     else:
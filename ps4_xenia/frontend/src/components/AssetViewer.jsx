@@ -20,10 +20,49 @@ export default function AssetViewer({ user }) {
 
     const [resultData, setResultData] = useState(null);
 
+    const pollRecommendation = async (handle, attempts = 5) => {
+        for (let i = 0; i < attempts; i++) {
+            try {
+                const res = await axios.get(`/learning/${user.id}/recommendation/${handle}`);
+                if (res.status === 200) {
+                    setResultData(prev => ({ ...prev, next_recommendation: res.data }));
+                    return;
+                }
+            } catch (e) {
+                return; // 404: nothing left to recommend
+            }
+            await new Promise(resolve => setTimeout(resolve, 500));
+        }
+    };
+
+    const handleQuizSubmit = async (answers) => {
+        setSubmitting(true);
+        const timeSpent = Math.floor((Date.now() - startTime) / 1000);
+
+        try {
+            const res = await axios.post(`/quizzes/${asset.id}/submit`, {
+                answers,
+                time_spent_seconds: timeSpent
+            });
+
+            setScore(res.data.score);
+            setResultData(res.data.progress);
+            setCompleted(true);
+
+            if (res.data.progress?.recommendation_handle) {
+                pollRecommendation(res.data.progress.recommendation_handle);
+            }
+        } catch (e) {
+            console.error(e);
+            alert("Failed to submit quiz");
+            setSubmitting(false);
+        }
+    };
+
     const handleComplete = async (finalScore) => {
         setSubmitting(true);
         const timeSpent = Math.floor((Date.now() - startTime) / 1000);
-        // Use passed score (from Quiz) or state score (from Slider)
+        // Self-assessed score from the slider (quizzes go through handleQuizSubmit)
         const submittedScore = typeof finalScore === 'number' ? finalScore : score;
 
         try {
@@ -38,6 +77,11 @@ export default function AssetViewer({ user }) {
 
             setResultData(res.data);
             setCompleted(true);
+
+            // Next recommendation is computed in the background; poll its handle
+            if (res.data.recommendation_handle) {
+                pollRecommendation(res.data.recommendation_handle);
+            }
             // Removed auto-navigation to allow user to see adaptive results
         } catch (e) {
             console.error(e);
@@ -118,11 +162,7 @@ export default function AssetViewer({ user }) {
                             {asset.quiz_data ? (
                                 <QuizInterface
                                     quizData={asset.quiz_data}
-                                    onComplete={(score) => {
-                                        setScore(score);
-                                        // Trigger submission immediately after quiz
-                                        setTimeout(() => handleComplete(score), 500);
-                                    }}
+                                    onComplete={handleQuizSubmit}
                                 />
                             ) : (
                                 <>
@@ -181,7 +221,7 @@ export default function AssetViewer({ user }) {
                                 {/* Case A: High Score -> Next Recommendation */}
                                 {resultData?.next_recommendation && (
                                     <div className="glass-card p-6 rounded-xl border border-indigo-500/30 bg-indigo-500/10">
-                                        <h4 className="text-sm font-bold text-indigo-300 uppercase mb-3">🚀 Recommended Next Step</h4>
+                                        <h4 className="text-sm font-bold text-indigo-300 uppercase mb-3">🚀 Ready for the next challenge?</h4>
                                         <div className="flex items-center gap-4 bg-black/40 p-4 rounded-lg">
                                             <div className="h-10 w-10 bg-indigo-600 rounded-full flex items-center justify-center flex-shrink-0">
                                                 <Play size={20} className="text-white" />
@@ -247,13 +287,8 @@ function QuizInterface({ quizData, onComplete }) {
         if (currentQ < quizData.length - 1) {
             setCurrentQ(currentQ + 1);
         } else {
-            // Calculate Score
-            let correct = 0;
-            quizData.forEach(q => {
-                if (answers[q.id] === q.correct_index) correct++;
-            });
-            const finalScore = Math.round((correct / quizData.length) * 100);
-            onComplete(finalScore);
+            // Graded on the server; questions arrive without answers
+            onComplete(answers);
         }
     };
 
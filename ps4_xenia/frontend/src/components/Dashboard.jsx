@@ -135,9 +135,15 @@ function NotificationSection({ userId }) {
             }
         };
         fetchNotes();
-        // Poll every 10 seconds for real-time feel
-        const interval = setInterval(fetchNotes, 10000);
-        return () => clearInterval(interval);
+        // Server pushes new notifications over SSE instead of polling
+        const stream = new EventSource(`${axios.defaults.baseURL}/notifications/${userId}/stream`);
+        stream.addEventListener('notification', (event) => {
+            const note = JSON.parse(event.data);
+            setNotifications(prev => [note, ...prev]);
+        });
+        // Sent when we fell behind; reload the list and let EventSource reconnect
+        stream.addEventListener('resync', fetchNotes);
+        return () => stream.close();
     }, [userId]);
 
     if (notifications.length === 0) return null;
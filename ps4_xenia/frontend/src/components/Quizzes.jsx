@@ -15,10 +15,9 @@ export default function Quizzes({ user }) {
 
     const fetchQuizzes = async () => {
         try {
-            const res = await axios.get('/assets');
-            // Filter only assets with quiz data
-            const quizAssets = res.data.filter(asset => asset.quiz_data && asset.quiz_data.length > 0);
-            setAssets(quizAssets);
+            // Metadata only; questions are fetched when a quiz is opened
+            const res = await axios.get('/quizzes', { params: { limit: 100 } });
+            setAssets(res.data);
         } catch (error) {
             console.error('Failed to fetch quizzes:', error);
         } finally {
@@ -26,6 +25,15 @@ export default function Quizzes({ user }) {
         }
     };
 
+    const openQuiz = async (quiz) => {
+        try {
+            const res = await axios.get(`/quizzes/${quiz.id}`);
+            navigate('/learn', { state: { asset: { ...res.data, quiz_data: res.data.questions } } });
+        } catch (error) {
+            console.error('Failed to load quiz:', error);
+        }
+    };
+
     const getDifficultyLabel = (level) => {
         if (level <= 2) return 'Easy';
         if (level <= 4) return 'Moderate';
@@ -119,7 +127,7 @@ export default function Quizzes({ user }) {
                         <div
                             key={asset.id}
                             className="glass-card rounded-xl overflow-hidden hover:shadow-2xl hover:shadow-indigo-900/20 transition-all transform hover:scale-[1.02] cursor-pointer border border-white/10"
-                            onClick={() => navigate('/learn', { state: { asset } })}
+                            onClick={() => openQuiz(asset)}
                         >
                             {/* Card Header */}
                             <div className="bg-black/40 p-4 border-b border-white/10">
@@ -146,7 +154,7 @@ export default function Quizzes({ user }) {
                                 <div className="flex items-center justify-between text-sm">
                                     <div className="flex items-center gap-2 text-gray-400">
                                         <BookOpen size={16} className="text-indigo-400" />
-                                        <span>{asset.quiz_data?.length || 0} Questions</span>
+                                        <span>{asset.question_count || 0} Questions</span>
                                     </div>
                                     <div className="flex items-center gap-2 text-gray-400">
                                         <Clock size={16} className="text-indigo-400" />